@@ -4,18 +4,33 @@
 改编自 horoscope-fortune 项目
 """
 import os
+import sys
 import json
+import time
 import argparse
 import re
-from modules.web_researcher import research_topic
-from modules.news_generator import generate_news_analysis
-from modules.news_script import generate_news_script
-from modules.image_prompts import generate_news_image_prompts
-from modules.content_reviewer import review_content # 新增审校模块
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from modules.web_researcher import research_topic, gather_search_results, summarize_search_results, empty_research
+from modules.news_generator import generate_news_analysis, generate_news_analysis_fused, stream_news_analysis
+from modules.news_script import generate_news_script, build_act_script, ACT_SCRIPT_FIELDS
+from modules.image_prompts import generate_news_image_prompts, build_act_prompt, act_prompt_fields
+from modules.content_reviewer import review_content, set_review_sharded # 新增审校模块
+from modules.rule_reviewer import pre_review
 from modules.copy_generator import generate_news_copy
 from modules.audio_generator import generate_audio
-from modules.image_generator import generate_images
+from modules.image_generator import generate_image
 from modules.video_generator import generate_video
+from modules.pipeline import Stage, StageError, Prefetcher, run_stages
+from modules.json_stream import get_path
+from modules.concurrency import DEFAULT_LIMITS, configure_limits, get_limit
+from modules.artifact_store import get_artifact_store
+from modules.llm_cache import get_llm_cache, set_llm_cache_bypass
+
+# 三幕式: 起因 / 发展 / 影响
+ACT_COUNT = 3
+# 预取产物的临时目录 (位于主题目录下，流水线结束后删除)
+PREFETCH_DIRNAME = ".prefetch"
 
 def slugify(text):
     """
@@ -42,32 +57,73 @@ def ensure_directories(topic_slug):
         os.makedirs(d, exist_ok=True)
     return dirs
 
-def main():
-    parser = argparse.ArgumentParser(description="热点新闻视频自动化生成器")
-    parser.add_argument("-t", "--topic", type=str, required=True, help="新闻主题 (例如: 'DeepSeek发布R1模型')")
-    parser.add_argument("-d", "--date", type=str, help="日期 (格式: YYYYMMDD, 例如: 20260207)")
-    parser.add_argument("--skip-research", action="store_true", help="跳过网络搜索，直接使用 LLM 生成")
-    args = parser.parse_args()
+def build_stages(topic, date, topic_slug, dirs, skip_research=False, fused=False, prefetcher=None, stream=False,
+                 speculative=False):
+    """
+    构建流水线阶段图
 
-    topic = args.topic
-    date = args.date or ""
+    研究 → 分析 → (文案 | 提示词 | 脚本) → 审校 → (3幕图片 | 3幕音频) → 视频
 
-    print(f"🚀 新闻视频生成器启动")
-    print(f"   主题: {topic}")
-    print(f"   日期: {date or '自动'}")
-    print(f"   搜索: {'关闭' if args.skip_research else '开启'}")
-    print("")
+    :param fused: 融合模式，研究阶段只搜索，分析阶段一次 LLM 调用直接生成新闻数据
+    :param prefetcher: 预取任务池 (流式或投机模式下提供)
+    :param stream: 流式分析，某一幕所需字段一完成就提前启动该幕的生图和 TTS (需要 prefetcher)
+    :param speculative: 投机模式，提示词/脚本生成后立即用审校前的文本生成素材，
+                        审校结束后只重新生成文本有变化的幕
+    """
+    def audio_path_for(i):
+        return os.path.join(dirs["audio"], f"act{i+1}.mp3")
 
-    # 1. 创建目录
-    topic_slug = slugify(topic)
-    dirs = ensure_directories(topic_slug)
-    print(f"📁 输出目录: {dirs['root']}")
+    # 预取产物写入临时目录，正式阶段通过素材库与分句缓存复用，不会与正式输出互相覆盖
+    prefetch_dir = os.path.join(dirs["root"], PREFETCH_DIRNAME)
+
+    def _prefetch_image(i, prompt):
+        output_dir = os.path.join(prefetch_dir, "images")
+        os.makedirs(output_dir, exist_ok=True)
+        return generate_image(i, prompt, output_dir, topic_slug)
+
+    def _prefetch_audio(i, script):
+        os.makedirs(prefetch_dir, exist_ok=True)
+        result = generate_audio(script, os.path.join(prefetch_dir, f"act{i+1}.mp3"))
+        return result.output_path if result.ok else None
+
+    # 先套用本地自动修正规则，与审校结果保持一致，提高命中率
+    def prefetch_image(i, prompt):
+        _, [prompt], _ = pre_review([], [prompt], escalate=False)
+        return prefetcher.submit(f"image_act{i+1}", _prefetch_image, i, prompt, fingerprint=prompt)
+
+    def prefetch_audio(i, script):
+        [script], _, _ = pre_review([script], [], escalate=False)
+        return prefetcher.submit(f"audio_act{i+1}", _prefetch_audio, i, script, fingerprint=script)
+
+    # 流式分析字段回调：某一幕依赖的字段齐全后立即预取该幕素材
+    def on_field(path, value, partial):
+        for i in range(ACT_COUNT):
+            if f"image_act{i+1}" not in prefetcher and all(get_path(partial, f) is not None for f in act_prompt_fields(i)):
+                if prefetch_image(i, build_act_prompt(partial, i)):
+                    print(f"   ⚡ 第 {i+1} 幕提示词字段已就绪，提前生图")
+            if f"audio_act{i+1}" not in prefetcher and all(get_path(partial, f) is not None for f in ACT_SCRIPT_FIELDS[i]):
+                if prefetch_audio(i, build_act_script(partial, i)):
+                    print(f"   ⚡ 第 {i+1} 幕脚本字段已就绪，提前合成音频")
+
+    def settle(kind, i, text):
+        key = f"{kind}_act{i+1}"
+        if not prefetcher or key not in prefetcher:
+            return
+        if not prefetcher.matches(key, text):
+            prefetcher.cancel(key)
+            print(f"   ♻️ 第 {i+1} 幕{'提示词' if kind == 'image' else '脚本'}审校后有变化，重新生成")
+        elif prefetcher.wait(key) is not None:
+            print(f"   ⚡ 第 {i+1} 幕{'图片' if kind == 'image' else '音频'}预取有效，直接复用")
 
     # 2. 网络研究
-    research_data = None
-    research_file = os.path.join(dirs["root"], "research_raw.json")
+    def run_research():
+        research_data = None
+        research_file = os.path.join(dirs["root"], "research_raw.json")
+
+        if skip_research:
+            print(f"\n⏭️  跳过网络搜索")
+            return None
 
-    if not args.skip_research:
         if os.path.exists(research_file):
             print(f"\n🔍 发现本地研究数据，直接读取...")
             try:
@@ -78,113 +134,358 @@ def main():
 
         if not research_data:
             print(f"\n🔍 开始网络研究...")
-            research_data = research_topic(topic, date)
+            if fused:
+                # 融合模式只搜索，总结交给分析阶段一并完成
+                print(f"🔍 开始研究主题: {topic}")
+                research_data = empty_research(gather_search_results(topic, date))
+                research_data["fused"] = True
+            else:
+                research_data = research_topic(topic, date)
             # 保存原始数据
             with open(research_file, "w", encoding="utf-8") as f:
                 json.dump(research_data, f, ensure_ascii=False, indent=2)
             print(f"   ✅ 研究数据已保存")
-    else:
-        print(f"\n⏭️  跳过网络搜索")
+
+        return research_data
 
     # 3. 生成新闻分析
-    news_file = os.path.join(dirs["root"], "news_data.json")
-    news_data = None
+    def run_analysis(research_data):
+        news_file = os.path.join(dirs["root"], "news_data.json")
+        news_data = None
 
-    if os.path.exists(news_file):
-        print(f"\n📰 发现本地新闻数据，直接读取...")
-        try:
-            with open(news_file, "r", encoding="utf-8") as f:
-                news_data = json.load(f)
-        except Exception as e:
-            print(f"   ⚠️ 读取失败 ({e})，重新生成...")
+        def save_news(data):
+            with open(news_file, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            print(f"   ✅ 新闻数据已保存")
+
+        if os.path.exists(news_file):
+            print(f"\n📰 发现本地新闻数据，直接读取...")
+            try:
+                with open(news_file, "r", encoding="utf-8") as f:
+                    news_data = json.load(f)
+            except Exception as e:
+                print(f"   ⚠️ 读取失败 ({e})，重新生成...")
+
+        # 研究数据只有搜索结果 (融合模式产生) 时
+        if not news_data and research_data and research_data.get("fused"):
+            search_results = research_data.get("raw_results", [])
+            if fused and search_results:
+                print(f"\n📰 生成新闻分析 (融合模式)...")
+                news_data = generate_news_analysis_fused(topic, date, search_results)
+                if news_data:
+                    save_news(news_data)
+            if not news_data:
+                # 校验失败、没有搜索结果或未开启融合模式：回退到两步流程
+                print(f"   ↩️ 使用 研究总结 + 新闻分析 两步流程")
+                research_data = summarize_search_results(topic, search_results)
+                # 总结结果写回研究数据，下次运行不再重复总结
+                with open(os.path.join(dirs["root"], "research_raw.json"), "w", encoding="utf-8") as f:
+                    json.dump(research_data, f, ensure_ascii=False, indent=2)
 
-    if not news_data:
-        print(f"\n📰 生成新闻分析...")
-        news_data = generate_news_analysis(topic, date, research_data)
-        # 保存数据
-        with open(news_file, "w", encoding="utf-8") as f:
-            json.dump(news_data, f, ensure_ascii=False, indent=2)
-        print(f"   ✅ 新闻数据已保存")
+        if not news_data and stream and prefetcher:
+            print(f"\n📰 生成新闻分析 (流式)...")
+            news_data = stream_news_analysis(topic, date, research_data, on_field=on_field)
+            save_news(news_data)
+        elif not news_data:
+            print(f"\n📰 生成新闻分析...")
+            news_data = generate_news_analysis(topic, date, research_data)
+            save_news(news_data)
+
+        return news_data
 
     # 4. 生成小红书文案
-    copy_path = os.path.join(dirs["copy"], "xiaohongshu.txt")
-    if not os.path.exists(copy_path):
-        print(f"\n📝 生成小红书文案...")
-        xhs_copy = generate_news_copy(news_data)
-        with open(copy_path, "w", encoding="utf-8") as f:
-            f.write(xhs_copy)
-        print(f"   ✅ 文案已保存")
-    else:
-        print(f"\n📝 小红书文案已存在，跳过")
+    def run_copy(news_data):
+        copy_path = os.path.join(dirs["copy"], "xiaohongshu.txt")
+        if not os.path.exists(copy_path):
+            print(f"\n📝 生成小红书文案...")
+            xhs_copy = generate_news_copy(news_data)
+            with open(copy_path, "w", encoding="utf-8") as f:
+                f.write(xhs_copy)
+            print(f"   ✅ 文案已保存")
+        else:
+            print(f"\n📝 小红书文案已存在，跳过")
+        return copy_path
 
     # 5. 生成图片提示词
-    print(f"\n🎨 生成图片提示词...")
-    prompts = generate_news_image_prompts(news_data)
+    def run_prompts(news_data):
+        print(f"\n🎨 生成图片提示词...")
+        prompts = generate_news_image_prompts(news_data)
+        if speculative:
+            # 审校期间先用审校前的提示词生图
+            for i, prompt in enumerate(prompts):
+                prefetch_image(i, prompt)
+        return prompts
 
     # 6. 生成脚本
-    print(f"\n🎙️  生成播客脚本...")
-    script_tracks = generate_news_script(news_data)
+    def run_script(news_data):
+        print(f"\n🎙️  生成播客脚本...")
+        script_tracks = generate_news_script(news_data)
+        if speculative:
+            # 审校期间先用审校前的脚本合成音频
+            for i, script in enumerate(script_tracks):
+                prefetch_audio(i, script)
+        return script_tracks
 
     # 7. 启动内容审校 (AI Reviewer)
-    print(f"\n⚖️  正在进行逻辑与事实审校...")
-    script_tracks, prompts = review_content(topic, script_tracks, prompts)
-
-    # 保存审校后的提示词
-    for i, prompt in enumerate(prompts):
-        prompt_path = os.path.join(dirs["images"], f"prompt_act{i+1}.txt")
-        with open(prompt_path, "w", encoding="utf-8") as f:
-            f.write(prompt)
-    print(f"   ✅ 提示词已保存 (已审校)")
-
-    # 8. 生成图片
-    print(f"\n🖼️  生成封面图...")
-    image_paths = generate_images(topic_slug, prompts, dirs["images"])
-    # 确保路径排序正确
-    image_paths.sort()
-
-    if len(image_paths) < 3:
-        print(f"   ⚠️ 图片生成不完整 ({len(image_paths)}/3)，可能无法生成视频")
-
-    # 9. 生成音频
-    print(f"\n🔊  生成播客音频...")
-    audio_paths = []
-
-    for i, track_text in enumerate(script_tracks):
-        track_idx = i + 1
-        script_path = os.path.join(dirs["audio"], f"script_act{track_idx}.txt")
-        audio_path = os.path.join(dirs["audio"], f"act{track_idx}.mp3")
-
-        # 保存脚本 (已审校)
-        with open(script_path, "w", encoding="utf-8") as f:
-            f.write(track_text)
-
-        # 生成音频
-        if not os.path.exists(audio_path) or os.path.getsize(audio_path) < 1000:
+    def run_review(script_tracks, prompts):
+        print(f"\n⚖️  正在进行逻辑与事实审校...")
+        script_tracks, prompts = review_content(topic, script_tracks, prompts)
+
+        # 保存审校后的提示词
+        for i, prompt in enumerate(prompts):
+            prompt_path = os.path.join(dirs["images"], f"prompt_act{i+1}.txt")
+            with open(prompt_path, "w", encoding="utf-8") as f:
+                f.write(prompt)
+        print(f"   ✅ 提示词已保存 (已审校)")
+
+        return script_tracks, prompts
+
+    # 8. 生成图片 (每幕一个阶段)
+    def make_image_stage(i):
+        def run_image(reviewed):
+            _, prompts = reviewed
+            # 审校未改动提示词时等待预取结束并直接命中素材库，有改动时取消预取
+            settle("image", i, prompts[i])
+            return generate_image(i, prompts[i], dirs["images"], topic_slug)
+        return run_image
+
+    # 9. 生成音频 (每幕一个阶段)
+    def make_audio_stage(i):
+        def run_audio(reviewed):
+            script_tracks, _ = reviewed
+            track_idx = i + 1
+            script_path = os.path.join(dirs["audio"], f"script_act{track_idx}.txt")
+            audio_path = audio_path_for(i)
+
+            # 审校未改动脚本时等待预取结束，有改动时只重新合成变化的句子
+            settle("audio", i, script_tracks[i])
+
+            # 保存脚本 (已审校)
+            with open(script_path, "w", encoding="utf-8") as f:
+                f.write(script_tracks[i])
+
+            # 生成音频 (按句增量合成，文稿未变时直接复用)
             print(f"   - 生成音频 Act {track_idx}...")
-            generate_audio(track_text, audio_path)
-        else:
-            print(f"   - 音频 Act {track_idx} 已存在")
+            result = generate_audio(script_tracks[i], audio_path)
+            if not result.ok:
+                return None
 
-        audio_paths.append(audio_path)
+            return audio_path
+        return run_audio
 
     # 10. 合成视频
-    if len(image_paths) == 3 and len(audio_paths) == 3:
+    def run_video(*assets):
+        image_paths = [p for p in assets[:ACT_COUNT] if p]
+        audio_paths = [p for p in assets[ACT_COUNT:] if p]
+
+        if len(image_paths) < ACT_COUNT:
+            print(f"   ⚠️ 图片生成不完整 ({len(image_paths)}/{ACT_COUNT})，可能无法生成视频")
+
+        if len(image_paths) != ACT_COUNT or len(audio_paths) != ACT_COUNT:
+            print(f"\n⚠️ 素材不足，跳过视频生成 (图片: {len(image_paths)}/{ACT_COUNT}, 音频: {len(audio_paths)}/{ACT_COUNT})")
+            return None
+
+        # 不再只看 mp4 是否存在：素材未变时 generate_video 直接跳过；
+        # 开启 VIDEO_INCREMENTAL 时只换了某一幕也只重编码该幕，默认仍整体重新编码
         video_path = os.path.join(dirs["root"], f"{topic_slug}_新闻视频.mp4")
-        if not os.path.exists(video_path):
-            print(f"\n🎬 合成视频...")
+        print(f"\n🎬 合成视频...")
+        try:
+            if not generate_video(image_paths, audio_paths, video_path):
+                print(f"   ❌ 视频生成失败")
+                return None
+            print(f"   ✅ 视频已保存: {video_path}")
+        except Exception as e:
+            print(f"   ❌ 视频生成失败: {e}")
+            return None
+        return video_path
+
+    image_stages = [f"image_act{i+1}" for i in range(ACT_COUNT)]
+    audio_stages = [f"audio_act{i+1}" for i in range(ACT_COUNT)]
+
+    stages = [
+        Stage("research", run_research),
+        Stage("analysis", run_analysis, ["research"]),
+        Stage("copy", run_copy, ["analysis"], fatal=False),
+        Stage("prompts", run_prompts, ["analysis"]),
+        Stage("script", run_script, ["analysis"]),
+        Stage("review", run_review, ["script", "prompts"]),
+    ]
+    # 图片与音频按幕交错提交，互不等待
+    for i in range(ACT_COUNT):
+        stages.append(Stage(image_stages[i], make_image_stage(i), ["review"], fatal=False))
+        stages.append(Stage(audio_stages[i], make_audio_stage(i), ["review"], fatal=False))
+    stages.append(Stage("video", run_video, image_stages + audio_stages))
+
+    return stages
+
+def run_topic(topic, date="", skip_research=False, workers=6, fused=False, stream=False, speculative=False):
+    """
+    为单个主题执行完整流水线
+
+    :param stream: 流式模式，分析阶段边生成边提前启动各幕生图/TTS
+    :param speculative: 投机模式，审校期间用审校前的文本提前生成素材
+
+    :return: 状态字典 {topic, slug, status, video, error, elapsed}
+    """
+    started = time.perf_counter()
+    topic_slug = slugify(topic)
+    status = {"topic": topic, "slug": topic_slug, "status": "ok", "video": None, "error": None}
+
+    # 1. 创建目录
+    dirs = ensure_directories(topic_slug)
+    print(f"📁 输出目录: {dirs['root']}")
+
+    # 2-10. 按阶段图并发执行
+    prefetcher = Prefetcher(max_workers=ACT_COUNT * 2) if stream or speculative else None
+    stages = build_stages(topic, date, topic_slug, dirs, skip_research=skip_research, fused=fused,
+                          prefetcher=prefetcher, stream=stream, speculative=speculative)
+    try:
+        results, _ = run_stages(stages, max_workers=workers)
+        status["video"] = results.get("video")
+        if not status["video"] or not os.path.exists(status["video"]):
+            status["status"] = "incomplete"
+    except StageError as e:
+        print(f"\n❌ 流水线终止: {e}")
+        status["status"] = "failed"
+        status["error"] = str(e)
+    finally:
+        if prefetcher:
+            # 等进行中的预取结束后再删除临时目录；有效结果已进入素材库与分句缓存
+            prefetcher.shutdown()
+            shutil.rmtree(os.path.join(dirs["root"], PREFETCH_DIRNAME), ignore_errors=True)
+
+    status["elapsed"] = round(time.perf_counter() - started, 2)
+    return status
+
+def print_cache_stats():
+    """
+    打印素材库与 LLM 缓存命中统计
+
+    计数在进程内累计，批量模式下各主题并发执行，因此只在全部主题结束后打印一次
+    """
+    stats = get_artifact_store().stats()
+    print(f"   📦 素材库: 命中 {stats['hits']} / 未命中 {stats['misses']} / 淘汰 {stats['evictions']}")
+    stats = get_llm_cache().stats()
+    print(f"   💾 LLM 缓存: 命中 {stats['hits']} / 未命中 {stats['misses']} / 条目 {stats['entries']} ({stats['bytes']/1024:.1f} KB)")
+
+def read_topics(source):
+    """
+    读取批量主题列表，每行一个主题；空行与 # 开头的行会被忽略
+
+    :param source: 文件路径，"-" 表示从标准输入读取
+    """
+    if source == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith("#")]
+
+def run_batch(topics, date="", skip_research=False, topic_workers=4, stage_workers=6, fused=False, stream=False,
+              speculative=False):
+    """
+    批量处理多个主题
+
+    所有主题共享同一进程内的 API 客户端和各提供方并发配额，
+    吞吐量由提供方限额决定，而不是进程启动和串行等待
+
+    :return: 各主题的状态字典列表 (与输入顺序一致)
+    """
+    print(f"📦 批量模式: {len(topics)} 个主题, 并行主题数 {topic_workers}")
+    print(f"   并发上限: " + ", ".join(f"{p}={get_limit(p)}" for p in DEFAULT_LIMITS))
+
+    statuses = [None] * len(topics)
+    with ThreadPoolExecutor(max_workers=topic_workers) as executor:
+        futures = {
+            executor.submit(run_topic, topic, date, skip_research, stage_workers, fused, stream, speculative): idx
+            for idx, topic in enumerate(topics)
+        }
+        for future in as_completed(futures):
+            idx = futures[future]
             try:
-                generate_video(image_paths, audio_paths, video_path)
-                print(f"   ✅ 视频已保存: {video_path}")
+                statuses[idx] = future.result()
             except Exception as e:
-                print(f"   ❌ 视频生成失败: {e}")
-        else:
-            print(f"\n🎬 视频已存在: {video_path}")
-    else:
-        print(f"\n⚠️ 素材不足，跳过视频生成 (图片: {len(image_paths)}/3, 音频: {len(audio_paths)}/3)")
+                statuses[idx] = {"topic": topics[idx], "slug": slugify(topics[idx]), "status": "failed",
+                                 "video": None, "error": str(e), "elapsed": None}
+            print(f"   [{statuses[idx]['status']}] {topics[idx]}")
+
+    os.makedirs("results", exist_ok=True)
+    summary_path = os.path.join("results", "batch_summary.json")
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(statuses, f, ensure_ascii=False, indent=2)
+
+    ok = sum(1 for s in statuses if s["status"] == "ok")
+    print(f"\n📊 批量完成: 成功 {ok}/{len(statuses)}")
+    for s in statuses:
+        print(f"   - {s['status']:<10} {s['topic']} ({s['elapsed']}s){' ' + s['error'] if s['error'] else ''}")
+    print(f"   汇总文件: {summary_path}")
+    print_cache_stats()
+
+    return statuses
+
+def main():
+    parser = argparse.ArgumentParser(description="热点新闻视频自动化生成器")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("-t", "--topic", type=str, help="新闻主题 (例如: 'DeepSeek发布R1模型')")
+    source.add_argument("-b", "--batch", type=str, help="批量主题文件，每行一个主题；'-' 表示从标准输入读取")
+    parser.add_argument("-d", "--date", type=str, help="日期 (格式: YYYYMMDD, 例如: 20260207)")
+    parser.add_argument("--skip-research", action="store_true", help="跳过网络搜索，直接使用 LLM 生成")
+    parser.add_argument("--fused", action="store_true", help="融合模式：一次 LLM 调用从搜索结果直接生成新闻数据")
+    parser.add_argument("--stream", action="store_true", help="流式分析：字段一生成完就提前启动对应幕的生图和 TTS")
+    parser.add_argument("--speculative", action="store_true", help="投机模式：审校期间先用审校前的文本生图和合成音频")
+    parser.add_argument("--sharded-review", action="store_true", help="按幕拆分并发审校，单幕失败只回退该幕")
+    parser.add_argument("--no-llm-cache", action="store_true", help="绕过 LLM 响应缓存 (新结果仍会写入)")
+    parser.add_argument("--workers", type=int, default=6, help="单个主题内并发执行的最大阶段数 (默认: 6)")
+    parser.add_argument("--topic-workers", type=int, default=4, help="批量模式下同时处理的主题数 (默认: 4)")
+    parser.add_argument("--max-search", type=int, help="搜索 API 并发上限")
+    parser.add_argument("--max-llm", type=int, help="LLM 并发上限")
+    parser.add_argument("--max-image", type=int, help="生图 API 并发上限")
+    parser.add_argument("--max-tts", type=int, help="豆包 TTS 并发上限")
+    parser.add_argument("--max-ffmpeg", type=int, help="本地 ffmpeg 编码并发上限")
+    args = parser.parse_args()
+
+    configure_limits(
+        search=args.max_search,
+        llm=args.max_llm,
+        image=args.max_image,
+        tts=args.max_tts,
+        ffmpeg=args.max_ffmpeg
+    )
+
+    if args.no_llm_cache:
+        set_llm_cache_bypass(True)
+    if args.sharded_review:
+        set_review_sharded(True)
+
+    date = args.date or ""
+
+    if args.batch:
+        topics = read_topics(args.batch)
+        if not topics:
+            print("⚠️ 主题列表为空")
+            return
+        statuses = run_batch(topics, date, args.skip_research, args.topic_workers, args.workers, args.fused, args.stream,
+                             args.speculative)
+        if any(s["status"] == "failed" for s in statuses):
+            sys.exit(1)
+        return
+
+    topic = args.topic
+
+    print(f"🚀 新闻视频生成器启动")
+    print(f"   主题: {topic}")
+    print(f"   日期: {date or '自动'}")
+    print(f"   搜索: {'关闭' if args.skip_research else '开启'}")
+    print("")
+
+    status = run_topic(topic, date, args.skip_research, args.workers, args.fused, args.stream, args.speculative)
+    print_cache_stats()
+    if status["status"] == "failed":
+        return
 
     print(f"\n✅ 所有任务完成！")
-    print(f"   输出目录: {dirs['root']}")
-    print(f"   视频文件: {topic_slug}_新闻视频.mp4")
+    print(f"   输出目录: results/{status['slug']}")
+    print(f"   视频文件: {status['slug']}_新闻视频.mp4")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,221 @@
+"""
+内容寻址素材库模块
+按 (提供方, 模型, 提示词/文本, 参数) 的哈希保存生成的图片与音频，
+所有 results/ 主题共享；超出磁盘预算时按最近使用时间 (LRU) 淘汰
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ARTIFACT_STORE_DIR = os.getenv("ARTIFACT_STORE_DIR", "results/.cache/artifacts")
+ARTIFACT_STORE_BUDGET_MB = float(os.getenv("ARTIFACT_STORE_BUDGET_MB", "2048"))
+# 两次完整扫描之间的最短间隔 (秒)；期间只在估算用量超出预算时才提前扫描
+ARTIFACT_STORE_SCAN_INTERVAL = float(os.getenv("ARTIFACT_STORE_SCAN_INTERVAL", "60"))
+
+
+def make_key(provider, model, content, params=None):
+    """
+    计算素材的内容哈希
+
+    :param provider: 提供方 (如 "image" / "doubao-tts")
+    :param model: 模型或资源 ID
+    :param content: 提示词或文本
+    :param params: 影响输出的其他参数字典
+    :return: sha256 十六进制字符串
+    """
+    payload = json.dumps([provider, model, content, params or {}], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# Linux FICLONE ioctl：支持写时复制的文件系统 (btrfs / XFS 等) 上共享数据块
+_FICLONE = 0x40049409
+
+
+def _reflink(src, dest):
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(src, "rb") as s, open(dest, "wb") as d:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        return True
+    except OSError:
+        return False
+
+
+def clone_or_copy(src, dest):
+    """
+    写时复制 (reflink) 到目标路径，不支持时退回普通复制；目标已存在时替换
+
+    不使用硬链接：主题目录中的素材可能被就地修改 (例如手动修图)，
+    硬链接会连带改掉素材库中被其他主题共用的同一份文件
+    """
+    tmp_path = dest + ".part"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    if not _reflink(src, tmp_path):
+        shutil.copyfile(src, tmp_path)
+    os.replace(tmp_path, dest)
+
+
+def evict_lru(root, budget_bytes):
+    """
+    目录超出磁盘预算时按修改时间 (最近使用时间) 从旧到新删除文件
+
+    未完成的临时文件 (.part / .tmp) 不计入用量也不淘汰
+
+    :return: (淘汰后的用量字节数, 淘汰的文件数)
+    """
+    entries = []
+    total = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if name.endswith((".part", ".tmp")):
+                continue
+            path = os.path.join(dirpath, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+    evicted = 0
+    if total <= budget_bytes:
+        return total, evicted
+
+    for _, size, path in sorted(entries):
+        if total <= budget_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        evicted += 1
+    return total, evicted
+
+
+class ArtifactStore:
+    """
+    内容寻址素材库
+
+    :param root: 存储目录
+    :param budget_bytes: 磁盘预算 (字节)，写入后超出预算时淘汰最久未使用的素材
+    """
+
+    def __init__(self, root, budget_bytes, scan_interval=None):
+        self.root = root
+        self.budget_bytes = budget_bytes
+        self.scan_interval = ARTIFACT_STORE_SCAN_INTERVAL if scan_interval is None else scan_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # 上次扫描得到的用量与之后新写入的字节数，用于判断是否需要提前扫描
+        self._usage = None
+        self._pending_bytes = 0
+        self._last_scan = 0.0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        os.makedirs(root, exist_ok=True)
+
+    def path_for(self, key, ext):
+        return os.path.join(self.root, key[:2], f"{key}{ext}")
+
+    @contextmanager
+    def lock(self, key):
+        """
+        同一素材的生成互斥，避免多个主题同时生成相同内容
+        """
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            yield
+
+    def _touch(self, path):
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def get(self, key, dest, ext):
+        """
+        命中时将素材复制 (支持时为 reflink) 到 dest
+
+        :return: 是否命中
+        """
+        path = self.path_for(key, ext)
+        if not os.path.exists(path):
+            with self._lock:
+                self.misses += 1
+            return False
+        self._touch(path)
+        clone_or_copy(path, dest)
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def put(self, key, src, ext):
+        """
+        将已生成的文件存入素材库
+
+        :return: 素材库中的路径
+        """
+        path = self.path_for(key, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        clone_or_copy(src, path)
+        self._touch(path)
+        self._maybe_evict(path)
+        return path
+
+    def _maybe_evict(self, path):
+        # 不在每次写入时遍历整个目录：估算用量未超预算且距上次扫描不足 scan_interval 时跳过
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        with self._lock:
+            self._pending_bytes += size
+            due = (self._usage is None
+                   or self._usage + self._pending_bytes > self.budget_bytes
+                   or time.monotonic() - self._last_scan >= self.scan_interval)
+        if due:
+            self.evict()
+
+    def evict(self):
+        """
+        超出磁盘预算时按最近使用时间淘汰 (见 evict_lru)
+        """
+        usage, evicted = evict_lru(self.root, self.budget_bytes)
+        with self._lock:
+            self.evictions += evicted
+            self._usage = usage
+            self._pending_bytes = 0
+            self._last_scan = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_artifact_store():
+    """
+    返回进程内共享的素材库
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ArtifactStore(ARTIFACT_STORE_DIR, int(ARTIFACT_STORE_BUDGET_MB * 1024 * 1024))
+        return _default_store
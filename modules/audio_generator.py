@@ -1,9 +1,22 @@
 import os
+import re
 import json
+import time
+import hashlib
 import uuid
-import requests
 import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
+from modules.concurrency import provider_slot, get_limit
+from modules.retry import backoff_delay, parse_retry_after
+from modules.mp3_utils import mp3_duration
+from modules.ffmpeg_utils import concat_mp3_gapless
+from modules.text_utils import split_sentences, chunk_sentences
+from modules.news_script import STOCK_PHRASES
+from modules.artifact_store import get_artifact_store, make_key
 
 load_dotenv()
 
@@ -14,6 +27,13 @@ DOUBAO_ACCESS_TOKEN = os.getenv("DOUBAO_ACCESS_TOKEN")
 DOUBAO_APP_ID = os.getenv("DOUBAO_APP_ID")
 DOUBAO_RESOURCE_ID = os.getenv("DOUBAO_RESOURCE_ID", "seed-tts-2.0")
 VOICE_TYPE = os.getenv("VOICE_TYPE", "zh_male_m191_uranus_bigtts")
+TTS_TIMEOUT = float(os.getenv("TTS_TIMEOUT", "60"))
+TTS_MAX_RETRIES = int(os.getenv("TTS_MAX_RETRIES", "3"))
+# 超过该字数的文本按句切块并发合成 (用于 synthesize / synthesize_batch；
+# 主流程的 generate_audio 走按句增量合成，每句就是一个并发单元，不使用该设置)
+TTS_CHUNK_CHARS = int(os.getenv("TTS_CHUNK_CHARS", "80"))
+# 固定话术预合成音频目录，留空则关闭
+TTS_PHRASE_CACHE_DIR = os.getenv("TTS_PHRASE_CACHE_DIR", "results/.cache/tts_phrases")
 
 def generate_podcast_segments(zodiac, fortune_data):
     """
@@ -87,100 +107,521 @@ def generate_three_act_script(zodiac, fortune_data):
 
     return tracks
 
-def generate_audio(text, output_path):
+class TTSResult:
     """
-    调用豆包语音合成 v3 API 生成音频文件
+    单次语音合成结果
+
+    :param output_path: 输出音频路径
+    :param ok: 是否成功
+    :param bytes_written: 写入的字节数
+    :param duration: 音频时长 (秒)
+    :param latency: 请求耗时 (秒，含重试)
+    :param attempts: 实际尝试次数
+    :param error: 失败原因
+    :param cached_chars: 直接复用预合成音频的字数
+    :param reused_segments: 增量合成时复用的句子数
+    :param synthesized_segments: 增量合成时重新合成的句子数
     """
-    if not DOUBAO_ACCESS_TOKEN:
-        print("⚠️ 未配置 DOUBAO_ACCESS_TOKEN，跳过音频生成")
-        return
 
-    print(f"正在调用豆包 TTS v3 生成音频: {output_path}...")
+    def __init__(self, output_path, ok=False, bytes_written=0, duration=0.0, latency=0.0, attempts=0, error=None,
+                 cached_chars=0, reused_segments=0, synthesized_segments=0):
+        self.output_path = output_path
+        self.cached_chars = cached_chars
+        self.reused_segments = reused_segments
+        self.synthesized_segments = synthesized_segments
+        self.ok = ok
+        self.bytes_written = bytes_written
+        self.duration = duration
+        self.latency = latency
+        self.attempts = attempts
+        self.error = error
 
-    # 构造请求头
-    # 根据截图文档：Token 使用 X-Api-Access-Key
-    headers = {
-        "X-Api-Access-Key": DOUBAO_ACCESS_TOKEN,
-        "X-Api-Resource-Id": DOUBAO_RESOURCE_ID,
-        "X-Api-App-Key": DOUBAO_APP_ID,
-        "Content-Type": "application/json",
-        "Connection": "keep-alive"
-    }
+    def __repr__(self):
+        return (f"TTSResult({os.path.basename(self.output_path)}, ok={self.ok}, "
+                f"{self.bytes_written/1024:.1f}KB, {self.duration:.1f}s, latency={self.latency:.2f}s)")
+
+
+class TTSError(Exception):
+    """
+    TTS 请求失败
+
+    :param retryable: 是否值得重试 (429/5xx/流被截断)
+    """
+
+    def __init__(self, message, retryable=False, retry_after=None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def split_stock_phrases(text, phrases):
+    """
+    按固定话术切分文本
+
+    :param text: 原始文本
+    :param phrases: 固定话术列表
+    :return: [(片段, 是否固定话术), ...]；只剩标点的可变片段会被丢弃
+    """
+    if not phrases:
+        return [(text.strip(), False)] if text.strip() else []
+
+    pattern = re.compile("|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True)))
+    pieces = []
+    pos = 0
+    for match in pattern.finditer(text):
+        before = text[pos:match.start()].strip()
+        if re.search(r"\w", before):
+            pieces.append((before, False))
+        pieces.append((match.group(0), True))
+        pos = match.end()
+    rest = text[pos:].strip()
+    if re.search(r"\w", rest):
+        pieces.append((rest, False))
+    return pieces
+
+
+class PhraseAudioCache:
+    """
+    固定话术音频缓存
+
+    按 (文本, 音色, 语速, 情感) 缓存预合成的 MP3，
+    同一话术只合成一次，之后每期视频直接拼接
+    """
 
-    # 构造请求体
-    # 移除文本中的指令，改用 audio_params 中的 emotion 参数
-
-    payload = {
-        "req_params": {
-            "text": text,
-            "speaker": VOICE_TYPE,
-            "additions": json.dumps({
-                "disable_markdown_filter": False,
-                "enable_language_detector": True,
-                "enable_latex_tn": True,
-                "disable_default_bit_rate": True,
-                "max_length_to_filter_parenthesis": 0,
-                "cache_config": {"text_type": 1, "use_cache": True}
-            }),
-            "audio_params": {
-                "format": "mp3",
-                "sample_rate": 24000,
-                "speed_ratio": 1.1, # 语速稍快
-                "volume_ratio": 1.0,
-                "pitch_ratio": 1.0,
-                "emotion": "story"  # 使用 story 情感模式，适合运势播报
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path_for(self, text, voice, speed_ratio, emotion):
+        key = json.dumps([text, voice, speed_ratio, emotion], ensure_ascii=False)
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.mp3")
+
+    def get_or_create(self, text, voice, speed_ratio, emotion, synthesize):
+        """
+        读取缓存，未命中时调用 synthesize() 合成并写入
+
+        :param synthesize: 无参函数，返回 (audio_bytes, attempts)
+        :return: (audio_bytes, attempts)，命中缓存时 attempts 为 0
+        """
+        path = self.path_for(text, voice, speed_ratio, emotion)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(path, threading.Lock())
+
+        # 同一话术并发请求时只合成一次
+        with key_lock:
+            if os.path.exists(path) and os.path.getsize(path) > 0:
+                with open(path, "rb") as f:
+                    audio = f.read()
+                with self._lock:
+                    self.hits += 1
+                return audio, 0
+
+            audio, attempts = synthesize()
+            tmp_path = path + ".part"
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self.misses += 1
+            return audio, attempts
+
+
+class DoubaoTTSClient:
+    """
+    豆包语音合成 v3 客户端
+
+    复用连接池，请求失败 (429/5xx/流被截断) 时指数退避重试
+    """
+
+    def __init__(self, access_token=None, app_id=None, resource_id=None, voice_type=None,
+                 pool_size=8, max_retries=None, timeout=None, stock_phrases=None, phrase_cache_dir=None):
+        self.access_token = access_token or DOUBAO_ACCESS_TOKEN
+        self.app_id = app_id or DOUBAO_APP_ID
+        self.resource_id = resource_id or DOUBAO_RESOURCE_ID
+        self.voice_type = voice_type or VOICE_TYPE
+        self.max_retries = TTS_MAX_RETRIES if max_retries is None else max_retries
+        self.timeout = timeout or TTS_TIMEOUT
+        self.stock_phrases = STOCK_PHRASES if stock_phrases is None else stock_phrases
+        cache_dir = TTS_PHRASE_CACHE_DIR if phrase_cache_dir is None else phrase_cache_dir
+        self.phrase_cache = PhraseAudioCache(cache_dir) if cache_dir else None
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        # 根据截图文档：Token 使用 X-Api-Access-Key
+        self.session.headers.update({
+            "X-Api-Access-Key": self.access_token or "",
+            "X-Api-Resource-Id": self.resource_id,
+            "X-Api-App-Key": self.app_id or "",
+            "Content-Type": "application/json",
+        })
+
+    def build_payload(self, text, speed_ratio=1.1, emotion="story"):
+        """
+        构造请求体
+        移除文本中的指令，改用 audio_params 中的 emotion 参数
+        """
+        return {
+            "req_params": {
+                "text": text,
+                "speaker": self.voice_type,
+                "additions": json.dumps({
+                    "disable_markdown_filter": False,
+                    "enable_language_detector": True,
+                    "enable_latex_tn": True,
+                    "disable_default_bit_rate": True,
+                    "max_length_to_filter_parenthesis": 0,
+                    "cache_config": {"text_type": 1, "use_cache": True}
+                }),
+                "audio_params": {
+                    "format": "mp3",
+                    "sample_rate": 24000,
+                    "speed_ratio": speed_ratio, # 语速稍快
+                    "volume_ratio": 1.0,
+                    "pitch_ratio": 1.0,
+                    "emotion": emotion  # 使用 story 情感模式，适合新闻播报
+                }
             }
         }
-    }
 
-    try:
-        response = requests.post(DOUBAO_API_URL, json=payload, headers=headers, timeout=60, stream=True) # Enable streaming
-
-        if response.status_code == 200:
-            # 准备一个 buffer 或者直接追加写入文件
-            with open(output_path, "wb") as f:
-                # 豆包 v3 协议可能是流式返回多个 JSON 对象，每个对象以换行符分隔
-                # 或者是一个持续的 SSE 流。requests 的 iter_lines 可以处理。
-                for line in response.iter_lines():
-                    if not line:
-                        continue
-                    try:
-                        # line 是 bytes，需要 decode
-                        line_text = line.decode('utf-8')
-                        data = json.loads(line_text)
-
-                        # 提取音频数据
-                        # 兼容 v3 常见结构: data["data"]["audio"] (base64)
-                        if data and "data" in data and isinstance(data["data"], dict) and "audio" in data["data"]:
-                            audio_chunk = base64.b64decode(data["data"]["audio"])
-                            f.write(audio_chunk)
-                        # 兼容可能得直接 Base64 (较少见但保留逻辑)
-                        elif data and "data" in data and isinstance(data["data"], str) and len(data["data"]) > 100:
-                            audio_chunk = base64.b64decode(data["data"])
-                            f.write(audio_chunk)
-
-                        # 检查是否结束 (部分协议有 is_last 字段，但通常读完 stream 即可)
-
-                    except json.JSONDecodeError:
-                        continue
-                    except Exception as e:
-                        print(f"⚠️ 解析 Chunk 出错: {e}")
-
-            # 验证文件大小
-            file_size = os.path.getsize(output_path)
-            if file_size > 10000: # 大于 10KB 才算有效
-                print(f"✅ 音频生成成功: {output_path} (Size: {file_size/1024:.2f} KB)")
+    def _request_audio(self, payload):
+        """
+        发送一次请求并读取完整音频流
+
+        :return: 音频字节
+        :raises TTSError: 请求失败或流被截断
+        """
+        # 流式读取期间持续占用 TTS 并发名额
+        with provider_slot("tts"):
+            try:
+                response = self.session.post(DOUBAO_API_URL, json=payload, timeout=self.timeout, stream=True)
+            except requests.RequestException as e:
+                raise TTSError(f"请求异常: {e}", retryable=True)
+
+            with response:
+                if response.status_code != 200:
+                    retryable = response.status_code == 429 or response.status_code >= 500
+                    raise TTSError(
+                        f"请求失败: {response.status_code} {response.text[:200]}",
+                        retryable=retryable,
+                        retry_after=parse_retry_after(response.headers.get("Retry-After"))
+                    )
+
+                chunks = []
+                finished = False
+                try:
+                    # 豆包 v3 协议流式返回多个 JSON 对象，每个对象以换行符分隔
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        try:
+                            data = json.loads(line.decode("utf-8"))
+                        except (json.JSONDecodeError, UnicodeDecodeError):
+                            continue
+                        if not isinstance(data, dict):
+                            continue
+
+                        code = data.get("code", 0)
+                        # 20000000 为正常结束标记
+                        if code == 20000000:
+                            finished = True
+                            continue
+                        if code not in (0, None):
+                            raise TTSError(f"合成出错: {code} {data.get('message', '')}",
+                                           retryable=str(code).startswith(("429", "5")))
+
+                        # 兼容 v3 常见结构: data["data"]["audio"] (base64) 或直接 Base64
+                        payload_data = data.get("data")
+                        if isinstance(payload_data, dict) and payload_data.get("audio"):
+                            chunks.append(base64.b64decode(payload_data["audio"]))
+                        elif isinstance(payload_data, str) and len(payload_data) > 100:
+                            chunks.append(base64.b64decode(payload_data))
+                except requests.RequestException as e:
+                    raise TTSError(f"音频流中断: {e}", retryable=True)
+
+        audio = b"".join(chunks)
+        if not finished:
+            raise TTSError(f"音频流被截断 (已收到 {len(audio)} bytes)", retryable=True)
+        if not audio:
+            raise TTSError("响应中没有音频数据", retryable=True)
+        return audio
+
+    def _synthesize_bytes(self, text, speed_ratio=1.1, emotion="story", label=""):
+        """
+        合成一段文本并返回音频字节，可重试错误按指数退避重试
+
+        :return: (audio_bytes, attempts)
+        :raises TTSError: 重试耗尽或不可重试的错误 (包括未配置 Token)
+        """
+        # 只在确实需要请求接口时检查 Token，已缓存的句子和固定话术仍可离线拼接
+        if not self.access_token:
+            raise TTSError("未配置 DOUBAO_ACCESS_TOKEN")
+        payload = self.build_payload(text, speed_ratio, emotion)
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self._request_audio(payload), attempt + 1
+            except TTSError as e:
+                if not e.retryable or attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt, base=1.0, cap=20.0, retry_after=e.retry_after)
+                print(f"⚠️ TTS 重试 ({label}, 尝试 {attempt+1}): {e}，{delay:.1f}s 后重试")
+                time.sleep(delay)
+
+    def plan_units(self, text, per_sentence=False):
+        """
+        将文本拆分为合成单元：固定话术 (走预合成缓存) 与可变文本 (超长时按句切块)
+
+        :param per_sentence: 为 True 时可变文本逐句拆分 (用于增量合成)
+        :return: [(text, is_stock), ...]
+        """
+        stock = self.stock_phrases if self.phrase_cache else []
+        units = []
+        for piece, is_stock in split_stock_phrases(text, stock):
+            if is_stock:
+                units.append((piece, True))
+            elif per_sentence:
+                units.extend((sentence, False) for sentence in split_sentences(piece))
+            elif len(piece) > TTS_CHUNK_CHARS:
+                units.extend((chunk, False) for chunk in chunk_sentences(split_sentences(piece), TTS_CHUNK_CHARS))
             else:
-                print(f"⚠️ 音频生成可能不完整: {output_path} (Size: {file_size} bytes)")
+                units.append((piece, False))
+        return units
+
+    def segment_hash(self, text, speed_ratio, emotion):
+        """
+        句子音频的内容哈希 (资源 + 文本 + 音色 + 语速 + 情感)，同时作为素材库的键
+        """
+        return make_key("doubao-tts", self.resource_id, text,
+                        {"voice": self.voice_type, "speed_ratio": speed_ratio, "emotion": emotion})
+
+    def _synthesize_unit(self, unit, speed_ratio, emotion, label):
+        text, is_stock = unit
+        if is_stock:
+            return self.phrase_cache.get_or_create(
+                text, self.voice_type, speed_ratio, emotion,
+                lambda: self._synthesize_bytes(text, speed_ratio, emotion, label)
+            )
+        return self._synthesize_bytes(text, speed_ratio, emotion, label)
+
+    def _synthesize_units(self, units, speed_ratio=1.1, emotion="story", label=""):
+        """
+        并发合成多个单元并无间隙拼接 (见 ffmpeg_utils.concat_mp3_gapless)
+
+        :return: (audio_bytes, attempts)
+        """
+        with ThreadPoolExecutor(max_workers=min(len(units), get_limit("tts"))) as executor:
+            parts = list(executor.map(
+                lambda item: self._synthesize_unit(item[1], speed_ratio, emotion, f"{label}#{item[0]+1}"),
+                enumerate(units)
+            ))
+        return concat_mp3_gapless([audio for audio, _ in parts]), sum(attempts for _, attempts in parts)
+
+    def synthesize(self, text, output_path, speed_ratio=1.1, emotion="story"):
+        """
+        合成文本并写入文件
+
+        固定话术直接复用预合成音频；长文本在句末标点处切分为多个块并发合成，
+        再解码拼接后整体编码一次 (无间隙)，整段耗时约等于最慢的一个块
+
+        :return: TTSResult
+        """
+        result = TTSResult(output_path)
+        if not self.access_token:
+            result.error = "未配置 DOUBAO_ACCESS_TOKEN"
+            print("⚠️ 未配置 DOUBAO_ACCESS_TOKEN，跳过音频生成")
+            return result
+
+        label = os.path.basename(output_path)
+        units = self.plan_units(text) or [(text, False)]
+        result.cached_chars = sum(len(t) for t, is_stock in units if is_stock)
+        started = time.perf_counter()
+
+        try:
+            if len(units) > 1:
+                print(f"   - {label}: 拆分为 {len(units)} 段并发合成 (固定话术 {result.cached_chars} 字)")
+                audio, result.attempts = self._synthesize_units(units, speed_ratio, emotion, label)
+            else:
+                audio, result.attempts = self._synthesize_unit(units[0], speed_ratio, emotion, label)
+
+            tmp_path = output_path + ".part"
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, output_path)
+
+            result.ok = True
+            result.bytes_written = len(audio)
+            result.duration = mp3_duration(audio)
+        except (TTSError, ValueError) as e:
+            result.error = str(e)
+            print(f"❌ TTS 失败 ({label}): {e}")
+
+        result.latency = time.perf_counter() - started
+        return result
+
+    def _segment_audio(self, entry, segment_dir, speed_ratio, emotion, label):
+        """
+        读取或合成单句音频；可变句子保存到分句目录供下次复用
+        """
+        if entry["stock"]:
+            return self._synthesize_unit((entry["text"], True), speed_ratio, emotion, label)
+
+        path = os.path.join(segment_dir, f"{entry['hash']}.mp3")
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as f:
+                return f.read(), 0
+
+        # 其他主题合成过的相同句子直接从素材库取出
+        store = get_artifact_store()
+        with store.lock(entry["hash"]):
+            if store.get(entry["hash"], path, ".mp3"):
+                with open(path, "rb") as f:
+                    return f.read(), 0
+
+            audio, attempts = self._synthesize_bytes(entry["text"], speed_ratio, emotion, label)
+            tmp_path = path + ".part"
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+            store.put(entry["hash"], path, ".mp3")
+            return audio, attempts
+
+    def synthesize_incremental(self, text, output_path, segment_dir=None, speed_ratio=1.1, emotion="story"):
+        """
+        按句增量合成
+
+        每句音频以内容哈希命名保存在分句目录 (并存入共享素材库)，manifest.json 记录句子顺序。
+        文稿修改后只重新合成变化的句子，其余句子直接复用并重新拼接；
+        文稿完全未变且输出文件存在时直接跳过
+
+        :param segment_dir: 分句目录，默认 <输出文件名>_segments
+        :return: TTSResult
+        """
+        result = TTSResult(output_path)
+        label = os.path.basename(output_path)
+        segment_dir = segment_dir or os.path.splitext(output_path)[0] + "_segments"
+        os.makedirs(segment_dir, exist_ok=True)
+        manifest_path = os.path.join(segment_dir, "manifest.json")
 
-        else:
-            print(f"❌ 请求失败: {response.status_code}")
+        units = self.plan_units(text, per_sentence=True) or [(text, False)]
+        entries = [
+            {"text": t, "stock": is_stock, "hash": self.segment_hash(t, speed_ratio, emotion)}
+            for t, is_stock in units
+        ]
+        hashes = [e["hash"] for e in entries]
+        result.cached_chars = sum(len(e["text"]) for e in entries if e["stock"])
+
+        manifest = None
+        if os.path.exists(manifest_path):
             try:
-                print(f"   Response: {response.json()}")
-            except:
-                print(f"   Response: {response.text}")
-
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        print(f"❌ 请求异常: {str(e)}")
+                with open(manifest_path, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                manifest = None
+
+        # 文稿未变：直接复用已有音频
+        if manifest and manifest.get("hashes") == hashes and os.path.exists(output_path):
+            with open(output_path, "rb") as f:
+                audio = f.read()
+            result.ok = True
+            result.bytes_written = len(audio)
+            result.duration = mp3_duration(audio)
+            result.reused_segments = len(entries)
+            print(f"   - {label}: 文稿未变，复用已有音频")
+            return result
+
+        existing = {e["hash"] for e in entries
+                    if not e["stock"] and os.path.exists(os.path.join(segment_dir, f"{e['hash']}.mp3"))}
+        pending = sum(1 for e in entries if not e["stock"] and e["hash"] not in existing)
+        result.reused_segments = len(existing)
+        result.synthesized_segments = pending
+        print(f"   - {label}: 共 {len(entries)} 句，复用 {len(existing)} 句，需合成 {pending} 句")
+
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, min(len(entries), get_limit("tts")))) as executor:
+                parts = list(executor.map(
+                    lambda item: self._segment_audio(item[1], segment_dir, speed_ratio, emotion, f"{label}#{item[0]+1}"),
+                    enumerate(entries)
+                ))
+            audio = concat_mp3_gapless([a for a, _ in parts])
+            result.attempts = sum(n for _, n in parts)
+
+            tmp_path = output_path + ".part"
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, output_path)
+
+            with open(manifest_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "voice": self.voice_type,
+                    "speed_ratio": speed_ratio,
+                    "emotion": emotion,
+                    "hashes": hashes,
+                    "segments": entries
+                }, f, ensure_ascii=False, indent=2)
+
+            # 清理不再使用的旧句子
+            keep = {f"{h}.mp3" for h in hashes}
+            for name in os.listdir(segment_dir):
+                if name.endswith(".mp3") and name not in keep:
+                    os.remove(os.path.join(segment_dir, name))
+
+            result.ok = True
+            result.bytes_written = len(audio)
+            result.duration = mp3_duration(audio)
+        except (TTSError, ValueError) as e:
+            result.error = str(e)
+            print(f"❌ TTS 失败 ({label}): {e}")
+
+        result.latency = time.perf_counter() - started
+        return result
+
+    def synthesize_batch(self, items, max_concurrency=None, **audio_params):
+        """
+        并发合成多段文本
+
+        :param items: [(text, output_path), ...]
+        :param max_concurrency: 最大并发数，默认使用 TTS 并发上限
+        :return: 与 items 顺序一致的 TTSResult 列表
+        """
+        if not items:
+            return []
+        workers = max_concurrency or get_limit("tts")
+        with ThreadPoolExecutor(max_workers=min(workers, len(items))) as executor:
+            return list(executor.map(
+                lambda item: self.synthesize(item[0], item[1], **audio_params),
+                items
+            ))
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+def get_tts_client():
+    """
+    返回进程内共享的 TTS 客户端 (共享连接池)
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = DoubaoTTSClient()
+        return _default_client
+
+def generate_audio(text, output_path):
+    """
+    调用豆包语音合成 v3 API 生成音频文件 (按句增量合成，只重新合成修改过的句子)
+
+    每句单独合成并发执行，因此不使用 TTS_CHUNK_CHARS 切块；整段切块合成见 DoubaoTTSClient.synthesize
+
+    :return: TTSResult
+    """
+    print(f"正在调用豆包 TTS v3 生成音频: {output_path}...")
+    result = get_tts_client().synthesize_incremental(text, output_path)
+    if result.ok:
+        print(f"✅ 音频生成成功: {result}")
+    return result
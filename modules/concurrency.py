@@ -0,0 +1,131 @@
+"""
+并发控制模块
+按服务提供方限制同一进程内同时进行的外部调用数，
+批量模式下多个主题共享这些配额 (搜索 / LLM / 生图 / 豆包TTS / 本地ffmpeg编码)
+"""
+import os
+import time
+import threading
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 默认并发上限，可通过环境变量 CONCURRENCY_<PROVIDER> 覆盖
+DEFAULT_LIMITS = {
+    "search": 4,
+    "llm": 4,
+    "image": 2,
+    "tts": 4,
+    "ffmpeg": 2,
+}
+
+_lock = threading.Lock()
+_limits = {}
+_semaphores = {}
+
+
+def _env_limit(provider):
+    value = os.getenv(f"CONCURRENCY_{provider.upper()}")
+    if value and value.isdigit() and int(value) > 0:
+        return int(value)
+    return DEFAULT_LIMITS.get(provider, 1)
+
+
+def configure_limits(**limits):
+    """
+    设置各提供方的并发上限，需在任务开始前调用
+
+    :param limits: provider=上限，例如 configure_limits(image=3, tts=8)；值为 None 时保持不变
+    """
+    with _lock:
+        for provider, value in limits.items():
+            if value is None:
+                continue
+            if value < 1:
+                raise ValueError(f"并发上限必须 >= 1: {provider}={value}")
+            _limits[provider] = value
+            _semaphores[provider] = threading.BoundedSemaphore(value)
+
+
+def get_limit(provider):
+    """
+    返回提供方当前的并发上限
+    """
+    with _lock:
+        if provider not in _limits:
+            _limits[provider] = _env_limit(provider)
+        return _limits[provider]
+
+
+def _semaphore(provider):
+    with _lock:
+        if provider not in _semaphores:
+            limit = _limits.setdefault(provider, _env_limit(provider))
+            _semaphores[provider] = threading.BoundedSemaphore(limit)
+        return _semaphores[provider]
+
+
+@contextmanager
+def provider_slot(provider):
+    """
+    占用一个提供方并发名额，名额用尽时阻塞等待
+
+    用法:
+        with provider_slot("llm"):
+            client.chat.completions.create(...)
+    """
+    semaphore = _semaphore(provider)
+    semaphore.acquire()
+    try:
+        yield
+    finally:
+        semaphore.release()
+
+
+class TokenBucket:
+    """
+    令牌桶限速器
+
+    :param rate: 每秒补充的令牌数
+    :param capacity: 桶容量 (允许的突发请求数)
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """
+        取出令牌，不足时阻塞等待
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait_time = (tokens - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+
+_buckets = {}
+
+
+def get_rate_limiter(key, per_minute, burst=1):
+    """
+    获取 (或创建) 指定键的令牌桶，同一 API Key 共享一个桶
+
+    :param key: 限速键，通常为 "提供方:API Key"
+    :param per_minute: 每分钟允许的请求数
+    :param burst: 允许的突发请求数
+    """
+    with _lock:
+        if key not in _buckets:
+            _buckets[key] = TokenBucket(per_minute / 60.0, max(1, burst))
+        return _buckets[key]
@@ -1,23 +1,52 @@
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
 from dotenv import load_dotenv
+from modules.llm_cache import cached_chat_completion
+from modules.rule_reviewer import pre_review
+from modules.image_prompts import BASE_STYLE
 
 load_dotenv()
 
+# 规则审校通过时仍然调用 LLM 审校
+REVIEW_ALWAYS_LLM = os.getenv("REVIEW_ALWAYS_LLM", "").lower() in ("1", "true", "yes")
+# 按幕拆分审校：每幕单独、并发请求，失败只回退该幕
+REVIEW_SHARDED = os.getenv("REVIEW_SHARDED", "").lower() in ("1", "true", "yes")
+
+# 分幕审校时用占位符代替 Prompt 中的公共风格段落 (image_prompts.BASE_STYLE)，审校后再展开
+BASE_STYLE_PLACEHOLDER = "[BASE_STYLE]"
+
 # 配置 OpenAI Client
 client = OpenAI(
     base_url=os.getenv("LLM_BASE_URL", "http://127.0.0.1:8045/v1"),
     api_key=os.getenv("LLM_API_KEY")
 )
 
+def set_review_sharded(sharded=True):
+    """
+    开启/关闭按幕拆分审校
+    """
+    global REVIEW_SHARDED
+    REVIEW_SHARDED = sharded
+
 def review_content(topic, scripts, prompts):
     """
     审校 TTS 文稿和图片 Prompt 的逻辑性、事实性（年份/生肖/节日）和安全性。
+    先由本地规则 (review_rules.json) 完成机械性修正，规则无法判定时才调用 LLM。
     返回修正后的 (scripts, prompts)。
     """
     print(f"\n🕵️‍♂️ 启动逻辑审校节点 (Reviewer Agent)...")
 
+    scripts, prompts, report = pre_review(scripts, prompts)
+    print(f"   📏 规则审校: {report.summary()}")
+    if not report.needs_llm and not REVIEW_ALWAYS_LLM:
+        print(f"   ✅ 规则审校通过，跳过 LLM 审校")
+        return scripts, prompts
+
+    if REVIEW_SHARDED and len(scripts) == len(prompts):
+        return review_content_sharded(topic, scripts, prompts, report)
+
     # 构造审校 Prompt
     system_prompt = """你是一个严格的内容审核主编 (Reviewer Agent)。
 你的任务是审查并修正“新闻视频文案 (TTS Scripts)”和“AI绘画提示词 (Image Prompts)”中的逻辑错误、事实谬误和常识性问题。
@@ -45,25 +74,29 @@ def review_content(topic, scripts, prompts):
 }
 """
 
-    user_content = json.dumps({
+    review_input = {
         "topic": topic,
         "scripts": scripts,
         "prompts": prompts
-    }, ensure_ascii=False)
+    }
+    if report.escalations:
+        # 告诉 LLM 规则引擎发现了哪些需要判断的问题
+        review_input["rule_findings"] = [f"第{i+1}幕: {reason}" for _, i, reason in report.escalations]
+    user_content = json.dumps(review_input, ensure_ascii=False)
 
     try:
-        response = client.chat.completions.create(
+        result_text = cached_chat_completion(
+            client,
             model="gpt-3.5-turbo", # 使用智能模型进行审核
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_content}
             ],
             response_format={"type": "json_object"},
-            temperature=0.1 # 低温度以保持严谨和确定性
+            temperature=0.1, # 低温度以保持严谨和确定性
+            validate=json.loads
         )
-
-        result_text = response.choices[0].message.content.strip()
-        result = json.loads(result_text)
+        result = json.loads(result_text.strip())
 
         comments = result.get('review_comments', '无修改')
         print(f"   ✅ 审校报告: {comments}")
@@ -80,8 +113,103 @@ def review_content(topic, scripts, prompts):
             print("   ⚠️ 审校后Prompt数量不一致，回退到原始Prompt")
             new_prompts = prompts
 
+        # LLM 改写后再过一遍自动修正规则，保证年份和安全边距不被改回去
+        new_scripts, new_prompts, _ = pre_review(new_scripts, new_prompts, escalate=False)
         return new_scripts, new_prompts
 
     except Exception as e:
         print(f"   ⚠️ 审校服务异常 ({e})，跳过审校，使用原始内容。")
         return scripts, prompts
+
+SHARD_SYSTEM_PROMPT = """你是一个严格的内容审核主编 (Reviewer Agent)。
+你只负责审查新闻视频中**一幕**的“TTS 文稿 (script)”和“AI绘画提示词 (prompt)”，修正逻辑错误、事实谬误和常识性问题。
+
+🔍 **审查标准**：
+1. 当前基准为 2026年 (马年/Horse Year)，绝不能说是“龙年”或“蛇年”。
+2. “红包行情”=节前上涨预期；“开门红”=节后首日上涨，不能混用。
+3. 文案不能自相矛盾（例如前一句说大涨，后一句说大跌）。
+4. prompt 中的 [BASE_STYLE] 是公共风格段落的占位符，必须原样保留，不要展开或改写。
+
+📥 **输入**：包含 topic, act, script, prompt (可能还有 rule_findings 规则引擎发现的问题) 的 JSON。
+📤 **输出**：严格的 JSON 格式：
+{
+    "script": "修正后的文稿",
+    "prompt": "修正后的Prompt",
+    "review_comments": "简要说明修正了什么"
+}
+"""
+
+def _review_act(topic, index, script, prompt, findings):
+    """
+    审校单幕，返回 (script, prompt)；失败或结构不对时返回原值
+    """
+    shared_style = BASE_STYLE in prompt
+    review_input = {
+        "topic": topic,
+        "act": index + 1,
+        "script": script,
+        "prompt": prompt.replace(BASE_STYLE, BASE_STYLE_PLACEHOLDER) if shared_style else prompt
+    }
+    if findings:
+        review_input["rule_findings"] = findings
+
+    try:
+        result_text = cached_chat_completion(
+            client,
+            model="gpt-3.5-turbo",
+            messages=[
+                {"role": "system", "content": SHARD_SYSTEM_PROMPT},
+                {"role": "user", "content": json.dumps(review_input, ensure_ascii=False)}
+            ],
+            response_format={"type": "json_object"},
+            temperature=0.1,
+            validate=json.loads
+        )
+        result = json.loads(result_text.strip())
+    except Exception as e:
+        print(f"   ⚠️ 第 {index+1} 幕审校服务异常 ({e})，该幕使用原始内容")
+        return script, prompt
+
+    new_script = result.get("script")
+    new_prompt = result.get("prompt")
+    if not isinstance(new_script, str) or not new_script.strip():
+        print(f"   ⚠️ 第 {index+1} 幕审校后脚本为空，回退到原始脚本")
+        new_script = script
+    if not isinstance(new_prompt, str) or not new_prompt.strip() \
+            or (shared_style and BASE_STYLE_PLACEHOLDER not in new_prompt):
+        print(f"   ⚠️ 第 {index+1} 幕审校后 Prompt 结构不完整，回退到原始 Prompt")
+        new_prompt = prompt
+    elif shared_style:
+        new_prompt = new_prompt.replace(BASE_STYLE_PLACEHOLDER, BASE_STYLE)
+
+    print(f"   ✅ 第 {index+1} 幕审校报告: {result.get('review_comments', '无修改')}")
+    return new_script, new_prompt
+
+def review_content_sharded(topic, scripts, prompts, report):
+    """
+    按幕拆分的并发审校
+
+    每幕单独发送一个较小的请求 (公共风格段落用占位符代替)，
+    单幕失败只回退该幕。未开启 REVIEW_ALWAYS_LLM 时只审校规则引擎标记了问题的幕
+
+    :param report: pre_review 返回的 RuleReport
+    :return: 修正后的 (scripts, prompts)
+    """
+    findings = {}
+    for _, i, reason in report.escalations:
+        findings.setdefault(i, []).append(reason)
+    acts = list(range(len(scripts))) if REVIEW_ALWAYS_LLM else sorted(i for i in findings if i < len(scripts))
+    print(f"   🧩 分幕审校: 第 {', '.join(str(i + 1) for i in acts)} 幕")
+
+    new_scripts, new_prompts = list(scripts), list(prompts)
+    with ThreadPoolExecutor(max_workers=max(1, len(acts))) as executor:
+        futures = {
+            i: executor.submit(_review_act, topic, i, scripts[i], prompts[i], findings.get(i, []))
+            for i in acts
+        }
+        for i, future in futures.items():
+            new_scripts[i], new_prompts[i] = future.result()
+
+    # LLM 改写后再过一遍自动修正规则，保证年份和安全边距不被改回去
+    new_scripts, new_prompts, _ = pre_review(new_scripts, new_prompts, escalate=False)
+    return new_scripts, new_prompts
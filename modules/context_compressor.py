@@ -0,0 +1,138 @@
+"""
+上下文压缩模块
+在调用 LLM 前对搜索结果做本地抽取式压缩：
+TF-IDF 句向量 + MMR (最大边际相关) 选句，在 token 预算内保留信息量高且不重复的句子
+"""
+import re
+import math
+from collections import Counter
+from modules.text_utils import split_sentences
+
+_CJK = re.compile(r"[一-鿿]")
+_WORD = re.compile(r"[a-zA-Z0-9]+")
+
+
+def estimate_tokens(text):
+    """
+    粗略估算 token 数：中文约 1 字 1 token，其他字符约 4 字符 1 token
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def _terms(text):
+    """
+    切分检索词：中文取相邻字二元组，英文/数字取整词
+    """
+    terms = [w.lower() for w in _WORD.findall(text)]
+    for run in re.findall(r"[一-鿿]+", text):
+        if len(run) == 1:
+            terms.append(run)
+        terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+def _tfidf(docs_terms):
+    df = Counter()
+    for terms in docs_terms:
+        df.update(set(terms))
+    n = len(docs_terms)
+    idf = {t: math.log((1 + n) / (1 + c)) + 1 for t, c in df.items()}
+
+    vectors = []
+    for terms in docs_terms:
+        tf = Counter(terms)
+        vec = {t: c * idf[t] for t, c in tf.items()}
+        norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+        vectors.append({t: v / norm for t, v in vec.items()})
+    return vectors, idf
+
+
+def _cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(t, 0.0) for t, v in a.items())
+
+
+def compress_search_results(search_results, query, budget_tokens, diversity=0.3, min_relevance=0.3):
+    """
+    从搜索结果中选出预算内最有信息量、互不重复的句子
+
+    :param search_results: [{"title", "snippet", "url", ...}, ...]
+    :param query: 检索主题，用于计算相关度
+    :param budget_tokens: 摘要文本的 token 预算
+    :param diversity: MMR 中冗余惩罚的权重 (0~1)
+    :param min_relevance: 相对最高相关度的最低比例，低于该比例的句子不入选
+    :return: (compressed_results, stats)
+             compressed_results 与输入结构相同，snippet 替换为入选句子，未入选任何句子的结果被去掉；
+             stats = {"original_tokens", "compressed_tokens", "ratio"}
+    """
+    candidates = []
+    for idx, result in enumerate(search_results):
+        for order, sentence in enumerate(split_sentences(result.get("snippet", ""))):
+            candidates.append((idx, order, sentence))
+
+    original_tokens = sum(estimate_tokens(r.get("snippet", "")) for r in search_results)
+    if not candidates or original_tokens <= budget_tokens:
+        return list(search_results), {
+            "original_tokens": original_tokens,
+            "compressed_tokens": original_tokens,
+            "ratio": 1.0
+        }
+
+    docs_terms = [_terms(s) for _, _, s in candidates]
+    vectors, idf = _tfidf(docs_terms)
+
+    # 相关度 = 与主题的相似度 + 与整体语料中心的相似度 (中心性)
+    query_tf = Counter(_terms(query))
+    query_vec = {t: c * idf.get(t, 1.0) for t, c in query_tf.items()}
+    norm = math.sqrt(sum(v * v for v in query_vec.values())) or 1.0
+    query_vec = {t: v / norm for t, v in query_vec.items()}
+
+    centroid = Counter()
+    for vec in vectors:
+        centroid.update(vec)
+    norm = math.sqrt(sum(v * v for v in centroid.values())) or 1.0
+    centroid = {t: v / norm for t, v in centroid.items()}
+
+    relevance = [0.5 * _cosine(v, query_vec) + 0.5 * _cosine(v, centroid) for v in vectors]
+
+    # 相关度过低的句子即使预算有余也不选，避免用无关内容填满预算
+    floor = max(relevance) * min_relevance
+    selected = []
+    used = 0
+    remaining = {i for i in range(len(candidates)) if relevance[i] >= floor}
+    while remaining:
+        best, best_score = None, None
+        for i in remaining:
+            redundancy = max((_cosine(vectors[i], vectors[j]) for j in selected), default=0.0)
+            score = (1 - diversity) * relevance[i] - diversity * redundancy
+            if best_score is None or score > best_score:
+                best, best_score = i, score
+        remaining.discard(best)
+
+        cost = estimate_tokens(candidates[best][2])
+        if used + cost > budget_tokens:
+            continue
+        selected.append(best)
+        used += cost
+
+    # 按原结果与原句顺序重组
+    picked = {}
+    for i in sorted(selected, key=lambda i: (candidates[i][0], candidates[i][1])):
+        idx, _, sentence = candidates[i]
+        picked.setdefault(idx, []).append(sentence)
+
+    compressed = []
+    for idx, sentences in sorted(picked.items()):
+        result = dict(search_results[idx])
+        result["snippet"] = "".join(sentences)
+        compressed.append(result)
+
+    return compressed, {
+        "original_tokens": original_tokens,
+        "compressed_tokens": used,
+        "ratio": used / original_tokens if original_tokens else 1.0
+    }
@@ -0,0 +1,262 @@
+"""
+ffmpeg 渲染模块
+静态图片 + 音频的视频直接交给 ffmpeg 一次完成 (-loop 1 静态输入、xfade 转场、音频 concat)，
+不在 Python 里逐帧解码和合成；多规格输出在同一次处理中经 split 分支编码
+"""
+import os
+import shutil
+import hashlib
+import tempfile
+import threading
+import subprocess
+from dotenv import load_dotenv
+from modules.mp3_utils import mp3_duration, concat_mp3, iter_frames
+from modules.output_profiles import fan_out, commit_outputs, discard_outputs
+
+load_dotenv()
+
+# 与 moviepy 使用同一个环境变量
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+FFPROBE_BINARY = os.getenv("FFPROBE_BINARY", "ffprobe")
+
+
+class FFmpegError(RuntimeError):
+    """ffmpeg 执行失败"""
+
+
+def ffmpeg_available():
+    """
+    ffmpeg 是否可用 (PATH 中或 FFMPEG_BINARY 指定的路径)
+    """
+    return shutil.which(FFMPEG_BINARY) is not None
+
+
+def run_ffmpeg(args):
+    """
+    执行 ffmpeg 命令 (自动加上 -y 与精简日志参数)
+
+    :param args: ffmpeg 参数列表 (不含可执行文件)
+    :raises FFmpegError: 返回码非 0 时抛出，附带 stderr 末尾内容
+    """
+    cmd = [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-y"] + [str(a) for a in args]
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        stderr = proc.stderr.decode("utf-8", errors="replace").strip()
+        raise FFmpegError(f"ffmpeg 退出码 {proc.returncode}: {stderr[-500:]}")
+
+
+_digest_cache = {}
+_digest_lock = threading.Lock()
+
+
+def file_digest(path):
+    """
+    文件内容的 sha256 (按路径、大小与修改时间缓存)
+    """
+    stat = os.stat(path)
+    cache_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _digest_lock:
+        if cache_key in _digest_cache:
+            return _digest_cache[cache_key]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    digest = h.hexdigest()
+    with _digest_lock:
+        _digest_cache[cache_key] = digest
+    return digest
+
+
+def args_fingerprint(args):
+    """
+    ffmpeg 参数的指纹：其中指向已存在文件的参数按文件内容哈希计算，
+    文件内容或任何参数 (滤镜、时长、编码参数) 变化时指纹随之变化
+    """
+    h = hashlib.sha256()
+    for arg in args:
+        arg = str(arg)
+        h.update((file_digest(arg) if os.path.isfile(arg) else arg).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def audio_duration(path):
+    """
+    读取 MP3 时长 (秒)，直接解析帧头，不需要 ffprobe
+    """
+    with open(path, "rb") as f:
+        duration = mp3_duration(f.read())
+    if duration <= 0:
+        raise ValueError(f"无法读取音频时长: {path}")
+    return duration
+
+
+def media_duration(path):
+    """
+    读取任意音视频文件时长 (秒)：MP3 直接解析帧头，其他格式使用 ffprobe
+    """
+    if path.lower().endswith(".mp3"):
+        return audio_duration(path)
+    proc = subprocess.run(
+        [FFPROBE_BINARY, "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    try:
+        return float(proc.stdout.decode().strip())
+    except ValueError:
+        raise FFmpegError(f"无法读取时长: {path}")
+
+
+def concat_mp3_gapless(chunks):
+    """
+    无间隙拼接多段 MP3：解码后拼接 PCM，再整体编码一次
+
+    ffmpeg 解码每段时按 LAME Info 帧记录的编码器延迟与末尾补齐裁掉多余的静音样本，
+    拼接后的采样连续，接缝处 (例如逐句合成的句子之间) 不再插入静音；
+    ffmpeg 不可用或执行失败时退回 mp3_utils.concat_mp3 (按帧边界拼接，接缝处有短暂静音)
+
+    :param chunks: MP3 字节列表 (采样率需一致)
+    :return: 拼接后的 MP3 字节
+    """
+    chunks = [c for c in chunks if c]
+    if len(chunks) <= 1:
+        return chunks[0] if chunks else b""
+    if not ffmpeg_available():
+        return concat_mp3(chunks)
+
+    # 沿用原始码率，避免整体编码后体积或音质变化
+    bitrate = next((header["bitrate"] for _, header in iter_frames(chunks[0])), 64000)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        args = []
+        for i, chunk in enumerate(chunks):
+            path = os.path.join(tmp_dir, f"{i:04d}.mp3")
+            with open(path, "wb") as f:
+                f.write(chunk)
+            args += ["-i", path]
+        output_path = os.path.join(tmp_dir, "joined.mp3")
+        args += [
+            "-filter_complex", "".join(f"[{i}:a]" for i in range(len(chunks))) + f"concat=n={len(chunks)}:v=0:a=1[aout]",
+            "-map", "[aout]", "-c:a", "libmp3lame", "-b:a", bitrate, output_path
+        ]
+        try:
+            run_ffmpeg(args)
+        except FFmpegError as e:
+            print(f"  ⚠️ MP3 解码拼接失败 ({e})，退回按帧拼接")
+            return concat_mp3(chunks)
+        with open(output_path, "rb") as f:
+            return f.read()
+
+
+def image_size(path):
+    """
+    读取图片尺寸，并向下取偶数 (yuv420p 要求宽高为偶数)
+    """
+    from PIL import Image
+    with Image.open(path) as img:
+        width, height = img.size
+    return width - width % 2, height - height % 2
+
+
+def fit_filter(size, fps):
+    """
+    把任意尺寸的图片缩放并居中裁剪为输出尺寸 (cover)，统一帧率与像素格式
+    """
+    width, height = size
+    return (f"scale={width}:{height}:force_original_aspect_ratio=increase,"
+            f"crop={width}:{height},setsar=1,fps={fps},format=yuv420p")
+
+
+def still_video_graph(durations, size, fps=24, transition=1.0):
+    """
+    构建静态图片序列的滤镜图
+
+    第 i 张图片 (非最后一张) 循环 d_i + T 秒，xfade 从第 i 段音频结束时开始，
+    转场落在下一段音频的前 T 秒内，总时长等于各段音频时长之和
+
+    :param durations: 各段音频时长
+    :param size: 输出尺寸 (宽, 高)
+    :param transition: 转场时长 T (秒)，0 表示直接硬切
+    :return: (filter_complex, 各图片输入的循环时长)
+    """
+    n = len(durations)
+    transition = min(transition, *durations) if n > 1 and transition > 0 else 0
+    lengths = [d + transition if i < n - 1 else d for i, d in enumerate(durations)]
+
+    filters = [f"[{i}:v]{fit_filter(size, fps)}[v{i}]" for i in range(n)]
+
+    # 视频: 逐段 xfade，偏移量为前面各段音频时长的累加
+    last = "v0"
+    offset = 0.0
+    for i in range(1, n):
+        offset += durations[i - 1]
+        out = f"x{i}" if i < n - 1 else "vout"
+        if transition > 0:
+            filters.append(f"[{last}][v{i}]xfade=transition=fade:duration={transition:.3f}:offset={offset:.3f}[{out}]")
+        else:
+            filters.append(f"[{last}][v{i}]concat=n=2:v=1:a=0[{out}]")
+        last = out
+    if n == 1:
+        filters.append("[v0]null[vout]")
+
+    # 音频: 按顺序拼接
+    audio_inputs = "".join(f"[{n + i}:a]" for i in range(n))
+    filters.append(f"{audio_inputs}concat=n={n}:v=0:a=1[aout]")
+
+    return ";".join(filters), lengths
+
+
+def render_still_video(image_paths, audio_paths, output_path, fps=24, transition=1.0, size=None, preset="ultrafast",
+                       profiles=None):
+    """
+    用一次 ffmpeg 调用把静态图片和对应音频合成为视频
+
+    :param image_paths: 图片路径列表
+    :param audio_paths: 音频路径列表 (与图片一一对应，决定每张图片的时长)
+    :param size: 输出尺寸 (宽, 高)，默认取第一张图片的尺寸
+    :param profiles: 额外输出规格 (OutputProfile 列表)，与主视频在同一次处理中经 split 分支编码，
+                     输出到 profile.output_path(output_path)
+    :return: output_path
+    """
+    if not image_paths or len(image_paths) != len(audio_paths):
+        raise ValueError("图片与音频数量不一致")
+
+    durations = [audio_duration(p) for p in audio_paths]
+    size = size or image_size(image_paths[0])
+    filter_complex, lengths = still_video_graph(durations, size, fps=fps, transition=transition)
+
+    args = []
+    for path, length in zip(image_paths, lengths):
+        args += ["-loop", "1", "-framerate", fps, "-t", f"{length:.3f}", "-i", path]
+    for path in audio_paths:
+        args += ["-i", path]
+    audio_args = ["-c:a", "aac", "-b:a", "192k", "-movflags", "+faststart"]
+
+    # 先写临时文件，成功后再替换，避免留下半成品
+    tmp_paths = {output_path + ".part.mp4": output_path}
+    if not profiles:
+        args += [
+            "-filter_complex", filter_complex,
+            "-map", "[vout]", "-map", "[aout]",
+            "-c:v", "libx264", "-preset", preset, "-tune", "stillimage",
+            "-pix_fmt", "yuv420p", "-r", fps,
+        ] + audio_args + [output_path + ".part.mp4"]
+    else:
+        filters, (video, audio), variants = fan_out("vout", profiles, audio_label="aout")
+        args += ["-filter_complex", ";".join([filter_complex] + filters)]
+        args += ["-map", f"[{video}]", "-map", f"[{audio}]",
+                 "-c:v", "libx264", "-preset", preset, "-tune", "stillimage",
+                 "-pix_fmt", "yuv420p", "-r", fps] + audio_args + [output_path + ".part.mp4"]
+        for profile, (video, audio) in zip(profiles, variants):
+            path = profile.output_path(output_path)
+            tmp_paths[path + ".part.mp4"] = path
+            args += ["-map", f"[{video}]", "-map", f"[{audio}]"] + profile.encode_args(fps, preset) \
+                + ["-tune", "stillimage"] + audio_args + [path + ".part.mp4"]
+
+    try:
+        run_ffmpeg(args)
+        commit_outputs(tmp_paths)
+    finally:
+        discard_outputs(tmp_paths)
+
+    return output_path
@@ -1,73 +1,152 @@
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
 from dotenv import load_dotenv
 import base64
 import requests
+from modules.concurrency import provider_slot, get_rate_limiter
+from modules.retry import backoff_delay, retry_after_from_error, status_from_error
+from modules.artifact_store import get_artifact_store, make_key
 
 load_dotenv()
 
-# 初始化 OpenAI 客户端
+IMAGE_API_KEY = os.getenv("IMAGE_API_KEY")
+IMAGE_API_BASE_URL = os.getenv("IMAGE_API_BASE_URL")
+IMAGE_MODEL = "NanoBanana Pro"
+IMAGE_SIZE = "1024x1792" # 9:16 竖屏
+# 单次请求硬超时 (秒)
+IMAGE_REQUEST_TIMEOUT = float(os.getenv("IMAGE_REQUEST_TIMEOUT", "120"))
+# 每个 API Key 的请求速率 (次/分钟) 与突发数
+IMAGE_RATE_PER_MIN = float(os.getenv("IMAGE_RATE_PER_MIN", "20"))
+IMAGE_RATE_BURST = int(os.getenv("IMAGE_RATE_BURST", "3"))
+
+# 初始化 OpenAI 客户端 (重试由本模块自行处理)
 client = OpenAI(
-    api_key=os.getenv("IMAGE_API_KEY"),
-    base_url=os.getenv("IMAGE_API_BASE_URL")
+    api_key=IMAGE_API_KEY,
+    base_url=IMAGE_API_BASE_URL,
+    timeout=IMAGE_REQUEST_TIMEOUT,
+    max_retries=0
 )
 
-def generate_images(topic_name, prompts, output_dir):
+# 请求本身有误时重试无意义
+NON_RETRYABLE_STATUS = {400, 401, 403, 404, 422}
+
+def _write_atomic(output_path, data):
     """
-    根据 Prompts 调用 API 生成图片 (NanoBanana Pro)
+    先写临时文件再重命名，避免中断时留下残缺图片被误判为已存在
+    """
+    tmp_path = output_path + ".part"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, output_path)
+
+def _download(url, output_path):
+    """
+    流式下载图片到磁盘 (连接与读取均有超时)
     """
-    generated_paths = []
-
-    for i, prompt in enumerate(prompts):
-        print(f"    - 正在处理第 {i+1}/3 张封面图 ({topic_name})...")
-
-        # 确定文件名
-        # 1=起因, 2=发展, 3=影响
-        suffix = ["起因", "发展", "影响"]
-        file_name = f"act{i+1}_{suffix[i]}.png"
-        output_path = os.path.join(output_dir, file_name)
-
-        # 检查文件是否已存在
-        if os.path.exists(output_path):
-            print(f"      ⏭️ 图片已存在，跳过生成: {file_name}")
-            generated_paths.append(output_path)
-            continue
-
-        # 重试机制: 最多尝试 4 次 (1次初始 + 3次重试)
-        max_retries = 3
-        for attempt in range(max_retries + 1):
-            try:
-                print(f"      🎨 调用 NanoBanana Pro 生成中... (尝试 {attempt+1}/{max_retries+1})")
-                # 调用生图 API
+    tmp_path = output_path + ".part"
+    with requests.get(url, stream=True, timeout=(10, IMAGE_REQUEST_TIMEOUT)) as res:
+        res.raise_for_status()
+        with open(tmp_path, "wb") as f:
+            for chunk in res.iter_content(chunk_size=64 * 1024):
+                if chunk:
+                    f.write(chunk)
+    os.replace(tmp_path, output_path)
+
+# 1=起因, 2=发展, 3=影响
+ACT_SUFFIXES = ["起因", "发展", "影响"]
+
+def generate_image(index, prompt, output_dir, topic_name=""):
+    """
+    生成单幕封面图
+
+    :param index: 幕序号 (从0开始)
+    :param prompt: 图片提示词
+    :param output_dir: 输出目录
+    :param topic_name: 主题名 (仅用于日志)
+    :return: 图片路径，失败时返回 None
+    """
+    print(f"    - 正在处理第 {index+1}/3 张封面图 ({topic_name})...")
+
+    # 确定文件名
+    suffix = ACT_SUFFIXES[index] if index < len(ACT_SUFFIXES) else "场景"
+    file_name = f"act{index+1}_{suffix}.png"
+    output_path = os.path.join(output_dir, file_name)
+
+    # 按提示词内容查找素材库，提示词变化时不会误用旧图
+    store = get_artifact_store()
+    key = make_key("image", IMAGE_MODEL, prompt, {"size": IMAGE_SIZE, "base_url": IMAGE_API_BASE_URL})
+    with store.lock(key):
+        if store.get(key, output_path, ".png"):
+            print(f"      ⏭️ 素材库命中，复用图片: {file_name}")
+            return output_path
+
+        path = _generate_image(index, prompt, output_path, file_name)
+        if path:
+            store.put(key, path, ".png")
+        return path
+
+def _generate_image(index, prompt, output_path, file_name):
+    """
+    调用生图 API 并保存到 output_path (带限速与重试)
+    """
+    # 重试机制: 最多尝试 4 次 (1次初始 + 3次重试)，指数退避 + 随机抖动
+    max_retries = 3
+    limiter = get_rate_limiter(f"image:{IMAGE_API_KEY}", IMAGE_RATE_PER_MIN, IMAGE_RATE_BURST)
+    for attempt in range(max_retries + 1):
+        try:
+            print(f"      🎨 调用 NanoBanana Pro 生成中... (尝试 {attempt+1}/{max_retries+1})")
+            limiter.acquire()
+            # 调用生图 API
+            with provider_slot("image"):
                 response = client.images.generate(
-                    model="NanoBanana Pro",
+                    model=IMAGE_MODEL,
                     prompt=prompt,
                     n=1,
-                    size="1024x1792", # 9:16 竖屏
+                    size=IMAGE_SIZE,
                     response_format="b64_json"
                 )
 
-                # 保存图片
-                if response.data[0].b64_json:
-                    image_data = base64.b64decode(response.data[0].b64_json)
-                    with open(output_path, "wb") as f:
-                        f.write(image_data)
-                    print(f"      ✅ 图片已保存: {file_name}")
-                    generated_paths.append(output_path)
-                    break # 成功，跳出重试循环
-                elif response.data[0].url:
-                    img_res = requests.get(response.data[0].url)
-                    with open(output_path, "wb") as f:
-                        f.write(img_res.content)
-                    print(f"      ✅ 图片已下载: {file_name}")
-                    generated_paths.append(output_path)
-                    break # 成功，跳出重试循环
-
-            except Exception as e:
-                print(f"      ❌ 第 {i+1} 张图片生成失败 (尝试 {attempt+1}): {e}")
-                if attempt < max_retries:
-                    print("      🔄 正在重试...")
-                else:
-                    print("      ❌ 重试次数耗尽，放弃生成该图片。")
-
-    return generated_paths
+            # 保存图片
+            if response.data[0].b64_json:
+                image_data = base64.b64decode(response.data[0].b64_json)
+                _write_atomic(output_path, image_data)
+                print(f"      ✅ 图片已保存: {file_name}")
+                return output_path
+            elif response.data[0].url:
+                _download(response.data[0].url, output_path)
+                print(f"      ✅ 图片已下载: {file_name}")
+                return output_path
+            raise ValueError("响应中没有图片数据")
+
+        except Exception as e:
+            print(f"      ❌ 第 {index+1} 张图片生成失败 (尝试 {attempt+1}): {e}")
+            if status_from_error(e) in NON_RETRYABLE_STATUS:
+                print("      ❌ 请求被拒绝，不再重试。")
+                break
+            if attempt < max_retries:
+                delay = backoff_delay(attempt, base=2.0, cap=60.0, retry_after=retry_after_from_error(e))
+                print(f"      🔄 {delay:.1f}s 后重试...")
+                time.sleep(delay)
+            else:
+                print("      ❌ 重试次数耗尽，放弃生成该图片。")
+
+    return None
+
+def generate_images(topic_name, prompts, output_dir):
+    """
+    根据 Prompts 调用 API 生成图片 (NanoBanana Pro)
+    """
+    if not prompts:
+        return []
+
+    # 各幕并发生成，实际并发受 provider_slot("image") 与令牌桶约束
+    with ThreadPoolExecutor(max_workers=len(prompts)) as executor:
+        paths = list(executor.map(
+            lambda item: generate_image(item[0], item[1], output_dir, topic_name),
+            enumerate(prompts)
+        ))
+
+    # 保持幕顺序，剔除失败项
+    return [p for p in paths if p]
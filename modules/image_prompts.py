@@ -34,17 +34,8 @@ def smart_truncate(text, max_length=80):
     # 实在找不到合适的位置，直接截断并加省略号
     return text[:max_length-3] + '...'
 
-def generate_news_image_prompts(news_data):
-    """
-    根据新闻数据生成3个场景图的 Prompt
-    风格: 手绘草图、信息图表风、竖屏海报
-
-    :param news_data: 新闻分析数据
-    :return: [prompt1, prompt2, prompt3] 三个提示词
-    """
-
-    # 基础风格 - 保持手绘风格，改为新闻场景
-    base_style = """(masterpiece, best quality), (vertical:1.4), (aspect ratio: 9:16), (sketch style), (hand drawn), (journalistic infographic), (Chinese New Year theme), (Festive atmosphere)
+# 基础风格 - 保持手绘风格，改为新闻场景
+BASE_STYLE = """(masterpiece, best quality), (vertical:1.4), (aspect ratio: 9:16), (sketch style), (hand drawn), (journalistic infographic), (Chinese New Year theme), (Festive atmosphere)
 Create a TALL VERTICAL PORTRAIT IMAGE (Aspect Ratio 9:16) HAND-DRAWN SKETCH style infographic poster.
 
 **CRITICAL: HAND-DRAWN AESTHETIC (Editorial Illustration Style)**
@@ -58,63 +49,78 @@ Create a TALL VERTICAL PORTRAIT IMAGE (Aspect Ratio 9:16) HAND-DRAWN SKETCH styl
 - **IMPORTANT**: Leave SIGNIFICANT margin (padding) around the text and central illustration to prevent cropping on mobile screens (TikTok/Douyin). Keep content CENTERED and SAFE from edges.
 """
 
-    topic = news_data.get("topic", "热点新闻")
-    headline = news_data.get("headline", "")
-    timeline = news_data.get("timeline", {})
-
-    # 提取三幕内容 - 智能截断
-    cause = smart_truncate(timeline.get("cause", ""), max_length=80)
-    development = smart_truncate(timeline.get("development", ""), max_length=80)
-    impact = smart_truncate(timeline.get("impact", ""), max_length=80)
+# 三幕场景: 起因 / 发展 / 影响
+ACT_SCENES = [
+    {
+        # 1. 起因场景 - 事件背景
+        "field": "cause",
+        "label": "直击现场",
+        "center": "A detailed sketch symbolizing the event's origin or trigger point.",
+        "scene": "Document, meeting room, announcement scene, or symbolic representation of the cause.",
+        "palette": "Chinese Red, Gold, Warm Sepia, Charcoal Grey.",
+        "extra": "Add subtle icons or symbols related to the news topic (hand-drawn style).",
+    },
+    {
+        # 2. 发展场景 - 事件进展
+        "field": "development",
+        "label": "精彩瞬间",
+        "center": "A detailed sketch showing the progression or key turning point.",
+        "scene": "Timeline visualization, multiple actors interacting, or process illustration.",
+        "palette": "Vibrant Red, Orange, Gold, Pencil Lead Black.",
+        "extra": "Add arrows or flow indicators showing progression (hand-drawn style).",
+    },
+    {
+        # 3. 影响场景 - 结果与影响
+        "field": "impact",
+        "label": "深度观察",
+        "center": "A detailed sketch illustrating the impact or consequences.",
+        "scene": "Ripple effect, affected parties, outcome visualization, or future implications.",
+        "palette": "Deep Red, Festive Gold, Emerald accents.",
+        "extra": "Add impact indicators or result symbols (hand-drawn style).",
+    },
+]
+
+def act_prompt_fields(act_index):
+    """
+    第 act_index 幕提示词依赖的新闻数据字段 (流式生成时据此判断能否提前构建)
+    """
+    return ["headline", f"timeline.{ACT_SCENES[act_index]['field']}"]
 
-    prompts = []
+def build_act_prompt(news_data, act_index):
+    """
+    生成单幕场景图的 Prompt
 
-    # 1. 起因场景 - 事件背景
-    prompt_cause = f"""{base_style}
-**CONTENT TO RENDER (Text must be legible hand-written style):**
-1. Top Title: "📰 {headline}"
-2. Section Label: "直击现场" (Bold hand-lettering)
-3. Brief Text (Write this on the paper): "{cause}"
+    :param news_data: 新闻分析数据 (可以是只含本幕所需字段的部分数据)
+    :param act_index: 幕序号 (从0开始)
+    :return: 提示词
+    """
+    scene = ACT_SCENES[act_index]
+    headline = news_data.get("headline", "")
+    timeline = news_data.get("timeline", {})
 
-**VISUAL COMPOSITION:**
-- Center: A detailed sketch symbolizing the event's origin or trigger point.
-- Scene suggestion: Document, meeting room, announcement scene, or symbolic representation of the cause.
-- Layout: Infographic style with text sections separated by hand-drawn dividers.
-- Color Palette: Chinese Red, Gold, Warm Sepia, Charcoal Grey.
-- Add subtle icons or symbols related to the news topic (hand-drawn style).
-"""
-    prompts.append(prompt_cause)
+    # 提取本幕内容 - 智能截断
+    text = smart_truncate(timeline.get(scene["field"], ""), max_length=80)
 
-    # 2. 发展场景 - 事件进展
-    prompt_development = f"""{base_style}
+    return f"""{BASE_STYLE}
 **CONTENT TO RENDER (Text must be legible hand-written style):**
 1. Top Title: "📰 {headline}"
-2. Section Label: "精彩瞬间" (Bold hand-lettering)
-3. Brief Text (Write this on the paper): "{development}"
+2. Section Label: "{scene['label']}" (Bold hand-lettering)
+3. Brief Text (Write this on the paper): "{text}"
 
 **VISUAL COMPOSITION:**
-- Center: A detailed sketch showing the progression or key turning point.
-- Scene suggestion: Timeline visualization, multiple actors interacting, or process illustration.
+- Center: {scene['center']}
+- Scene suggestion: {scene['scene']}
 - Layout: Infographic style with text sections separated by hand-drawn dividers.
-- Color Palette: Vibrant Red, Orange, Gold, Pencil Lead Black.
-- Add arrows or flow indicators showing progression (hand-drawn style).
+- Color Palette: {scene['palette']}
+- {scene['extra']}
 """
-    prompts.append(prompt_development)
 
-    # 3. 影响场景 - 结果与影响
-    prompt_impact = f"""{base_style}
-**CONTENT TO RENDER (Text must be legible hand-written style):**
-1. Top Title: "📰 {headline}"
-2. Section Label: "深度观察" (Bold hand-lettering)
-3. Brief Text (Write this on the paper): "{impact}"
-
-**VISUAL COMPOSITION:**
-- Center: A detailed sketch illustrating the impact or consequences.
-- Scene suggestion: Ripple effect, affected parties, outcome visualization, or future implications.
-- Layout: Infographic style with text sections separated by hand-drawn dividers.
-- Color Palette: Deep Red, Festive Gold, Emerald accents.
-- Add impact indicators or result symbols (hand-drawn style).
-"""
-    prompts.append(prompt_impact)
+def generate_news_image_prompts(news_data):
+    """
+    根据新闻数据生成3个场景图的 Prompt
+    风格: 手绘草图、信息图表风、竖屏海报
 
-    return prompts
+    :param news_data: 新闻分析数据
+    :return: [prompt1, prompt2, prompt3] 三个提示词
+    """
+    return [build_act_prompt(news_data, i) for i in range(len(ACT_SCENES))]
@@ -0,0 +1,158 @@
+"""
+流式 JSON 解析模块
+LLM 流式输出时逐块喂入文本，每当一个字段 (字符串/数字/对象/数组) 完整闭合就立即产出，
+下游无需等待整段 JSON 返回即可开始工作
+"""
+import json
+
+_WHITESPACE = " \t\r\n"
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class JsonStreamParser:
+    """
+    增量 JSON 解析器
+
+    用法:
+        parser = JsonStreamParser()
+        for chunk in stream:
+            for path, value in parser.feed(chunk):
+                ...  # path 如 "headline"、"timeline.cause"、"key_actors.0"
+
+    顶层对象之前的内容 (例如 ```json 代码块标记) 会被忽略。
+    """
+
+    def __init__(self):
+        self.root = None
+        self.done = False
+        # 栈元素: [容器, 路径, 当前键]；当前键为 None 表示对象正在等待下一个键
+        self._stack = []
+        self._started = False
+        self._string = None    # 正在读取的字符串字符列表
+        self._escape = None    # None / "" (刚读到反斜杠) / "u...." (unicode 转义)
+        self._is_key = False
+        self._scalar = None    # 正在读取的数字/true/false/null
+
+    def feed(self, chunk):
+        """
+        喂入一段文本
+
+        :return: 本段文本中完成的字段列表 [(path, value), ...]，按完成顺序排列
+        """
+        events = []
+        for ch in chunk:
+            if self.done:
+                break
+            self._feed_char(ch, events)
+        return events
+
+    def _feed_char(self, ch, events):
+        if not self._started:
+            if ch == "{":
+                self._started = True
+                self._open({}, events)
+            return
+
+        if self._string is not None:
+            self._feed_string_char(ch, events)
+            return
+
+        if self._scalar is not None:
+            if ch in _WHITESPACE or ch in ",}]":
+                text = "".join(self._scalar)
+                self._scalar = None
+                self._complete(json.loads(text), events)
+            else:
+                self._scalar.append(ch)
+                return
+
+        if ch in _WHITESPACE or ch in ",:":
+            return
+        if ch == '"':
+            self._string = []
+            self._is_key = self._expecting_key()
+        elif ch == "{":
+            self._open({}, events)
+        elif ch == "[":
+            self._open([], events)
+        elif ch in "}]":
+            container, path, _ = self._stack.pop()
+            self._complete(container, events, path=path)
+        else:
+            self._scalar = [ch]
+
+    def _feed_string_char(self, ch, events):
+        if self._escape is not None:
+            if self._escape == "":
+                if ch == "u":
+                    self._escape = "u"
+                    return
+                self._string.append(_ESCAPES.get(ch, ch))
+                self._escape = None
+                return
+            self._escape += ch
+            if len(self._escape) == 5:
+                self._string.append(chr(int(self._escape[1:], 16)))
+                self._escape = None
+            return
+
+        if ch == "\\":
+            self._escape = ""
+        elif ch == '"':
+            text = "".join(self._string)
+            self._string = None
+            if self._is_key:
+                self._stack[-1][2] = text
+            else:
+                self._complete(text, events)
+        else:
+            self._string.append(ch)
+
+    def _expecting_key(self):
+        top = self._stack[-1]
+        return isinstance(top[0], dict) and top[2] is None
+
+    def _child_path(self):
+        container, path, key = self._stack[-1]
+        name = str(len(container)) if isinstance(container, list) else key
+        return f"{path}.{name}" if path else name
+
+    def _open(self, container, events):
+        path = self._child_path() if self._stack else ""
+        if self._stack:
+            self._attach(container)
+        else:
+            self.root = container
+        self._stack.append([container, path, None])
+
+    def _attach(self, value):
+        top = self._stack[-1]
+        if isinstance(top[0], list):
+            top[0].append(value)
+        else:
+            top[0][top[2]] = value
+            top[2] = None
+
+    def _complete(self, value, events, path=None):
+        if path is None:
+            # 标量：挂到当前容器下
+            path = self._child_path()
+            self._attach(value)
+        if not self._stack:
+            self.done = True
+        events.append((path, value))
+
+
+def get_path(data, path):
+    """
+    按点分路径读取嵌套字段，不存在时返回 None
+    """
+    value = data
+    for part in path.split("."):
+        if isinstance(value, dict):
+            value = value.get(part)
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return None
+    return value
@@ -0,0 +1,232 @@
+"""
+LLM 响应缓存模块
+按 (base_url, model, messages, temperature, response_format) 缓存 chat.completions 的返回内容，
+存储在 SQLite 中，支持过期时间 (TTL)、按容量淘汰、绕过开关和命中统计
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from dotenv import load_dotenv
+from modules.concurrency import provider_slot
+
+load_dotenv()
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "results/.cache/llm_cache.sqlite3")
+LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", "24"))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "200"))
+LLM_CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "").lower() in ("1", "true", "yes")
+
+
+def make_cache_key(base_url, model, messages, temperature=None, response_format=None):
+    """
+    计算请求的缓存键
+    """
+    payload = json.dumps({
+        "base_url": str(base_url or ""),
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "response_format": response_format,
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    SQLite LLM 响应缓存
+
+    :param path: 数据库文件路径
+    :param ttl_seconds: 过期时间 (秒)
+    :param max_bytes: 缓存内容总大小上限，超出时淘汰最久未访问的条目
+    """
+
+    def __init__(self, path, ttl_seconds, max_bytes):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.bypass = LLM_CACHE_BYPASS
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                content TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, key):
+        """
+        读取未过期的缓存内容，未命中时返回 None
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row and now - row[1] <= self.ttl_seconds:
+                self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+                self.hits += 1
+                return row[0]
+            if row:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+            self.misses += 1
+            return None
+
+    def put(self, key, model, content):
+        now = time.time()
+        size = len(content.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, content, size, created, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, content, size, now, now)
+            )
+            self._evict_locked(now)
+            self._conn.commit()
+
+    def _evict_locked(self, now):
+        # 先清理过期条目，再按最近访问时间淘汰至容量以内
+        self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """
+    返回进程内共享的 LLM 缓存
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache(
+                LLM_CACHE_PATH,
+                ttl_seconds=LLM_CACHE_TTL_HOURS * 3600,
+                max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024)
+            )
+        return _default_cache
+
+
+def set_llm_cache_bypass(bypass=True):
+    """
+    开启/关闭缓存绕过 (绕过时仍会写入新结果)
+    """
+    get_llm_cache().bypass = bypass
+
+
+def cached_chat_completion(client, model, messages, temperature=None, response_format=None, validate=None):
+    """
+    带缓存的 chat.completions.create，返回消息内容字符串
+
+    :param client: OpenAI 客户端 (base_url 参与缓存键)
+    :param validate: 可选校验函数，校验抛出异常时不写入缓存 (例如 json.loads)
+    :return: 模型返回的 content
+    """
+    cache = get_llm_cache()
+    key = make_cache_key(getattr(client, "base_url", ""), model, messages, temperature, response_format)
+
+    if not cache.bypass:
+        content = cache.get(key)
+        if content is not None:
+            print(f"   💾 LLM 缓存命中 ({model})")
+            return content
+
+    kwargs = {"model": model, "messages": messages}
+    if temperature is not None:
+        kwargs["temperature"] = temperature
+    if response_format is not None:
+        kwargs["response_format"] = response_format
+
+    with provider_slot("llm"):
+        response = client.chat.completions.create(**kwargs)
+    content = response.choices[0].message.content
+
+    try:
+        if validate:
+            validate(content)
+        cache.put(key, model, content)
+    except Exception:
+        # 不合法的响应不缓存，交由调用方处理
+        pass
+
+    return content
+
+
+def stream_chat_completion(client, model, messages, temperature=None, response_format=None, validate=None, on_delta=None):
+    """
+    流式版 cached_chat_completion：边生成边把增量文本交给 on_delta，返回完整内容
+
+    与非流式调用共用缓存键；缓存命中时整段内容一次性交给 on_delta
+
+    :param on_delta: 回调 on_delta(text)，每收到一段增量文本调用一次
+    :return: 模型返回的完整 content
+    """
+    cache = get_llm_cache()
+    key = make_cache_key(getattr(client, "base_url", ""), model, messages, temperature, response_format)
+
+    if not cache.bypass:
+        content = cache.get(key)
+        if content is not None:
+            print(f"   💾 LLM 缓存命中 ({model})")
+            if on_delta:
+                on_delta(content)
+            return content
+
+    kwargs = {"model": model, "messages": messages, "stream": True}
+    if temperature is not None:
+        kwargs["temperature"] = temperature
+    if response_format is not None:
+        kwargs["response_format"] = response_format
+
+    parts = []
+    with provider_slot("llm"):
+        stream = client.chat.completions.create(**kwargs)
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                if on_delta:
+                    on_delta(delta)
+    content = "".join(parts)
+
+    try:
+        if validate:
+            validate(content)
+        cache.put(key, model, content)
+    except Exception:
+        # 不合法的响应不缓存，交由调用方处理
+        pass
+
+    return content
@@ -0,0 +1,166 @@
+"""
+MP3 帧工具模块
+纯 Python 解析 MPEG 音频帧头，用于计算时长和按帧边界拼接
+"""
+
+# 比特率表 (kbps)，按 (MPEG版本, 层) 索引
+_BITRATES = {
+    ("1", 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    ("1", 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    ("1", 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    ("2", 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    ("2", 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    ("2", 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+
+_SAMPLE_RATES = {
+    "1": [44100, 48000, 32000],
+    "2": [22050, 24000, 16000],
+    "2.5": [11025, 12000, 8000],
+}
+
+
+def parse_frame_header(data, offset):
+    """
+    解析 offset 处的 MPEG 音频帧头
+
+    :return: {"length", "samples", "sample_rate", "bitrate"}，不是合法帧头时返回 None
+    """
+    if offset + 4 > len(data):
+        return None
+    b1, b2, b3 = data[offset + 1], data[offset + 2], data[offset + 3]
+    if data[offset] != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version_bits = (b1 >> 3) & 0x03
+    layer_bits = (b1 >> 1) & 0x03
+    bitrate_idx = (b2 >> 4) & 0x0F
+    rate_idx = (b2 >> 2) & 0x03
+    padding = (b2 >> 1) & 0x01
+
+    if version_bits == 1 or layer_bits == 0 or bitrate_idx in (0, 15) or rate_idx == 3:
+        return None
+
+    version = {0: "2.5", 2: "2", 3: "1"}[version_bits]
+    layer = 4 - layer_bits
+    table_version = "1" if version == "1" else "2"
+    bitrate = _BITRATES[(table_version, layer)][bitrate_idx] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_idx]
+
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2 or version == "1":
+        samples = 1152
+        length = 144 * bitrate // sample_rate + padding
+    else:
+        # MPEG-2/2.5 Layer III 每帧 576 个采样
+        samples = 576
+        length = 72 * bitrate // sample_rate + padding
+
+    if length < 4:
+        return None
+
+    return {"length": length, "samples": samples, "sample_rate": sample_rate, "bitrate": bitrate}
+
+
+def id3v2_size(data):
+    """
+    返回开头 ID3v2 标签的字节数，没有标签时返回 0
+    """
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = 0
+    for b in data[6:10]:
+        size = (size << 7) | (b & 0x7F)
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def iter_frames(data):
+    """
+    遍历 MP3 数据中的音频帧
+
+    :return: 生成 (offset, header) 元组；遇到无法识别的数据时向后搜索下一个帧同步字
+    """
+    offset = id3v2_size(data)
+    end = len(data)
+    # 末尾的 ID3v1 标签
+    if end >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+
+    while offset + 4 <= end:
+        header = parse_frame_header(data, offset)
+        if header and offset + header["length"] <= end:
+            yield offset, header
+            offset += header["length"]
+        else:
+            offset += 1
+
+
+def mp3_duration(data):
+    """
+    计算 MP3 数据的播放时长 (秒)
+    """
+    duration = 0.0
+    for _, header in iter_frames(data):
+        duration += header["samples"] / header["sample_rate"]
+    return duration
+
+
+def _is_info_frame(data, offset, header):
+    """
+    判断是否为 Xing/Info/VBRI 元数据帧 (不含音频，拼接时必须去除，否则会产生一帧静音/杂音)
+    """
+    frame = data[offset:offset + header["length"]]
+    return b"Xing" in frame[:64] or b"Info" in frame[:64] or b"VBRI" in frame[:64]
+
+
+def audio_frames(data):
+    """
+    提取纯音频帧数据，去掉 ID3 标签和 Xing/Info 元数据帧
+
+    :return: (frames_bytes, sample_rate)
+    """
+    parts = []
+    sample_rate = None
+    first = True
+    for offset, header in iter_frames(data):
+        if first:
+            first = False
+            if _is_info_frame(data, offset, header):
+                continue
+        sample_rate = sample_rate or header["sample_rate"]
+        parts.append(data[offset:offset + header["length"]])
+    return b"".join(parts), sample_rate
+
+
+def concat_mp3(chunks):
+    """
+    按帧边界拼接多段 MP3 (不重新编码)
+
+    各段需来自同一编码参数 (采样率一致)。每段首帧的 main_data_begin 为 0，
+    不依赖上一段的比特池，因此去掉标签和元数据帧后直接串接即可正常解码，
+    不会插入残缺帧。
+
+    注意这不是无间隙 (gapless) 拼接：每段的编码器延迟与末尾补齐 (记录在被去掉的
+    LAME Info 帧中) 无法在帧级别裁剪，会保留在输出里，每个接缝处有几十毫秒的静音。
+    需要无间隙拼接时使用 ffmpeg_utils.concat_mp3_gapless (解码后整体重新编码一次)，
+    本函数是 ffmpeg 不可用时的退路。
+
+    :param chunks: MP3 字节列表
+    :return: 拼接后的 MP3 字节
+    :raises ValueError: 各段采样率不一致
+    """
+    frames = []
+    sample_rate = None
+    for chunk in chunks:
+        body, rate = audio_frames(chunk)
+        if not body:
+            continue
+        if sample_rate is None:
+            sample_rate = rate
+        elif rate != sample_rate:
+            raise ValueError(f"MP3 采样率不一致，无法拼接: {sample_rate} != {rate}")
+        frames.append(body)
+    return b"".join(frames)
@@ -2,6 +2,9 @@ import os
 import json
 from openai import OpenAI
 from dotenv import load_dotenv
+from modules.llm_cache import cached_chat_completion, stream_chat_completion
+from modules.json_stream import JsonStreamParser
+from modules.context_compressor import compress_search_results
 
 load_dotenv()
 
@@ -11,25 +14,10 @@ client = OpenAI(
     api_key=os.getenv("LLM_API_KEY")
 )
 
-def generate_news_analysis(topic, date, research_data=None):
-    """
-    使用 LLM 生成新闻分析内容
+# 融合模式下交给 LLM 的搜索摘要 token 预算 (与 web_researcher 共用配置)
+RESEARCH_CONTEXT_TOKENS = int(os.getenv("RESEARCH_CONTEXT_TOKENS", "1200"))
 
-    :param topic: 新闻主题
-    :param date: 日期 (YYYYMMDD)
-    :param research_data: 网络研究数据 (来自 web_researcher)
-    :return: 新闻分析数据字典
-    """
-    print(f"🤖 AI 正在分析新闻: {topic}...")
-
-    # 构建上下文信息
-    context = ""
-    if research_data and research_data.get("summary"):
-        context = f"\n\n【搜索结果概要】\n{research_data['summary']}\n"
-        if research_data.get("key_facts"):
-            context += f"\n【关键事实】\n" + "\n".join(f"- {fact}" for fact in research_data['key_facts'][:5])
-
-    system_prompt = """你是一位专业的新闻分析师,擅长用通俗易懂、现代感强的方式解读热点事件。
+ANALYSIS_SYSTEM_PROMPT = """你是一位专业的新闻分析师,擅长用通俗易懂、现代感强的方式解读热点事件。
 
 【核心要求】
 1. **风格**: 现代、幽默、有见地。**绝对禁止**使用"哥们儿姐们儿"、"亲爱的朋友们"、"家人们"等过时或油腻的开场白。直入主题，不要废话。
@@ -46,6 +34,7 @@ def generate_news_analysis(topic, date, research_data=None):
   "topic": "新闻主题",
   "date": "YYYYMMDD",
   "headline": "吸引人的标题(10-15字)",
+  "casual_summary": "轻松总结(200字,观点犀利,不落俗套,直接讲事)",
   "timeline": {
     "cause": "起因描述(60-80字,口语化)",
     "development": "发展描述(60-80字,有画面感)",
@@ -53,10 +42,129 @@ def generate_news_analysis(topic, date, research_data=None):
   },
   "key_actors": ["主体1", "主体2"],
   "sentiment": "positive/negative/neutral",
-  "sources": ["url1", "url2"],
-  "casual_summary": "轻松总结(200字,观点犀利,不落俗套,直接讲事)"
+  "sources": ["url1", "url2"]
 }
 """
+# 注: 字段顺序决定流式输出时各字段完成的先后，第一幕脚本需要 headline/casual_summary/cause，故放在最前
+
+def parse_json_content(content):
+    """
+    解析模型返回的 JSON，清理可能存在的 markdown 代码块标记
+    """
+    content = content.strip()
+    if content.startswith("```json"):
+        content = content[7:]
+    if content.endswith("```"):
+        content = content[:-3]
+    return json.loads(content)
+
+def validate_news_data(data):
+    """
+    校验新闻数据是否符合 news_data.json 的结构
+
+    :return: 问题列表，为空表示通过
+    """
+    if not isinstance(data, dict):
+        return ["返回内容不是 JSON 对象"]
+
+    errors = []
+    for field in ("headline", "casual_summary"):
+        if not isinstance(data.get(field), str) or not data[field].strip():
+            errors.append(f"缺少 {field}")
+
+    timeline = data.get("timeline")
+    if not isinstance(timeline, dict):
+        errors.append("缺少 timeline")
+    else:
+        for field in ("cause", "development", "impact"):
+            if not isinstance(timeline.get(field), str) or not timeline[field].strip():
+                errors.append(f"缺少 timeline.{field}")
+
+    if data.get("sentiment") not in ("positive", "negative", "neutral"):
+        errors.append(f"sentiment 取值无效: {data.get('sentiment')}")
+    if not isinstance(data.get("key_actors", []), list):
+        errors.append("key_actors 不是列表")
+
+    return errors
+
+def _check_news_data(content):
+    errors = validate_news_data(parse_json_content(content))
+    if errors:
+        raise ValueError("; ".join(errors))
+
+def generate_news_analysis_fused(topic, date, search_results):
+    """
+    融合模式：一次 LLM 调用直接从搜索结果生成 news_data.json 结构
+    (省去 summarize_with_llm 的一轮往返)
+
+    :param search_results: 合并去重后的搜索结果 (来自 web_researcher.gather_search_results)
+    :return: 新闻分析数据字典；调用失败或结构校验不通过时返回 None，由调用方回退到两步流程
+    """
+    print(f"🤖 AI 正在融合分析新闻 (单次调用): {topic}...")
+
+    context_results = search_results[:10]
+    if RESEARCH_CONTEXT_TOKENS > 0:
+        context_results, stats = compress_search_results(context_results, topic, RESEARCH_CONTEXT_TOKENS)
+        print(f"  - 上下文压缩: {stats['original_tokens']} → {stats['compressed_tokens']} tokens "
+              f"(压缩率 {stats['ratio']:.0%})")
+
+    results_text = "\n\n".join(
+        f"【{i+1}】{r['title']}\n{r['snippet']}"
+        for i, r in enumerate(context_results)
+    )
+
+    user_prompt = f"""请根据以下搜索结果分析新闻事件: {topic}
+日期: {date or "最近"}
+
+【搜索结果】
+{results_text}
+
+要求:
+1. 只使用搜索结果中能确认的事实,不要编造细节
+2. 标题要简洁有力,吸引眼球
+3. 三幕式内容要像讲故事,有画面感
+4. 轻松总结要通俗易懂,避免官话套话
+5. **时效性关键**: 重点关注事件的**最新进展**（尤其是昨天/今天的具体动态）。
+"""
+
+    try:
+        content = cached_chat_completion(
+            client,
+            model="gpt-3.5-turbo",  # 使用本地API支持的模型名
+            messages=[
+                {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=0.7,
+            response_format={"type": "json_object"},
+            validate=_check_news_data
+        )
+        data = parse_json_content(content)
+    except Exception as e:
+        print(f"   ⚠️ 融合分析失败 ({e})")
+        return None
+
+    errors = validate_news_data(data)
+    if errors:
+        print(f"   ⚠️ 融合分析结构校验未通过: {'; '.join(errors)}")
+        return None
+
+    data['topic'] = topic
+    data['date'] = date or ""
+    data['sources'] = [r["url"] for r in search_results[:5] if r.get("url")]
+    return data
+
+def _analysis_messages(topic, date, research_data=None):
+    """
+    构建新闻分析请求的消息列表 (流式与非流式共用，缓存键一致)
+    """
+    # 构建上下文信息
+    context = ""
+    if research_data and research_data.get("summary"):
+        context = f"\n\n【搜索结果概要】\n{research_data['summary']}\n"
+        if research_data.get("key_facts"):
+            context += f"\n【关键事实】\n" + "\n".join(f"- {fact}" for fact in research_data['key_facts'][:5])
+
 
     user_prompt = f"""请分析以下新闻事件: {topic}
 日期: {date or "最近"}
@@ -69,50 +177,107 @@ def generate_news_analysis(topic, date, research_data=None):
 4. **时效性关键**: 重点关注事件的**最新进展**（尤其是昨天/今天的具体动态）。例如如果是"开幕式"，请重点描述**刚刚发生**的仪式细节、亮点和观众反应，而不是泛泛而谈。
 """
 
+    return [
+        {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
+
+def _finalize_news_data(data, topic, date, research_data=None):
+    # 确保字段存在
+    data['topic'] = topic
+    data['date'] = date or ""
+
+    # 如果有研究数据,补充来源
+    if research_data and research_data.get("sources"):
+        data['sources'] = research_data['sources'][:5]
+
+    return data
+
+def _fallback_news_data(topic, date):
+    # Fallback 数据,防止程序崩溃
+    return {
+        "topic": topic,
+        "date": date or "",
+        "headline": f"{topic}深度解读",
+        "timeline": {
+            "cause": "AI 生成出错,请检查 API 连接。",
+            "development": "AI 生成出错,请检查 API 连接。",
+            "impact": "AI 生成出错,请检查 API 连接。"
+        },
+        "key_actors": [],
+        "sentiment": "neutral",
+        "sources": [],
+        "casual_summary": "AI 生成出错,请检查网络配置。"
+    }
+
+def generate_news_analysis(topic, date, research_data=None):
+    """
+    使用 LLM 生成新闻分析内容
+
+    :param topic: 新闻主题
+    :param date: 日期 (YYYYMMDD)
+    :param research_data: 网络研究数据 (来自 web_researcher)
+    :return: 新闻分析数据字典
+    """
+    print(f"🤖 AI 正在分析新闻: {topic}...")
+
     try:
-        response = client.chat.completions.create(
+        content = cached_chat_completion(
+            client,
             model="gpt-3.5-turbo",  # 使用本地API支持的模型名
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
+            messages=_analysis_messages(topic, date, research_data),
             temperature=0.7,
-            response_format={"type": "json_object"}
+            response_format={"type": "json_object"},
+            validate=parse_json_content
         )
 
-        content = response.choices[0].message.content.strip()
-        # 清理可能存在的 markdown 标记
-        if content.startswith("```json"):
-            content = content[7:]
-        if content.endswith("```"):
-            content = content[:-3]
+        data = parse_json_content(content)
+        return _finalize_news_data(data, topic, date, research_data)
 
-        data = json.loads(content)
+    except Exception as e:
+        print(f"❌ 新闻分析生成失败: {e}")
+        return _fallback_news_data(topic, date)
+
+def stream_news_analysis(topic, date, research_data=None, on_field=None):
+    """
+    流式生成新闻分析：边接收边解析 JSON，每个字段完成时立即回调，
+    下游 (图片提示词、第一幕 TTS 等) 可以在模型写完剩余字段前启动
+
+    :param on_field: 回调 on_field(path, value, partial)，path 如 "headline"、"timeline.cause"；
+                     partial 为目前已解析出的数据 (topic/date 已替换为调用方传入的值)
+    :return: 与 generate_news_analysis 相同的新闻分析数据字典
+    """
+    print(f"🤖 AI 正在分析新闻 (流式): {topic}...")
 
-        # 确保字段存在
-        data['topic'] = topic
-        data['date'] = date or ""
+    parser = JsonStreamParser()
 
-        # 如果有研究数据,补充来源
-        if research_data and research_data.get("sources"):
-            data['sources'] = research_data['sources'][:5]
+    def handle_delta(delta):
+        for path, value in parser.feed(delta):
+            partial = parser.root
+            partial['topic'] = topic
+            partial['date'] = date or ""
+            if not on_field or path in ("", "topic", "date"):
+                continue
+            try:
+                on_field(path, value, partial)
+            except Exception as e:
+                # 下游回调出错不影响模型输出的接收
+                print(f"   ⚠️ 字段回调失败 ({path}): {e}")
+
+    try:
+        content = stream_chat_completion(
+            client,
+            model="gpt-3.5-turbo",  # 使用本地API支持的模型名
+            messages=_analysis_messages(topic, date, research_data),
+            temperature=0.7,
+            response_format={"type": "json_object"},
+            validate=parse_json_content,
+            on_delta=handle_delta
+        )
 
-        return data
+        data = parse_json_content(content)
+        return _finalize_news_data(data, topic, date, research_data)
 
     except Exception as e:
         print(f"❌ 新闻分析生成失败: {e}")
-        # Fallback 数据,防止程序崩溃
-        return {
-            "topic": topic,
-            "date": date or "",
-            "headline": f"{topic}深度解读",
-            "timeline": {
-                "cause": "AI 生成出错,请检查 API 连接。",
-                "development": "AI 生成出错,请检查 API 连接。",
-                "impact": "AI 生成出错,请检查 API 连接。"
-            },
-            "key_actors": [],
-            "sentiment": "neutral",
-            "sources": [],
-            "casual_summary": "AI 生成出错,请检查网络配置。"
-        }
+        return _fallback_news_data(topic, date)
@@ -3,44 +3,61 @@
 从 audio_generator.py 的三幕脚本逻辑改编
 """
 
-def generate_news_script(news_data):
+# 固定话术：每期内容相同，TTS 时直接复用预合成音频 (见 audio_generator.PhraseAudioCache)
+# 只缓存完整的句子；与主题、标题连在同一句里的部分实时合成，避免句中出现停顿和拼接痕迹
+INTRO_PHRASE = "大家好。"
+CAUSE_PHRASE = "事情是这样的:"
+SUMMARY_PHRASE = "总结一下。"
+OUTRO_PHRASE = "以上就是今天的新闻解读,我们下次见!"
+STOCK_PHRASES = [INTRO_PHRASE, CAUSE_PHRASE, SUMMARY_PHRASE, OUTRO_PHRASE]
+
+# 每幕脚本依赖的新闻数据字段 (流式生成时据此判断能否提前构建)
+ACT_SCRIPT_FIELDS = [
+    ["headline", "casual_summary", "timeline.cause"],
+    ["timeline.development"],
+    ["timeline.impact", "headline"],
+]
+
+def build_act_script(news_data, act_index):
     """
-    生成三幕式新闻脚本,用于匹配 3 张封面图
+    生成单幕脚本
 
-    :param news_data: 新闻分析数据 (来自 news_generator)
-    :return: [track1, track2, track3] 三段脚本
+    :param news_data: 新闻分析数据 (可以是只含本幕所需字段的部分数据)
+    :param act_index: 幕序号 (从0开始)
+    :return: 本幕脚本
     """
-
     topic = news_data.get("topic", "这个热点")
     headline = news_data.get("headline", "")
     timeline = news_data.get("timeline", {})
-    casual_summary = news_data.get("casual_summary", "")
-
-    # 提取三幕内容
-    cause = timeline.get("cause", "")
-    development = timeline.get("development", "")
-    impact = timeline.get("impact", "")
 
-    # 构建三幕脚本
-    tracks = [
+    if act_index == 0:
         # Track 1: 开场 + 起因
-        f"""大家好,今天咱们聊聊{topic}。
+        casual_summary = news_data.get("casual_summary", "")
+        track = f"""{INTRO_PHRASE}今天咱们聊聊{topic}。
 
 {casual_summary if casual_summary else headline}
 
-事情是这样的:
-{cause}""",
-
+{CAUSE_PHRASE}
+{timeline.get("cause", "")}"""
+    elif act_index == 1:
         # Track 2: 发展
-        f"""{development}""",
-
+        track = f"""{timeline.get("development", "")}"""
+    else:
         # Track 3: 影响 + 结语
-        f"""{impact}
+        track = f"""{timeline.get("impact", "")}
 
-总结一下,这件事的核心就是: {headline}。
+{SUMMARY_PHRASE}这件事的核心就是: {headline}。
 
-以上就是今天的新闻解读,我们下次见!"""
-    ]
+{OUTRO_PHRASE}"""
 
     # 去除首尾空白
-    return [track.strip() for track in tracks]
+    return track.strip()
+
+def generate_news_script(news_data):
+    """
+    生成三幕式新闻脚本,用于匹配 3 张封面图
+
+    :param news_data: 新闻分析数据 (来自 news_generator)
+    :return: [track1, track2, track3] 三段脚本
+    """
+    return [build_act_script(news_data, i) for i in range(len(ACT_SCRIPT_FIELDS))]
@@ -0,0 +1,196 @@
+"""
+多规格输出模块
+同一次解码与合成得到的画面经 split 分支分别缩放/裁剪、按各自的码率与帧率编码，
+一个 ffmpeg 进程同时产出主视频和各平台版本 (例如 720p 移动版、小红书 1:1 版)，
+所有输出记录在选题目录的 outputs.json 中
+"""
+import os
+import json
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 额外输出的规格，逗号分隔；可以是预设名，也可以是 名称=宽x高[:码率][:帧率][:cover|fit]
+VIDEO_OUTPUT_PROFILES = os.getenv("VIDEO_OUTPUT_PROFILES", "")
+
+OUTPUTS_FILENAME = "outputs.json"
+
+
+class OutputProfile:
+    """
+    输出规格
+
+    :param name: 规格名 (同时作为输出文件名后缀)
+    :param size: 输出尺寸 (宽, 高)
+    :param crop: "cover" 缩放后居中裁剪填满画面；"fit" 完整保留画面并补黑边
+    :param bitrate: 视频码率 (例如 "2000k")，None 表示按编码器默认质量
+    :param fps: 输出帧率，None 表示与主视频相同
+    """
+
+    def __init__(self, name, size, crop="cover", bitrate=None, fps=None):
+        if crop not in ("cover", "fit"):
+            raise ValueError(f"未知的裁剪方式: {crop}")
+        self.name = name
+        self.size = size
+        self.crop = crop
+        self.bitrate = bitrate
+        self.fps = fps
+
+    def output_path(self, base_path):
+        stem, ext = os.path.splitext(base_path)
+        return f"{stem}_{self.name}{ext or '.mp4'}"
+
+    def filter(self):
+        """
+        从主画面派生本规格的滤镜链 (不含输入输出标签)
+        """
+        width, height = self.size
+        if self.crop == "cover":
+            chain = f"scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height}"
+        else:
+            chain = (f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                     f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2")
+        chain += ",setsar=1"
+        if self.fps:
+            chain += f",fps={self.fps}"
+        return chain + ",format=yuv420p"
+
+    def encode_args(self, fps, preset="ultrafast"):
+        args = ["-c:v", "libx264", "-preset", preset, "-pix_fmt", "yuv420p", "-r", self.fps or fps]
+        if self.bitrate:
+            args += ["-b:v", self.bitrate, "-maxrate", self.bitrate, "-bufsize", _double(self.bitrate)]
+        return args
+
+    def to_dict(self):
+        return {"name": self.name, "size": list(self.size), "crop": self.crop,
+                "bitrate": self.bitrate, "fps": self.fps}
+
+
+def _double(bitrate):
+    # 码率缓冲区取两倍码率
+    number = bitrate.rstrip("kKmM")
+    unit = bitrate[len(number):]
+    return f"{int(float(number) * 2)}{unit}"
+
+
+PRESET_PROFILES = {
+    "mobile_720p": OutputProfile("mobile_720p", (720, 1280), bitrate="2000k"),
+    "xiaohongshu": OutputProfile("xiaohongshu", (1080, 1080)),
+}
+
+# 与主视频 (1080x1920 竖屏) 规格相同的平台，直接使用主视频，不再重复编码
+MAIN_ALIASES = ("douyin",)
+
+
+def parse_profile(spec):
+    """
+    解析单个规格：预设名，或 名称=宽x高[:码率][:帧率][:cover|fit]
+
+    :return: OutputProfile
+    :raises ValueError: 格式错误或预设不存在
+    """
+    spec = spec.strip()
+    if "=" not in spec:
+        if spec not in PRESET_PROFILES:
+            raise ValueError(f"未知的输出规格: {spec} (可选: {', '.join(PRESET_PROFILES)})")
+        return PRESET_PROFILES[spec]
+
+    name, value = spec.split("=", 1)
+    fields = value.split(":")
+    width, height = (int(v) for v in fields[0].lower().split("x"))
+    bitrate, fps, crop = None, None, "cover"
+    for item in fields[1:]:
+        if item in ("cover", "fit"):
+            crop = item
+        elif item[-1:].lower() in ("k", "m"):
+            bitrate = item
+        elif item:
+            fps = int(item)
+    return OutputProfile(name.strip(), (width, height), crop=crop, bitrate=bitrate, fps=fps)
+
+
+def parse_profiles(specs=None):
+    """
+    解析逗号分隔的规格列表，默认读取 VIDEO_OUTPUT_PROFILES；无效的规格打印警告后跳过
+
+    :return: OutputProfile 列表
+    """
+    specs = VIDEO_OUTPUT_PROFILES if specs is None else specs
+    profiles = []
+    for spec in specs.split(","):
+        if not spec.strip():
+            continue
+        if spec.strip() in MAIN_ALIASES:
+            print(f"  ℹ️ 输出规格 {spec.strip()} 与主视频相同，直接使用主视频")
+            continue
+        try:
+            profiles.append(parse_profile(spec))
+        except ValueError as e:
+            print(f"  ⚠️ 忽略输出规格 {spec.strip()}: {e}")
+    return profiles
+
+
+def fan_out(video_label, profiles, audio_label=None):
+    """
+    生成把主画面 (和音频) 分发到各规格的滤镜
+
+    :param video_label: 主画面的滤镜输出标签 (不含方括号)
+    :param profiles: OutputProfile 列表
+    :param audio_label: 音频的滤镜输出标签；音频来自输入流 (例如 "1:a") 时传 None，可直接重复映射
+    :return: (滤镜列表, 主视频的 (视频标签, 音频标签), [(视频标签, 音频标签), ...])，
+             音频标签为 None 时由调用方映射输入流
+    """
+    n = len(profiles) + 1
+    filters = [f"[{video_label}]split={n}" + "".join(f"[fo{i}]" for i in range(n))]
+    for i, profile in enumerate(profiles, start=1):
+        filters.append(f"[fo{i}]{profile.filter()}[fv{i}]")
+
+    audio = [audio_label] * n
+    if audio_label:
+        filters.append(f"[{audio_label}]asplit={n}" + "".join(f"[fa{i}]" for i in range(n)))
+        audio = [f"fa{i}" for i in range(n)]
+
+    return filters, ("fo0", audio[0]), [(f"fv{i}", audio[i]) for i in range(1, n)]
+
+
+def commit_outputs(tmp_paths):
+    """
+    把临时输出文件替换为正式文件 {临时路径: 正式路径}
+    """
+    for tmp_path, path in tmp_paths.items():
+        os.replace(tmp_path, path)
+
+
+def discard_outputs(tmp_paths):
+    for tmp_path in tmp_paths:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def record_outputs(output_path, profiles, fps):
+    """
+    在视频所在的选题目录记录所有输出 (outputs.json)，同目录其他视频的记录保留
+
+    :param output_path: 主视频路径
+    :param profiles: 已输出的 OutputProfile 列表
+    :return: outputs.json 路径
+    """
+    record_path = os.path.join(os.path.dirname(os.path.abspath(output_path)), OUTPUTS_FILENAME)
+    records = {}
+    if os.path.exists(record_path):
+        try:
+            with open(record_path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            records = {}
+
+    entries = [{"name": "main", "path": os.path.basename(output_path), "fps": fps}]
+    for profile in profiles:
+        entry = profile.to_dict()
+        entry.update(path=os.path.basename(profile.output_path(output_path)), fps=profile.fps or fps)
+        entries.append(entry)
+    records[os.path.basename(output_path)] = entries
+
+    with open(record_path, "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+    return record_path
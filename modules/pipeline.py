@@ -0,0 +1,261 @@
+"""
+流水线调度模块
+将各生成阶段声明为有向无环图 (DAG)，按输入依赖并发执行，
+互不依赖的阶段（如图片与音频）同时进行，并统计关键路径耗时
+"""
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, CancelledError, wait
+
+
+class StageError(Exception):
+    """致命阶段失败，流水线已终止"""
+
+    def __init__(self, stage_name, error):
+        super().__init__(f"阶段 [{stage_name}] 失败: {error}")
+        self.stage_name = stage_name
+        self.error = error
+
+
+class Stage:
+    """
+    流水线阶段
+
+    :param name: 阶段名称，同时作为输出键
+    :param func: 执行函数，按 inputs 顺序接收上游阶段的输出
+    :param inputs: 依赖的上游阶段名称列表
+    :param fatal: 失败时是否终止整个流水线；非致命阶段失败时输出为 None
+    """
+
+    def __init__(self, name, func, inputs=(), fatal=True):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.fatal = fatal
+
+
+def _validate(stages):
+    """
+    检查阶段名唯一、依赖存在且无环，返回按名称索引的字典
+    """
+    by_name = {}
+    for stage in stages:
+        if stage.name in by_name:
+            raise ValueError(f"阶段名称重复: {stage.name}")
+        by_name[stage.name] = stage
+
+    for stage in stages:
+        for dep in stage.inputs:
+            if dep not in by_name:
+                raise ValueError(f"阶段 [{stage.name}] 依赖不存在的阶段: {dep}")
+
+    # 拓扑排序检测环
+    visiting, visited = set(), set()
+
+    def visit(name):
+        if name in visited:
+            return
+        if name in visiting:
+            raise ValueError(f"阶段依赖存在环: {name}")
+        visiting.add(name)
+        for dep in by_name[name].inputs:
+            visit(dep)
+        visiting.discard(name)
+        visited.add(name)
+
+    for name in by_name:
+        visit(name)
+
+    return by_name
+
+
+def critical_path(stages, timings):
+    """
+    根据各阶段的起止时间回溯关键路径
+
+    :param stages: Stage 列表
+    :param timings: {name: (start, end)}，相对流水线启动时刻的秒数
+    :return: 关键路径上的阶段名列表（按执行顺序）
+    """
+    by_name = {s.name: s for s in stages}
+    finished = [name for name in timings if name in by_name]
+    if not finished:
+        return []
+
+    # 从最晚结束的阶段出发，每次回溯到最晚结束的上游
+    current = max(finished, key=lambda n: timings[n][1])
+    path = [current]
+    while True:
+        deps = [d for d in by_name[current].inputs if d in timings]
+        if not deps:
+            break
+        current = max(deps, key=lambda n: timings[n][1])
+        path.append(current)
+
+    return list(reversed(path))
+
+
+def print_timing_report(stages, timings):
+    """
+    打印各阶段耗时与关键路径
+    """
+    if not timings:
+        return
+
+    print(f"\n⏱️  阶段耗时:")
+    for name, (start, end) in sorted(timings.items(), key=lambda kv: kv[1][0]):
+        print(f"   - {name:<14} {start:7.2f}s → {end:7.2f}s  ({end - start:.2f}s)")
+
+    path = critical_path(stages, timings)
+    if path:
+        total = timings[path[-1]][1]
+        busy = sum(timings[n][1] - timings[n][0] for n in path)
+        print(f"   关键路径: {' → '.join(path)}")
+        print(f"   关键路径耗时: {busy:.2f}s / 总耗时 {total:.2f}s")
+
+
+def run_stages(stages, max_workers=6, report=True):
+    """
+    按依赖关系并发执行流水线阶段
+
+    - 所有输入就绪的阶段立即提交到线程池
+    - 致命阶段失败时取消尚未开始的阶段，等待运行中的阶段结束后抛出 StageError
+    - 非致命阶段失败时输出记为 None，下游照常执行
+
+    :param stages: Stage 列表
+    :param max_workers: 最大并发阶段数
+    :param report: 是否打印耗时报告
+    :return: (results, timings) 输出字典与 {name: (start, end)} 耗时字典
+    """
+    by_name = _validate(stages)
+
+    results = {}
+    timings = {}
+    lock = threading.Lock()
+    t0 = time.perf_counter()
+
+    def execute(stage, args):
+        start = time.perf_counter() - t0
+        try:
+            return stage.func(*args)
+        finally:
+            with lock:
+                timings[stage.name] = (start, time.perf_counter() - t0)
+
+    pending = dict(by_name)
+    running = {}
+    failure = None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            if failure is None:
+                ready = [s for s in pending.values() if all(d in results for d in s.inputs)]
+                for stage in ready:
+                    del pending[stage.name]
+                    args = [results[d] for d in stage.inputs]
+                    running[executor.submit(execute, stage, args)] = stage
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                if future.cancelled():
+                    continue
+                error = future.exception()
+                if error is None:
+                    results[stage.name] = future.result()
+                elif stage.fatal:
+                    print(f"   ❌ 阶段 [{stage.name}] 失败: {error}")
+                    if failure is None:
+                        failure = StageError(stage.name, error)
+                        # 取消尚未开始的兄弟阶段
+                        for other in list(running):
+                            if other.cancel():
+                                running.pop(other)
+                        pending.clear()
+                else:
+                    print(f"   ⚠️ 阶段 [{stage.name}] 失败 (非致命): {error}")
+                    results[stage.name] = None
+
+    if report:
+        print_timing_report(stages, timings)
+
+    if failure is not None:
+        raise failure
+
+    return results, timings
+
+
+class Prefetcher:
+    """
+    预取任务池：在正式阶段之前提前启动可能用得上的工作
+    (流式分析中途就开始生图/TTS，或审校期间用审校前的文本投机生成)
+
+    预取任务应写入临时位置，结果通过素材库/分句缓存被正式阶段命中。
+    正式阶段先用 matches(key, fingerprint) 判断：输入未变时 wait 等待预取结束，
+    输入已变时 cancel 取消尚未开始的预取，已在执行的预取任其完成 (结果仍会进入缓存)
+
+    :param max_workers: 预取线程数
+    """
+
+    def __init__(self, max_workers=4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, func, *args, fingerprint=None):
+        """
+        提交预取任务，同名任务只提交一次
+
+        :param fingerprint: 预取所用输入的标识 (例如提示词文本)，供 matches 判断是否仍然有效
+        :return: 是否为新提交的任务
+        """
+        with self._lock:
+            if key in self._futures:
+                return False
+            self._futures[key] = (self._executor.submit(func, *args), fingerprint)
+            return True
+
+    def wait(self, key):
+        """
+        等待同名预取任务结束 (不存在时立即返回)
+
+        :return: 预取结果，失败、被取消或不存在时为 None
+        """
+        with self._lock:
+            future, _ = self._futures.get(key, (None, None))
+        if future is None:
+            return None
+        try:
+            return future.result()
+        except CancelledError:
+            return None
+        except Exception as e:
+            print(f"   ⚠️ 预取任务 [{key}] 失败: {e}")
+            return None
+
+    def matches(self, key, fingerprint):
+        """
+        同名预取是否以相同输入提交
+        """
+        with self._lock:
+            _, submitted = self._futures.get(key, (None, None))
+        return key in self and submitted == fingerprint
+
+    def cancel(self, key):
+        """
+        输入已变化时调用：未开始的预取直接取消，正在执行的不再等待 (结果仍会进入缓存)
+        """
+        with self._lock:
+            future, _ = self._futures.get(key, (None, None))
+        if future is not None:
+            future.cancel()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._futures
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
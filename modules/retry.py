@@ -0,0 +1,65 @@
+"""
+重试退避模块
+带随机抖动的指数退避，并遵循服务端返回的 Retry-After
+"""
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+
+def parse_retry_after(value):
+    """
+    解析 Retry-After 头 (秒数或 HTTP 日期)
+
+    :param value: 头部取值
+    :return: 需要等待的秒数，无法解析时返回 None
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after_from_error(error):
+    """
+    从异常携带的 HTTP 响应中提取 Retry-After (兼容 openai / requests 异常)
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    return parse_retry_after(headers.get("retry-after"))
+
+
+def status_from_error(error):
+    """
+    从异常中提取 HTTP 状态码，没有时返回 None
+    """
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0, retry_after=None):
+    """
+    计算第 attempt 次重试前的等待时间 (full jitter 指数退避)
+
+    :param attempt: 已失败次数 (从0开始)
+    :param base: 初始退避秒数
+    :param cap: 退避上限秒数
+    :param retry_after: 服务端要求的最短等待秒数
+    :return: 等待秒数
+    """
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
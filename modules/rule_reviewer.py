@@ -0,0 +1,172 @@
+"""
+规则审校模块
+在调用 LLM 审校之前，用本地规则 (正则/词表) 完成机械性的检查与修正：
+生肖年份、Prompt 安全边距指令、数量与数字一致性。
+规则定义在仓库根目录的 review_rules.json (与 MEMORY.md 的经验教训对应)，
+只有遇到规则无法判定的问题时才需要升级到 LLM 审校
+"""
+import os
+import re
+import json
+from dotenv import load_dotenv
+
+load_dotenv()
+
+REVIEW_RULES_PATH = os.getenv(
+    "REVIEW_RULES_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "review_rules.json")
+)
+
+# 图片 Prompt 中写在画面上的文字 (见 image_prompts.build_act_prompt)
+_BRIEF_TEXT = re.compile(r'Brief Text \(Write this on the paper\): "(.*)"')
+_NUMBER = re.compile(r"\d+(?:\.\d+)?%?")
+
+
+class RuleReport:
+    """
+    规则审校结果
+
+    :param fired: 触发并自动修正的规则 [(rule_id, act_index), ...]
+    :param escalations: 需要 LLM 判定的问题 [(rule_id, act_index, 说明), ...]
+    """
+
+    def __init__(self):
+        self.fired = []
+        self.escalations = []
+
+    def fire(self, rule_id, act_index):
+        if (rule_id, act_index) not in self.fired:
+            self.fired.append((rule_id, act_index))
+
+    def escalate(self, rule_id, act_index, reason):
+        if not any(e[0] == rule_id and e[1] == act_index for e in self.escalations):
+            self.escalations.append((rule_id, act_index, reason))
+
+    @property
+    def needs_llm(self):
+        return bool(self.escalations)
+
+    def summary(self):
+        fired = ", ".join(f"{rule_id}@act{i+1}" for rule_id, i in self.fired) or "无"
+        escalated = ", ".join(f"{rule_id}@act{i+1}" for rule_id, i, _ in self.escalations) or "无"
+        return f"自动修正: {fired}; 待 LLM 判定: {escalated}"
+
+
+def _compile(rule):
+    flags = re.IGNORECASE if rule.get("ignore_case") else 0
+    return re.compile(rule["pattern"], flags)
+
+
+def load_rules(path=None):
+    """
+    读取规则文件
+
+    :return: {"fixes": [...], "required": [...], "escalate": [...]}；文件缺失或格式错误时各项为空
+    """
+    path = path or REVIEW_RULES_PATH
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            rules = json.load(f)
+    except FileNotFoundError:
+        print(f"   ⚠️ 未找到审校规则文件: {path}")
+        rules = {}
+    except Exception as e:
+        print(f"   ⚠️ 审校规则文件读取失败 ({e})")
+        rules = {}
+
+    return {
+        "fixes": [dict(r, regex=_compile(r)) for r in rules.get("fixes", [])],
+        "required": list(rules.get("required", [])),
+        "escalate": [
+            dict(r, regex=_compile(r) if "pattern" in r else None,
+                 all_of=[re.compile(p) for p in r.get("all_of", [])])
+            for r in rules.get("escalate", [])
+        ],
+    }
+
+
+_rules_cache = {}
+
+
+def get_rules(path=None):
+    """
+    返回已编译的规则 (按路径缓存)
+    """
+    path = path or REVIEW_RULES_PATH
+    if path not in _rules_cache:
+        _rules_cache[path] = load_rules(path)
+    return _rules_cache[path]
+
+
+def _check_counts(scripts, prompts, report):
+    if len(scripts) != len(prompts):
+        report.escalate("count_consistency", 0, f"脚本 {len(scripts)} 段与 Prompt {len(prompts)} 个数量不一致")
+    for kind, items in (("scripts", scripts), ("prompts", prompts)):
+        for i, text in enumerate(items):
+            if not isinstance(text, str) or not text.strip():
+                report.escalate("count_consistency", i, f"{kind} 第 {i+1} 项为空")
+
+
+def _check_numbers(scripts, prompts, report):
+    # 画面文字截取自同幕脚本，其中的数字必须能在脚本里找到
+    for i, (script, prompt) in enumerate(zip(scripts, prompts)):
+        match = _BRIEF_TEXT.search(prompt or "")
+        if not match:
+            continue
+        missing = [n for n in _NUMBER.findall(match.group(1)) if n not in (script or "")]
+        if missing:
+            report.escalate("number_consistency", i, f"画面文字中的数字 {missing} 与脚本不一致")
+
+
+def pre_review(scripts, prompts, rules=None, escalate=True):
+    """
+    本地规则审校
+
+    :param scripts: 三幕脚本
+    :param prompts: 三幕图片 Prompt
+    :param rules: 已编译规则，默认读取 review_rules.json
+    :param escalate: 是否执行升级检查 (只需要自动修正时可关闭)
+    :return: (scripts, prompts, RuleReport)，返回的是修正后的新列表
+    """
+    rules = rules or get_rules()
+    report = RuleReport()
+    content = {"scripts": list(scripts), "prompts": list(prompts)}
+
+    for rule in rules["fixes"]:
+        for target in rule.get("targets", ["scripts", "prompts"]):
+            items = content[target]
+            for i, text in enumerate(items):
+                if not isinstance(text, str):
+                    continue
+                fixed, count = rule["regex"].subn(rule["replace"], text)
+                if count:
+                    items[i] = fixed
+                    report.fire(rule["id"], i)
+
+    for rule in rules["required"]:
+        needles = [n.lower() for n in rule.get("any_of", [])]
+        for target in rule.get("targets", ["prompts"]):
+            items = content[target]
+            for i, text in enumerate(items):
+                if not isinstance(text, str):
+                    continue
+                lowered = text.lower()
+                if not any(n in lowered for n in needles):
+                    items[i] = text.rstrip() + "\n" + rule["append"] + "\n"
+                    report.fire(rule["id"], i)
+
+    if escalate:
+        _check_counts(content["scripts"], content["prompts"], report)
+        _check_numbers(content["scripts"], content["prompts"], report)
+
+        for rule in rules["escalate"]:
+            for target in rule.get("targets", ["scripts", "prompts"]):
+                for i, text in enumerate(content[target]):
+                    if not isinstance(text, str):
+                        continue
+                    if rule["regex"] and rule["regex"].search(text):
+                        report.escalate(rule["id"], i, rule.get("description", ""))
+                    elif rule["all_of"] and all(p.search(text) for p in rule["all_of"]):
+                        report.escalate(rule["id"], i, rule.get("description", ""))
+
+    return content["scripts"], content["prompts"], report
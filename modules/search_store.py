@@ -0,0 +1,202 @@
+"""
+搜索结果持久化模块
+按规范化查询缓存搜索结果 (SQLite)，标题/摘要建立 FTS5 全文索引，
+滚动新闻的重复/相关查询可直接复用，过期后只增量抓取上次之后的新结果
+"""
+import os
+import re
+import time
+import sqlite3
+import threading
+import unicodedata
+from dotenv import load_dotenv
+from modules.search_utils import canonicalize_url
+
+load_dotenv()
+
+SEARCH_STORE_PATH = os.getenv("SEARCH_STORE_PATH", "results/.cache/search_store.sqlite3")
+SEARCH_CACHE_TTL_HOURS = float(os.getenv("SEARCH_CACHE_TTL_HOURS", "6"))
+
+
+def normalize_query(query):
+    """
+    规范化查询：全角转半角、小写、去标点、合并空白
+
+    :return: 规范化后的查询字符串，作为缓存键
+    """
+    text = unicodedata.normalize("NFKC", query or "").lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+class SearchStore:
+    """
+    搜索结果库
+
+    :param path: SQLite 文件路径
+    :param ttl_seconds: 查询结果的有效期，过期后需要增量刷新
+    """
+
+    def __init__(self, path, ttl_seconds):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS queries (
+                query TEXT PRIMARY KEY,
+                fetched_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS items (
+                url_key TEXT PRIMARY KEY,
+                url TEXT,
+                title TEXT,
+                snippet TEXT,
+                source TEXT,
+                rank INTEGER,
+                first_seen REAL,
+                last_seen REAL
+            );
+            CREATE TABLE IF NOT EXISTS query_items (
+                query TEXT,
+                url_key TEXT,
+                PRIMARY KEY (query, url_key)
+            );
+        """)
+        self.fts = self._create_fts()
+        self._conn.commit()
+
+    def _create_fts(self):
+        # trigram 分词支持中文子串匹配 (SQLite >= 3.34)，不可用时退回 LIKE 查询
+        try:
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(url_key UNINDEXED, title, snippet, tokenize='trigram')"
+            )
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    def lookup(self, query):
+        """
+        读取查询的缓存结果
+
+        :return: (items, fetched_at)；从未查询过时 fetched_at 为 None
+        """
+        key = normalize_query(query)
+        with self._lock:
+            row = self._conn.execute("SELECT fetched_at FROM queries WHERE query = ?", (key,)).fetchone()
+            if not row:
+                return [], None
+            rows = self._conn.execute("""
+                SELECT i.title, i.snippet, i.url, i.source, i.rank
+                FROM query_items q JOIN items i ON i.url_key = q.url_key
+                WHERE q.query = ?
+                ORDER BY i.last_seen DESC, i.rank ASC
+            """, (key,)).fetchall()
+        return [self._row_to_item(r) for r in rows], row[0]
+
+    def is_fresh(self, fetched_at):
+        return fetched_at is not None and time.time() - fetched_at <= self.ttl_seconds
+
+    def related(self, text, limit=10, exclude_urls=()):
+        """
+        全文检索与 text 相关的已缓存结果 (来自其他查询)
+
+        :param text: 检索文本 (通常为主题)
+        :param exclude_urls: 需要排除的 URL
+        """
+        # 中文主题没有空格分词，用 4 字滑动窗口做子串匹配，至少命中 2 个窗口才算相关
+        windows = set()
+        for term in normalize_query(text).split():
+            if len(term) <= 4:
+                if len(term) >= 3:
+                    windows.add(term)
+                continue
+            windows.update(term[i:i + 4] for i in range(len(term) - 3))
+        if not windows:
+            return []
+        min_hits = min(2, len(windows))
+        fetch_limit = (limit + len(exclude_urls)) * 3
+
+        with self._lock:
+            if self.fts:
+                match = " OR ".join('"' + w.replace('"', '""') + '"' for w in sorted(windows))
+                rows = self._conn.execute("""
+                    SELECT i.title, i.snippet, i.url, i.source, i.rank
+                    FROM items_fts f JOIN items i ON i.url_key = f.url_key
+                    WHERE items_fts MATCH ?
+                    ORDER BY bm25(items_fts), i.last_seen DESC
+                    LIMIT ?
+                """, (match, fetch_limit)).fetchall()
+            else:
+                clauses = " OR ".join("(title LIKE ? OR snippet LIKE ?)" for _ in windows)
+                params = [p for w in sorted(windows) for p in (f"%{w}%", f"%{w}%")]
+                rows = self._conn.execute(
+                    f"SELECT title, snippet, url, source, rank FROM items WHERE {clauses} ORDER BY last_seen DESC LIMIT ?",
+                    params + [fetch_limit]
+                ).fetchall()
+
+        def hits(row):
+            content = normalize_query(f"{row[0]} {row[1]}")
+            return sum(1 for w in windows if w in content)
+
+        rows = [r for r in rows if hits(r) >= min_hits]
+        excluded = {canonicalize_url(u) for u in exclude_urls}
+        items = [self._row_to_item(r) for r in rows if canonicalize_url(r[2]) not in excluded]
+        return items[:limit]
+
+    def save(self, query, items):
+        """
+        保存一次查询的结果 (与已有结果合并，并刷新查询时间)
+        """
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            for item in items:
+                url_key = canonicalize_url(item.get("url", "")) or f"{item.get('title', '')}|{item.get('snippet', '')[:50]}"
+                exists = self._conn.execute("SELECT 1 FROM items WHERE url_key = ?", (url_key,)).fetchone()
+                if exists:
+                    self._conn.execute(
+                        "UPDATE items SET title = ?, snippet = ?, rank = ?, last_seen = ? WHERE url_key = ?",
+                        (item.get("title", ""), item.get("snippet", ""), item.get("rank", 0), now, url_key)
+                    )
+                    if self.fts:
+                        self._conn.execute("DELETE FROM items_fts WHERE url_key = ?", (url_key,))
+                else:
+                    self._conn.execute(
+                        "INSERT INTO items (url_key, url, title, snippet, source, rank, first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (url_key, item.get("url", ""), item.get("title", ""), item.get("snippet", ""),
+                         item.get("source", ""), item.get("rank", 0), now, now)
+                    )
+                if self.fts:
+                    self._conn.execute(
+                        "INSERT INTO items_fts (url_key, title, snippet) VALUES (?, ?, ?)",
+                        (url_key, item.get("title", ""), item.get("snippet", ""))
+                    )
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO query_items (query, url_key) VALUES (?, ?)", (key, url_key)
+                )
+            self._conn.execute("INSERT OR REPLACE INTO queries (query, fetched_at) VALUES (?, ?)", (key, now))
+            self._conn.commit()
+
+    @staticmethod
+    def _row_to_item(row):
+        return {"title": row[0], "snippet": row[1], "url": row[2], "source": row[3], "rank": row[4] or 0}
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_search_store():
+    """
+    返回进程内共享的搜索结果库
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = SearchStore(SEARCH_STORE_PATH, SEARCH_CACHE_TTL_HOURS * 3600)
+        return _default_store
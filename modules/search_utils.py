@@ -0,0 +1,119 @@
+"""
+搜索结果合并模块
+URL 规范化、SimHash 近重复摘要去除、多来源结果排序截断
+"""
+import re
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# 跟踪参数，对内容无影响
+_TRACKING_PARAMS = {"spm", "from", "source", "src", "ref", "share_token", "share_from", "wfr", "fbclid", "gclid"}
+
+
+def canonicalize_url(url):
+    """
+    规范化 URL：小写主机名、去掉 www/移动端前缀、跟踪参数、锚点和结尾斜杠
+
+    :param url: 原始 URL
+    :return: 规范化后的 URL，用于去重比较
+    """
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    for prefix in ("www.", "m.", "wap."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if k.lower() not in _TRACKING_PARAMS and not k.lower().startswith("utm_")]
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("", host, path, urlencode(sorted(query)), ""))
+
+
+def _shingles(text, n=2):
+    text = re.sub(r"\s+", "", text.lower())
+    if len(text) <= n:
+        return [text] if text else []
+    return [text[i:i + n] for i in range(len(text) - n + 1)]
+
+
+def simhash(text, bits=64):
+    """
+    计算文本的 SimHash 指纹 (字符 2-gram，适用于中文)
+    """
+    weights = [0] * bits
+    for shingle in _shingles(text):
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=bits // 8).digest(), "big")
+        for i in range(bits):
+            weights[i] += 1 if (h >> i) & 1 else -1
+    fingerprint = 0
+    for i in range(bits):
+        if weights[i] > 0:
+            fingerprint |= 1 << i
+    return fingerprint
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+def merge_search_results(results, query_terms=None, max_results=12, near_dup_distance=10):
+    """
+    合并多个搜索源/查询的结果
+
+    - 规范化 URL 后合并同一链接
+    - SimHash 汉明距离不超过 near_dup_distance 的摘要视为近重复
+      (新闻摘要较短，64 位指纹下轻微改写约 5-12 位差异，无关内容约 30 位)
+    - 按多源共识、原始排名和标题相关度排序，截取前 max_results 条
+
+    :param results: [{"title", "snippet", "url", "source", "rank"}, ...]
+    :param query_terms: 用于计算标题相关度的关键词
+    :return: 去重排序后的结果列表
+    """
+    merged = []
+    by_url = {}
+
+    for item in results:
+        key = canonicalize_url(item.get("url", ""))
+        text = f"{item.get('title', '')} {item.get('snippet', '')}"
+        rank_score = 1.0 / (1 + item.get("rank", 0))
+
+        target = by_url.get(key) if key else None
+        if target is None:
+            fingerprint = simhash(text)
+            for candidate in merged:
+                if hamming_distance(candidate["_simhash"], fingerprint) <= near_dup_distance:
+                    target = candidate
+                    break
+
+        if target is not None:
+            target["_hits"] += 1
+            target["_rank_score"] = max(target["_rank_score"], rank_score)
+            # 保留更完整的摘要
+            if len(item.get("snippet", "")) > len(target.get("snippet", "")):
+                target["snippet"] = item.get("snippet", "")
+            if key:
+                by_url.setdefault(key, target)
+            continue
+
+        entry = dict(item)
+        entry["_simhash"] = simhash(text)
+        entry["_hits"] = 1
+        entry["_rank_score"] = rank_score
+        merged.append(entry)
+        if key:
+            by_url[key] = entry
+
+    terms = [t for t in (query_terms or []) if t]
+
+    def score(entry):
+        relevance = sum(1 for t in terms if t in entry.get("title", "")) / len(terms) if terms else 0
+        return entry["_hits"] + entry["_rank_score"] + relevance
+
+    merged.sort(key=score, reverse=True)
+
+    return [
+        {k: v for k, v in entry.items() if not k.startswith("_")}
+        for entry in merged[:max_results]
+    ]
@@ -0,0 +1,305 @@
+"""
+分段并行编码模块
+把视频按段落切成若干片段 (段落主体 + 段落交界处的短转场窗口)，
+各片段由独立的 ffmpeg 进程并行编码，音频只编码一次，
+最后用 concat demuxer 流复制 (-c copy) 拼接并封装音频，不再整体重新编码。
+指定缓存目录时保留各片段的编码结果和输入指纹 (manifest.json)，
+再次渲染只重新编码输入有变化的片段
+"""
+import os
+import json
+import shutil
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from modules.concurrency import provider_slot, get_limit
+from modules.ffmpeg_utils import run_ffmpeg, args_fingerprint, audio_duration, image_size, fit_filter
+
+load_dotenv()
+
+# 并行编码的片段数，0 表示按 CPU 核数自动决定 (同时运行的 ffmpeg 进程数还受 CONCURRENCY_FFMPEG 限制)
+VIDEO_SEGMENT_WORKERS = int(os.getenv("VIDEO_SEGMENT_WORKERS", "0"))
+
+
+class Window:
+    """
+    时间线上的一个编码窗口
+
+    :param kind: "body" (单张图片) 或 "transition" (前后两张图片的转场)
+    :param index: 图片序号；转场窗口为转入的图片序号
+    :param start: 窗口在整条时间线上的起点 (秒)
+    :param end: 窗口终点 (秒)
+    """
+
+    def __init__(self, kind, index, start, end):
+        self.kind = kind
+        self.index = index
+        self.start = start
+        self.end = end
+
+    @property
+    def name(self):
+        if self.kind == "body":
+            return f"body{self.index + 1}"
+        return f"xfade{self.index}_{self.index + 1}"
+
+    def frames(self, fps):
+        # 按全局帧号取整，保证各片段帧数之和与整段渲染一致
+        return round(self.end * fps) - round(self.start * fps)
+
+
+def plan_windows(durations, transition=0.0):
+    """
+    把各段落划分为主体窗口和转场窗口
+
+    第 k 段的转场 (k >= 1) 占用该段开头的 transition 秒，与整段渲染时 xfade 的位置一致
+
+    :param durations: 各段落时长
+    :param transition: 转场时长，0 表示没有转场窗口
+    :return: 按时间顺序排列的 Window 列表
+    """
+    windows = []
+    start = 0.0
+    for i, duration in enumerate(durations):
+        end = start + duration
+        body_start = start
+        if i > 0 and transition > 0:
+            body_start = min(end, start + transition)
+            windows.append(Window("transition", i, start, body_start))
+        if end - body_start > 1e-6:
+            windows.append(Window("body", i, body_start, end))
+        start = end
+    return windows
+
+
+class Part:
+    """
+    单个编码片段
+
+    :param name: 片段名 (同时作为中间文件名)
+    :param input_args: ffmpeg 输入参数
+    :param filter_complex: 滤镜图，输出标签必须为 [vout]
+    :param frames: 输出帧数
+    """
+
+    def __init__(self, name, input_args, filter_complex, frames):
+        self.name = name
+        self.input_args = input_args
+        self.filter_complex = filter_complex
+        self.frames = frames
+
+    def args(self, output_path, encode_args):
+        return self.input_args + [
+            "-filter_complex", self.filter_complex,
+            "-map", "[vout]", "-an",
+            "-frames:v", self.frames,
+        ] + encode_args + [output_path]
+
+    def fingerprint(self, encode_args):
+        """
+        片段输入指纹：图片内容、滤镜参数 (含动效参数)、帧数与编码参数
+        """
+        return args_fingerprint(self.input_args + [self.filter_complex, self.frames] + encode_args)
+
+
+def segment_workers(count):
+    """
+    并行编码进程数与每个进程的线程数
+
+    进程数不超过 ffmpeg 并发名额 (CONCURRENCY_FFMPEG，默认 2)；要让总耗时接近最长片段的耗时，
+    需要把 CONCURRENCY_FFMPEG 调到片段数 + 1 (音频) 左右
+    """
+    cpus = os.cpu_count() or 1
+    limit = get_limit("ffmpeg")
+    workers = min(count, VIDEO_SEGMENT_WORKERS or cpus, limit)
+    if workers < min(count, VIDEO_SEGMENT_WORKERS or cpus):
+        print(f"  ℹ️ 分段编码并行数受 CONCURRENCY_FFMPEG={limit} 限制，可调大以同时编码更多片段")
+    return max(1, workers), max(1, cpus // max(1, workers))
+
+
+def _run_slot(args):
+    # 每个 ffmpeg 进程各占一个并发名额，批量模式下多个视频共享 CONCURRENCY_FFMPEG
+    with provider_slot("ffmpeg"):
+        run_ffmpeg(args)
+
+
+def render_segmented(parts, audio_args, output_path, fps=24, tune=None, preset="ultrafast", cache_dir=None):
+    """
+    并行编码各片段，编码一次音频，再用 concat demuxer 流复制拼接
+
+    :param parts: Part 列表 (按播放顺序)
+    :param audio_args: 生成音频的 ffmpeg 参数 (输入与滤镜，输出为 AAC，不含输出路径)
+    :param tune: x264 tune 参数 (例如静态图片用 "stillimage")
+    :param cache_dir: 片段缓存目录；指定时保留片段与 manifest.json，只重新编码输入变化的片段，
+                      所有片段与音频都未变化且输出存在时直接跳过
+    :return: output_path
+    """
+    work_dir = cache_dir or output_path + ".parts"
+    os.makedirs(work_dir, exist_ok=True)
+    manifest_path = os.path.join(work_dir, "manifest.json")
+
+    workers, threads = segment_workers(len(parts))
+    # 所有片段使用完全相同的编码参数，保证可以直接流复制拼接
+    # (线程数只影响编码速度，不影响码流兼容性，不计入指纹)
+    encode_args = ["-c:v", "libx264", "-preset", preset, "-pix_fmt", "yuv420p", "-r", fps]
+    if tune:
+        encode_args += ["-tune", tune]
+
+    names = [f"{i:03d}_{part.name}.mp4" for i, part in enumerate(parts)]
+    fingerprints = {name: part.fingerprint(encode_args) for name, part in zip(names, parts)}
+    fingerprints["audio.m4a"] = args_fingerprint(audio_args)
+    output_fingerprint = hashlib.sha256(json.dumps([names, fingerprints], sort_keys=True).encode("utf-8")).hexdigest()
+
+    previous = {}
+    if cache_dir and os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                previous = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            previous = {}
+
+    if previous.get("output") == output_fingerprint and os.path.exists(output_path):
+        print(f"  - 所有片段输入未变，复用已有视频")
+        return output_path
+
+    def is_fresh(name):
+        return previous.get("parts", {}).get(name) == fingerprints[name] \
+            and os.path.exists(os.path.join(work_dir, name))
+
+    audio_path = os.path.join(work_dir, "audio.m4a")
+    jobs = [(name, part.args(os.path.join(work_dir, name + ".part.mp4"), encode_args + ["-threads", threads]))
+            for name, part in zip(names, parts) if not is_fresh(name)]
+    if not is_fresh("audio.m4a"):
+        jobs.append(("audio.m4a", audio_args + ["-vn", "-c:a", "aac", "-b:a", "192k", audio_path + ".part.m4a"]))
+
+    # manifest 只记录已确认完成的片段：先去掉待重编码的条目，每个片段完成后再写入，
+    # 中途失败或中断时不会把旧指纹留给被覆盖或写了一半的片段
+    manifest = {"parts": {name: fp for name, fp in previous.get("parts", {}).items()
+                          if name in fingerprints and is_fresh(name)}}
+    manifest_lock = threading.Lock()
+
+    def write_manifest():
+        if cache_dir:
+            with open(manifest_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+
+    def run_job(job):
+        name, args = job
+        tmp_path = args[-1]
+        try:
+            _run_slot(args)
+            os.replace(tmp_path, os.path.join(work_dir, name))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        with manifest_lock:
+            manifest["parts"][name] = fingerprints[name]
+            write_manifest()
+
+    write_manifest()
+    reused = len(parts) + 1 - len(jobs)
+    print(f"  - 分段并行编码: {len(parts)} 个片段 + 音频, 复用 {reused} 个, "
+          f"编码 {len(jobs)} 个 (并行 {workers} 个进程 x {threads} 线程)")
+    with ThreadPoolExecutor(max_workers=workers + 1) as executor:
+        list(executor.map(run_job, jobs))
+
+    concat_video([os.path.join(work_dir, name) for name in names], audio_path, output_path,
+                 os.path.join(work_dir, "concat.txt"))
+
+    if not cache_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        return output_path
+
+    manifest["output"] = output_fingerprint
+    write_manifest()
+
+    # 清理不再使用的旧片段
+    keep = set(names) | {"audio.m4a", "manifest.json", "concat.txt"}
+    for name in os.listdir(work_dir):
+        if name not in keep:
+            os.remove(os.path.join(work_dir, name))
+    return output_path
+
+
+def concat_video(part_paths, audio_path, output_path, list_path):
+    """
+    concat demuxer 流复制拼接视频片段，并封装编码好的音频
+    """
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in part_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+    tmp_path = output_path + ".part.mp4"
+    try:
+        _run_slot([
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            "-i", audio_path,
+            "-map", "0:v", "-map", "1:a",
+            "-c", "copy", "-shortest",
+            "-movflags", "+faststart",
+            tmp_path
+        ])
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def still_video_parts(image_paths, durations, size, fps=24, transition=1.0):
+    """
+    把静态图片序列切成编码片段 (与 ffmpeg_utils.still_video_graph 的整段渲染画面一致)
+
+    :return: Part 列表
+    """
+    if len(durations) > 1 and transition > 0:
+        transition = min(transition, *durations)
+    else:
+        transition = 0
+    fit = fit_filter(size, fps)
+    # 输入多循环一帧，避免取整后帧数不足
+    margin = 1.0 / fps
+
+    parts = []
+    for window in plan_windows(durations, transition):
+        length = window.end - window.start + margin
+        if window.kind == "body":
+            input_args = ["-loop", "1", "-framerate", fps, "-t", f"{length:.3f}", "-i", image_paths[window.index]]
+            filter_complex = f"[0:v]{fit}[vout]"
+        else:
+            input_args = []
+            for path in (image_paths[window.index - 1], image_paths[window.index]):
+                input_args += ["-loop", "1", "-framerate", fps, "-t", f"{length:.3f}", "-i", path]
+            filter_complex = (
+                f"[0:v]{fit}[a];[1:v]{fit}[b];"
+                f"[a][b]xfade=transition=fade:duration={transition:.3f}:offset=0[vout]"
+            )
+        parts.append(Part(window.name, input_args, filter_complex, window.frames(fps)))
+    return parts
+
+
+def render_still_video_segmented(image_paths, audio_paths, output_path, fps=24, transition=1.0, size=None,
+                                 cache_dir=None):
+    """
+    分段并行版的 ffmpeg_utils.render_still_video
+
+    :param cache_dir: 片段缓存目录，指定时只重新编码输入变化的片段 (见 render_segmented)
+    :return: output_path
+    """
+    if not image_paths or len(image_paths) != len(audio_paths):
+        raise ValueError("图片与音频数量不一致")
+
+    durations = [audio_duration(p) for p in audio_paths]
+    size = size or image_size(image_paths[0])
+    parts = still_video_parts(image_paths, durations, size, fps=fps, transition=transition)
+
+    audio_args = []
+    for path in audio_paths:
+        audio_args += ["-i", path]
+    audio_args += [
+        "-filter_complex", "".join(f"[{i}:a]" for i in range(len(audio_paths))) + f"concat=n={len(audio_paths)}:v=0:a=1[aout]",
+        "-map", "[aout]",
+    ]
+
+    return render_segmented(parts, audio_args, output_path, fps=fps, tune="stillimage", cache_dir=cache_dir)
@@ -0,0 +1,56 @@
+"""
+文本处理工具模块
+中文分句等多个模块共用的文本切分逻辑
+"""
+import re
+
+# 句末标点 (中英文) 及换行
+_SENTENCE_END = re.compile(r"([。！？!?；;…]+[”’\"']?|\n+)")
+
+
+def split_sentences(text):
+    """
+    按句末标点切分文本，标点保留在句尾
+
+    :param text: 原始文本
+    :return: 非空句子列表
+    """
+    if not text:
+        return []
+    parts = _SENTENCE_END.split(text)
+    sentences = []
+    buffer = ""
+    for part in parts:
+        if not part:
+            continue
+        if _SENTENCE_END.fullmatch(part):
+            # 换行只作为分隔符，不保留
+            buffer += part.strip("\n")
+            if buffer.strip():
+                sentences.append(buffer.strip())
+            buffer = ""
+        else:
+            buffer += part
+    if buffer.strip():
+        sentences.append(buffer.strip())
+    return sentences
+
+
+def chunk_sentences(sentences, max_chars):
+    """
+    将句子按顺序合并为不超过 max_chars 的块 (单句超长时独立成块)
+
+    :param sentences: 句子列表
+    :param max_chars: 每块最大字符数
+    :return: 文本块列表
+    """
+    chunks = []
+    current = ""
+    for sentence in sentences:
+        if current and len(current) + len(sentence) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += sentence
+    if current:
+        chunks.append(current)
+    return chunks
@@ -1,14 +1,99 @@
 import os
-from moviepy import *
+import json
+from dotenv import load_dotenv
+from modules.concurrency import provider_slot
+from modules.ffmpeg_utils import ffmpeg_available, args_fingerprint, render_still_video
+from modules.segment_render import render_still_video_segmented
+from modules.output_profiles import parse_profiles, record_outputs
 
-def generate_video(image_paths, audio_paths, output_path):
+load_dotenv()
+
+# 渲染后端: auto (有 ffmpeg 时走直连 ffmpeg 快速路径) / ffmpeg / moviepy
+VIDEO_BACKEND = os.getenv("VIDEO_BACKEND", "auto").lower()
+# ffmpeg 后端下按幕分段并行编码，再流复制拼接
+VIDEO_SEGMENTED = os.getenv("VIDEO_SEGMENTED", "").lower() in ("1", "true", "yes")
+# 增量渲染：走分段编码并保留各片段的编码结果 (<视频名>_parts/)，只重新编码输入变化的片段；
+# 默认关闭，保持单次 ffmpeg 调用的快速路径
+VIDEO_INCREMENTAL = os.getenv("VIDEO_INCREMENTAL", "").lower() in ("1", "true", "yes")
+
+def _inputs_path(output_path):
+    return os.path.splitext(output_path)[0] + ".inputs.json"
+
+def _inputs_unchanged(output_path, fingerprint, profiles):
+    paths = [output_path, _inputs_path(output_path)] + [p.output_path(output_path) for p in profiles]
+    if not all(os.path.exists(p) for p in paths):
+        return False
+    try:
+        with open(_inputs_path(output_path), "r", encoding="utf-8") as f:
+            return json.load(f).get("fingerprint") == fingerprint
+    except (OSError, json.JSONDecodeError):
+        return False
+
+def generate_video(image_paths, audio_paths, output_path, profiles=None):
     """
     将图片和音频合并成视频
+
+    图片与音频内容都未变化且视频已存在时直接跳过；
+    ffmpeg 增量模式下只有内容变化的幕会重新编码，其余片段流复制复用
+
     :param image_paths: 图片路径列表 [img1, img2, img3]
     :param audio_paths: 音频路径列表 [aud1, aud2, aud3]
     :param output_path: 输出视频路径
+    :param profiles: 额外输出规格 (OutputProfile 列表)，默认读取 VIDEO_OUTPUT_PROFILES；
+                     ffmpeg 后端下与主视频在同一次处理中输出，所有输出记录在同目录的 outputs.json
+    :return: 成功时返回 output_path，失败返回 None
     """
+    min_len = min(len(image_paths), len(audio_paths))
+    image_paths, audio_paths = image_paths[:min_len], audio_paths[:min_len]
+    profiles = parse_profiles() if profiles is None else profiles
+
+    fingerprint = args_fingerprint(image_paths + audio_paths + [json.dumps(p.to_dict()) for p in profiles])
+    if _inputs_unchanged(output_path, fingerprint, profiles):
+        print(f"🎬 视频素材未变化，跳过渲染: {output_path}")
+        return output_path
+
     print(f"🎬 开始生成视频: {output_path}")
+    result = None
+
+    # 快速路径: 静态图片直接交给 ffmpeg (-loop 1 + xfade)，不逐帧经过 Python
+    if VIDEO_BACKEND != "moviepy" and ffmpeg_available():
+        if (VIDEO_SEGMENTED or VIDEO_INCREMENTAL) and profiles:
+            print(f"  ⚠️ 多规格输出需要单次 ffmpeg 处理，忽略 VIDEO_SEGMENTED / VIDEO_INCREMENTAL")
+        try:
+            if (VIDEO_SEGMENTED or VIDEO_INCREMENTAL) and not profiles:
+                # 分段编码在每个 ffmpeg 进程内部各自占用并发名额
+                cache_dir = os.path.splitext(output_path)[0] + "_parts" if VIDEO_INCREMENTAL else None
+                result = render_still_video_segmented(image_paths, audio_paths, output_path, fps=24,
+                                                      transition=1.0, cache_dir=cache_dir)
+            else:
+                # 单次 ffmpeg 调用；多规格输出需要同一路画面分发到各分支，也走这里
+                with provider_slot("ffmpeg"):
+                    result = render_still_video(image_paths, audio_paths, output_path, fps=24, transition=1.0,
+                                                profiles=profiles)
+            print(f"✅ 视频生成成功！(ffmpeg)")
+        except Exception as e:
+            print(f"  ⚠️ ffmpeg 快速路径失败 ({e})，回退到 moviepy")
+    elif VIDEO_BACKEND == "ffmpeg":
+        print(f"  ⚠️ 未找到 ffmpeg，回退到 moviepy")
+
+    if not result:
+        if profiles:
+            print(f"  ⚠️ moviepy 后端不支持多规格输出，只生成主视频")
+            profiles = []
+        result = _generate_video_moviepy(image_paths, audio_paths, output_path)
+
+    if result:
+        record_outputs(output_path, profiles, 24)
+        with open(_inputs_path(output_path), "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint, "images": image_paths, "audio": audio_paths},
+                      f, ensure_ascii=False, indent=2)
+    return result
+
+def _generate_video_moviepy(image_paths, audio_paths, output_path):
+    """
+    moviepy 渲染路径 (逐帧合成，ffmpeg 不可用时的回退方案)
+    """
+    from moviepy import AudioFileClip, ImageClip, concatenate_videoclips, vfx
 
     clips = []
 
@@ -39,11 +124,11 @@ def generate_video(image_paths, audio_paths, output_path):
 
         except Exception as e:
             print(f"  ❌ 处理片段 {i+1} 失败: {e}")
-            return
+            return None
 
     if not clips:
         print("❌ 没有有效的片段用于生成视频")
-        return
+        return None
 
     try:
         # 拼接所有片段
@@ -52,17 +137,20 @@ def generate_video(image_paths, audio_paths, output_path):
         # 导出视频
         # preset='ultrafast' for speed (sacrifice little compression for speed)
         # threads=None lets ffmpeg decide optimal thread count
-        final_video.write_videofile(
-            output_path,
-            fps=24,
-            codec="libx264",
-            audio_codec="aac",
-            preset="ultrafast",  # 改为最快模式
-            threads=8,          # 增加线程数
-            logger=None,
-            ffmpeg_params=["-pix_fmt", "yuv420p"]
-        )
+        with provider_slot("ffmpeg"):
+            final_video.write_videofile(
+                output_path,
+                fps=24,
+                codec="libx264",
+                audio_codec="aac",
+                preset="ultrafast",  # 改为最快模式
+                threads=8,          # 增加线程数
+                logger=None,
+                ffmpeg_params=["-pix_fmt", "yuv420p"]
+            )
         print(f"✅ 视频生成成功！")
+        return output_path
 
     except Exception as e:
         print(f"❌ 视频导出失败: {e}")
+        return None
@@ -1,8 +1,16 @@
 import os
 import json
+import math
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor, wait
 from openai import OpenAI
 from dotenv import load_dotenv
+from modules.concurrency import provider_slot, get_limit
+from modules.llm_cache import cached_chat_completion
+from modules.search_utils import merge_search_results
+from modules.search_store import get_search_store
+from modules.context_compressor import compress_search_results
 
 load_dotenv()
 
@@ -14,10 +22,27 @@ llm_client = OpenAI(
 
 SERPER_API_KEY = os.getenv("SERPER_API_KEY")
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
-
-def search_with_serper(query, num_results=10):
+SERPER_TIMEOUT = float(os.getenv("SERPER_TIMEOUT", "10"))
+TAVILY_TIMEOUT = float(os.getenv("TAVILY_TIMEOUT", "15"))
+# 并发搜索的截止时间 (秒)：排队等待并发名额超过该时间的查询不再发出请求
+SEARCH_DEADLINE = float(os.getenv("SEARCH_DEADLINE", "30"))
+# 合并去重后交给 LLM 的最大结果数
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "10"))
+# 交给 LLM 的搜索摘要 token 预算，0 表示不压缩
+RESEARCH_CONTEXT_TOKENS = int(os.getenv("RESEARCH_CONTEXT_TOKENS", "1200"))
+
+def _past_deadline(deadline, provider, query):
+    if deadline is not None and time.monotonic() >= deadline:
+        print(f"⚠️ {provider} 查询排队超过截止时间，已跳过: {query}")
+        return True
+    return False
+
+def search_with_serper(query, num_results=10, timeout=None, since_seconds=None, deadline=None):
     """
     使用 Serper.dev API 进行搜索
+
+    :param since_seconds: 只搜索最近这么多秒内的结果 (增量刷新)
+    :param deadline: time.monotonic() 截止时间，拿到并发名额时已过期则不发请求
     """
     if not SERPER_API_KEY:
         return None
@@ -33,9 +58,21 @@ def search_with_serper(query, num_results=10):
         "gl": "cn",  # 地理位置: 中国
         "hl": "zh-cn"  # 语言: 中文
     }
+    if since_seconds:
+        # Google 时间范围: 过去1小时/1天/1周
+        if since_seconds <= 3600:
+            payload["tbs"] = "qdr:h"
+        elif since_seconds <= 86400:
+            payload["tbs"] = "qdr:d"
+        elif since_seconds <= 7 * 86400:
+            payload["tbs"] = "qdr:w"
 
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=10)
+        with provider_slot("search"):
+            # 超时从拿到并发名额后开始计算，排队时间不计入
+            if _past_deadline(deadline, "Serper", query):
+                return None
+            response = requests.post(url, json=payload, headers=headers, timeout=timeout or SERPER_TIMEOUT)
         if response.status_code == 200:
             return response.json()
         else:
@@ -45,9 +82,12 @@ def search_with_serper(query, num_results=10):
         print(f"⚠️ Serper API 请求失败: {e}")
         return None
 
-def search_with_tavily(query, max_results=10):
+def search_with_tavily(query, max_results=10, timeout=None, since_seconds=None, deadline=None):
     """
     使用 Tavily AI API 进行搜索
+
+    :param since_seconds: 只搜索最近这么多秒内的新闻 (增量刷新)
+    :param deadline: time.monotonic() 截止时间，拿到并发名额时已过期则不发请求
     """
     if not TAVILY_API_KEY:
         return None
@@ -64,9 +104,16 @@ def search_with_tavily(query, max_results=10):
         "include_answer": True,
         "include_raw_content": False
     }
+    if since_seconds:
+        # days 仅对 news 主题生效
+        payload["topic"] = "news"
+        payload["days"] = max(1, math.ceil(since_seconds / 86400))
 
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=15)
+        with provider_slot("search"):
+            if _past_deadline(deadline, "Tavily", query):
+                return None
+            response = requests.post(url, json=payload, headers=headers, timeout=timeout or TAVILY_TIMEOUT)
         if response.status_code == 200:
             return response.json()
         else:
@@ -84,34 +131,104 @@ def format_search_results(serper_data=None, tavily_data=None):
 
     # 处理 Serper 结果
     if serper_data and "organic" in serper_data:
-        for item in serper_data["organic"][:10]:
+        for rank, item in enumerate(serper_data["organic"][:10]):
             formatted_results.append({
                 "title": item.get("title", ""),
                 "snippet": item.get("snippet", ""),
                 "url": item.get("link", ""),
-                "source": "serper"
+                "source": "serper",
+                "rank": rank
             })
 
     # 处理 Tavily 结果
     if tavily_data and "results" in tavily_data:
-        for item in tavily_data["results"][:10]:
+        for rank, item in enumerate(tavily_data["results"][:10]):
             formatted_results.append({
                 "title": item.get("title", ""),
                 "snippet": item.get("content", ""),
                 "url": item.get("url", ""),
-                "source": "tavily"
+                "source": "tavily",
+                "rank": rank
             })
 
     return formatted_results
 
-def summarize_with_llm(query, search_results):
+def build_search_queries(topic, date=None):
+    """
+    构建查询变体：带/不带日期、最新进展
+    """
+    queries = [f"{topic} 新闻"]
+    if date:
+        queries.append(f"{topic} {date} 新闻")
+    queries.append(f"{topic} 最新进展")
+    return queries
+
+def fan_out_search(queries, since_seconds=None):
+    """
+    对所有查询变体并发请求所有已配置的搜索源
+
+    线程数不超过搜索并发名额；每个请求的超时从拿到名额后开始计算，
+    超过 SEARCH_DEADLINE 仍在排队的查询直接跳过，不会发出请求后再丢弃结果
+
+    :param since_seconds: 只抓取最近这么多秒内的结果 (增量刷新)
+    :return: (格式化后的结果列表 (未去重), 是否至少有一个请求成功返回)
+    """
+    tasks = []
+    if SERPER_API_KEY:
+        tasks += [("serper", q) for q in queries]
+    if TAVILY_API_KEY:
+        tasks += [("tavily", q) for q in queries]
+    if not tasks:
+        return [], False
+
+    print(f"  - 并发搜索: {len(tasks)} 个请求 ({', '.join(sorted({p for p, _ in tasks}))})")
+
+    deadline = time.monotonic() + SEARCH_DEADLINE
+
+    def run(task):
+        provider, query = task
+        if provider == "serper":
+            data = search_with_serper(query, since_seconds=since_seconds, deadline=deadline)
+            return data is not None, format_search_results(serper_data=data)
+        data = search_with_tavily(query, since_seconds=since_seconds, deadline=deadline)
+        return data is not None, format_search_results(tavily_data=data)
+
+    executor = ThreadPoolExecutor(max_workers=min(len(tasks), get_limit("search")))
+    futures = [executor.submit(run, task) for task in tasks]
+    # 兜底超时：截止前发出的请求各自还有完整的单次超时，这里只防止个别请求卡在连接池中
+    done, not_done = wait(futures, timeout=SEARCH_DEADLINE + max(SERPER_TIMEOUT, TAVILY_TIMEOUT) + 5)
+    executor.shutdown(wait=False, cancel_futures=True)
+    if not_done:
+        print(f"  ⚠️ {len(not_done)} 个搜索请求超时，已忽略")
+
+    results = []
+    succeeded = False
+    for future in futures:
+        if future in done and future.exception() is None:
+            ok, items = future.result()
+            succeeded = succeeded or ok
+            results.extend(items)
+    return results, succeeded
+
+def summarize_with_llm(query, search_results, budget_tokens=None):
     """
     使用 LLM 总结搜索结果
+
+    :param budget_tokens: 搜索摘要的 token 预算，默认 RESEARCH_CONTEXT_TOKENS，0 表示不压缩
     """
+    budget_tokens = RESEARCH_CONTEXT_TOKENS if budget_tokens is None else budget_tokens
+    context_results = search_results[:10]
+
+    # 本地抽取式压缩：只保留预算内信息量高、互不重复的句子
+    if budget_tokens > 0:
+        context_results, stats = compress_search_results(context_results, query, budget_tokens)
+        print(f"  - 上下文压缩: {stats['original_tokens']} → {stats['compressed_tokens']} tokens "
+              f"(压缩率 {stats['ratio']:.0%}，保留 {len(context_results)} 条来源)")
+
     # 构建搜索结果文本
     results_text = "\n\n".join([
         f"【{i+1}】{r['title']}\n{r['snippet']}\n来源: {r['url']}"
-        for i, r in enumerate(search_results[:10])
+        for i, r in enumerate(context_results)
     ])
 
     system_prompt = """你是一个专业的新闻分析师。你的任务是从搜索结果中提取关键信息，并以结构化的JSON格式返回。
@@ -144,71 +261,89 @@ def summarize_with_llm(query, search_results):
 }}"""
 
     try:
-        response = llm_client.chat.completions.create(
+        result_text = cached_chat_completion(
+            llm_client,
             model="gpt-3.5-turbo",  # 与 news_generator.py 保持一致
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
             temperature=0.3,
-            response_format={"type": "json_object"}
+            response_format={"type": "json_object"},
+            validate=json.loads
         )
-
-        result_text = response.choices[0].message.content
         return json.loads(result_text)
 
     except Exception as e:
         print(f"❌ LLM 分析失败: {e}")
         return None
 
-def research_topic(topic, date=None):
+def gather_search_results(topic, date=None):
     """
-    主入口：搜索 + 总结
-    Returns: {
-        "key_facts": [...],
-        "timeline": {...},
-        "key_actors": [...],
-        "sentiment": "positive/negative/neutral",
-        "summary": "200字综述",
-        "sources": ["url1", "url2", ...]
-    }
-    """
-    print(f"🔍 开始研究主题: {topic}")
-
-    # 构建搜索查询
-    search_query = f"{topic} 新闻" if date is None else f"{topic} {date} 新闻"
-
-    # 尝试多个搜索源
-    serper_result = None
-    tavily_result = None
-
-    if SERPER_API_KEY:
-        print("  - 使用 Serper.dev 搜索...")
-        serper_result = search_with_serper(search_query)
+    搜索阶段：查询结果库 / 并发搜索 / 合并去重
 
-    if TAVILY_API_KEY and not serper_result:
-        print("  - 使用 Tavily AI 搜索...")
-        tavily_result = search_with_tavily(search_query)
-
-    # 格式化搜索结果
-    search_results = format_search_results(serper_result, tavily_result)
+    :return: 排序截断后的搜索结果列表
+    """
+    # 先查搜索结果库：有效期内直接复用，过期则只抓取上次之后的新结果
+    store = get_search_store()
+    store_query = f"{topic} {date or ''}".strip()
+    cached_results, fetched_at = store.lookup(store_query)
+
+    if cached_results and store.is_fresh(fetched_at):
+        print(f"  💾 搜索缓存命中 ({len(cached_results)} 条，{(time.time() - fetched_at) / 60:.0f} 分钟前)")
+        raw_results = list(cached_results)
+    else:
+        since_seconds = time.time() - fetched_at if fetched_at else None
+        if since_seconds:
+            print(f"  - 增量搜索: 只抓取最近 {since_seconds / 3600:.1f} 小时的新结果")
+        # 多个查询变体 x 多个搜索源并发请求
+        new_results, succeeded = fan_out_search(build_search_queries(topic, date), since_seconds=since_seconds)
+        # 搜索成功但没有新结果时也要刷新查询时间，否则下次增量搜索的时间窗口会不断扩大；
+        # 全部请求失败 (网络不通 / 未配置 Key) 时保留原时间，下次仍按完整窗口重新抓取
+        if succeeded:
+            store.save(store_query, new_results)
+        elif cached_results:
+            print(f"  ⚠️ 所有搜索请求均失败，沿用已缓存的 {len(cached_results)} 条结果")
+        raw_results = new_results + cached_results
+
+    # 合并其他相关查询缓存过的结果 (滚动新闻的前序报道)
+    related = store.related(topic, limit=5, exclude_urls=[r["url"] for r in raw_results])
+    if related:
+        print(f"  - 复用相关查询的缓存结果 {len(related)} 条")
+        raw_results += [dict(r, rank=r.get("rank", 0) + 10) for r in related]
+
+    # URL 规范化 + 近重复摘要去除 + 排序截断
+    search_results = merge_search_results(raw_results, query_terms=[topic], max_results=SEARCH_MAX_RESULTS)
+    if raw_results:
+        print(f"  - 合并去重: {len(raw_results)} → {len(search_results)} 条")
+
+    return search_results
+
+def empty_research(search_results=None):
+    """
+    没有 LLM 总结时的研究数据结构，后续由 LLM 直接生成
+    """
+    return {
+        "key_facts": [],
+        "timeline": {
+            "cause": "",
+            "development": "",
+            "impact": ""
+        },
+        "key_actors": [],
+        "sentiment": "neutral",
+        "summary": "",
+        "sources": [],
+        "raw_results": search_results or []
+    }
 
+def summarize_search_results(topic, search_results):
+    """
+    总结阶段：使用 LLM 分析搜索结果，失败时退回原始摘要
+    """
     if not search_results:
         print("⚠️ 未获取到搜索结果，将使用 LLM 生成内容")
-        # 返回空结构，后续由 LLM 直接生成
-        return {
-            "key_facts": [],
-            "timeline": {
-                "cause": "",
-                "development": "",
-                "impact": ""
-            },
-            "key_actors": [],
-            "sentiment": "neutral",
-            "summary": "",
-            "sources": [],
-            "raw_results": []
-        }
+        return empty_research()
 
     print(f"  ✅ 获取到 {len(search_results)} 条搜索结果")
 
@@ -235,3 +370,19 @@ def research_topic(topic, date=None):
             "sources": [r["url"] for r in search_results[:5]],
             "raw_results": search_results
         }
+
+def research_topic(topic, date=None):
+    """
+    主入口：搜索 + 总结
+    Returns: {
+        "key_facts": [...],
+        "timeline": {...},
+        "key_actors": [...],
+        "sentiment": "positive/negative/neutral",
+        "summary": "200字综述",
+        "sources": ["url1", "url2", ...]
+    }
+    """
+    print(f"🔍 开始研究主题: {topic}")
+    search_results = gather_search_results(topic, date)
+    return summarize_search_results(topic, search_results)
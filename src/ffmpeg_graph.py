@@ -0,0 +1,363 @@
+"""
+ffmpeg 滤镜图编译模块
+把 VideoComposer 的时间线（图片段落、时长、Ken Burns 缩放、转场、叠加层、字幕）
+编译成单个 ffmpeg filtergraph，一个进程完成全部合成与编码
+
+功能：
+- Ken Burns 缩放 → zoompan
+- 段落拼接 → concat / xfade
+- 文字/图片叠加（含预渲染字幕） → overlay (enable=between)
+- 字幕 → subtitles
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from modules.concurrency import provider_slot
+from modules.ffmpeg_utils import run_ffmpeg
+from modules.output_profiles import OutputProfile, fan_out, commit_outputs, discard_outputs
+from modules.segment_render import Part, plan_windows, render_segmented
+
+
+@dataclass
+class Segment:
+    """时间线上的一个图片段落"""
+    image_path: str
+    duration: float
+    start_scale: float = 1.0
+    end_scale: float = 1.0
+
+
+@dataclass
+class Overlay:
+    """叠加层（透明 PNG），在 [start, end] 时间内显示"""
+    image_path: str
+    x: str
+    y: str
+    start: float
+    end: float
+
+
+@dataclass
+class Timeline:
+    """
+    视频时间线
+
+    Attributes:
+        segments: 图片段落列表（按播放顺序）
+        audio_path: 音轨路径
+        size: 输出尺寸 (width, height)
+        fps: 输出帧率
+        transition: 段落间 xfade 转场时长（秒），0 表示直接拼接
+        overlays: 叠加层列表
+        subtitles_path: SRT 字幕路径，None 表示不烧录字幕
+        subtitle_style: 字幕 force_style 参数（ASS 样式）
+    """
+    segments: List[Segment]
+    audio_path: str
+    size: Tuple[int, int] = (1080, 1920)
+    fps: int = 24
+    transition: float = 0.0
+    overlays: List[Overlay] = field(default_factory=list)
+    subtitles_path: Optional[str] = None
+    subtitle_style: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return sum(seg.duration for seg in self.segments)
+
+
+def escape_filter_value(value: str) -> str:
+    """
+    转义 filtergraph 中的参数值（用于文件路径等）
+
+    ffmpeg 需要两级转义：先转义选项值中的 ' 和 :，再转义滤镜图层面的 \\ ' [ ] , ;
+
+    Args:
+        value: 原始字符串
+
+    Returns:
+        可直接作为不加引号的参数值使用的字符串
+    """
+    value = value.replace("\\", "/")
+    for ch in ":'":
+        value = value.replace(ch, "\\" + ch)
+    for ch in "\\'[],;":
+        value = value.replace(ch, "\\" + ch)
+    return value
+
+
+def _zoom_expr(segment: Segment, frames: int, start_frame: int = 0) -> str:
+    """
+    生成 zoompan 的缩放表达式
+
+    zoompan 的缩放倍数不能小于 1，因此 start/end 中较小者被归一化为 1（相对缩放不变）
+
+    Args:
+        segment: 图片段落
+        frames: 该段落输入的总帧数（缩放从第 0 帧线性变化到最后一帧）
+        start_frame: 本次渲染从段落的第几帧开始（分段编码时使用）
+    """
+    base = min(segment.start_scale, segment.end_scale)
+    start = segment.start_scale / base
+    end = segment.end_scale / base
+    return f"{start:.6f}+{end - start:.6f}*(on+{start_frame})/{max(frames - 1, 1)}"
+
+
+def _segment_filter(index: int, timeline: Timeline, input_label: str, output_label: str, start_frame: int = 0) -> str:
+    """
+    生成单个图片段落的滤镜链（缩放裁剪 + Ken Burns）
+
+    Args:
+        index: 段落序号
+        timeline: 时间线
+        input_label: 输入流标签，如 "0:v"
+        output_label: 输出流标签
+        start_frame: 从段落的第几帧开始
+    """
+    segment = timeline.segments[index]
+    width, height = timeline.size
+    chain = (
+        f"[{input_label}]scale={width}:{height}:force_original_aspect_ratio=increase,"
+        f"crop={width}:{height},setsar=1"
+    )
+    if segment.start_scale != segment.end_scale:
+        frames = max(1, round(_input_length(index, timeline) * timeline.fps))
+        chain += (
+            f",zoompan=z='{_zoom_expr(segment, frames, start_frame)}'"
+            f":x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)'"
+            f":d=1:s={width}x{height}:fps={timeline.fps}"
+        )
+    else:
+        chain += f",fps={timeline.fps}"
+    return chain + f",format=yuv420p[{output_label}]"
+
+
+def _input_length(index: int, timeline: Timeline) -> float:
+    """
+    第 index 段图片输入需要循环的时长（有转场时非最后一段多出转场时长，用于重叠）
+    """
+    duration = timeline.segments[index].duration
+    if timeline.transition > 0 and index < len(timeline.segments) - 1:
+        return duration + timeline.transition
+    return duration
+
+
+def _subtitle_filter(timeline: Timeline, offset: float = 0.0) -> str:
+    """
+    生成字幕烧录滤镜；offset 非 0 时先把时间戳平移到整条时间线上的位置，烧录后再移回
+    """
+    subtitle = f"subtitles=filename={escape_filter_value(timeline.subtitles_path)}"
+    if timeline.subtitle_style:
+        subtitle += f":force_style={escape_filter_value(timeline.subtitle_style)}"
+    if offset:
+        subtitle = f"setpts=PTS+{offset:.3f}/TB,{subtitle},setpts=PTS-{offset:.3f}/TB"
+    return subtitle
+
+
+def compile_timeline(
+    timeline: Timeline,
+    output_path: str,
+    encode_args: Optional[List[str]] = None,
+    variants: Optional[List[Tuple[OutputProfile, str]]] = None
+) -> List[str]:
+    """
+    将时间线编译为 ffmpeg 参数列表
+
+    Args:
+        timeline: 时间线
+        output_path: 输出视频路径
+        encode_args: 编码参数，默认 libx264 ultrafast + aac
+        variants: 额外输出 [(规格, 输出路径), ...]，合成后的画面经 split 分支缩放裁剪，
+                  与主视频在同一个 ffmpeg 进程中编码
+
+    Returns:
+        ffmpeg 参数列表（不含可执行文件）
+    """
+    segments = timeline.segments
+    if not segments:
+        raise ValueError("时间线为空")
+
+    n = len(segments)
+    args = []
+    for i, seg in enumerate(segments):
+        args += ["-loop", "1", "-framerate", timeline.fps, "-t", f"{_input_length(i, timeline):.3f}", "-i", seg.image_path]
+    audio_index = n
+    args += ["-i", timeline.audio_path]
+    for ov in timeline.overlays:
+        # 叠加层输入平移到显示起点、只循环显示时长，图片只在显示期间被解码
+        args += [
+            "-itsoffset", f"{ov.start:.3f}", "-loop", "1", "-framerate", timeline.fps,
+            "-t", f"{ov.end - ov.start:.3f}", "-i", ov.image_path,
+        ]
+
+    filters = [_segment_filter(i, timeline, f"{i}:v", f"v{i}") for i in range(n)]
+
+    # 段落拼接
+    if n == 1:
+        last = "v0"
+    elif timeline.transition > 0:
+        last = "v0"
+        offset = 0.0
+        for i in range(1, n):
+            offset += segments[i - 1].duration
+            out = f"x{i}"
+            filters.append(
+                f"[{last}][v{i}]xfade=transition=fade:duration={timeline.transition:.3f}:offset={offset:.3f}[{out}]"
+            )
+            last = out
+    else:
+        filters.append("".join(f"[v{i}]" for i in range(n)) + f"concat=n={n}:v=1:a=0[base]")
+        last = "base"
+
+    # 叠加层
+    for k, ov in enumerate(timeline.overlays):
+        out = f"ov{k}"
+        filters.append(
+            f"[{last}][{audio_index + 1 + k}:v]overlay=x={ov.x}:y={ov.y}:eof_action=pass"
+            f":enable='between(t,{ov.start:.3f},{ov.end:.3f})'[{out}]"
+        )
+        last = out
+
+    # 字幕
+    if timeline.subtitles_path:
+        filters.append(f"[{last}]{_subtitle_filter(timeline)}[vsub]")
+        last = "vsub"
+
+    # 多规格输出
+    branches = []
+    if variants:
+        fan_filters, (last, _), branches = fan_out(last, [profile for profile, _ in variants])
+        filters += fan_filters
+
+    args += [
+        "-filter_complex", ";".join(filters),
+        "-map", f"[{last}]", "-map", f"{audio_index}:a",
+        "-t", f"{timeline.duration:.3f}",
+    ]
+    args += encode_args or [
+        "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+        "-r", timeline.fps, "-c:a", "aac", "-b:a", "192k",
+        "-movflags", "+faststart",
+    ]
+    args.append(output_path)
+
+    for (profile, path), (label, _) in zip(variants or [], branches):
+        args += [
+            "-map", f"[{label}]", "-map", f"{audio_index}:a",
+            "-t", f"{timeline.duration:.3f}",
+        ]
+        args += profile.encode_args(timeline.fps) + ["-c:a", "aac", "-b:a", "192k", "-movflags", "+faststart", path]
+    return args
+
+
+def render_timeline(timeline: Timeline, output_path: str, profiles: Optional[List[OutputProfile]] = None) -> str:
+    """
+    编译并执行时间线，一个 ffmpeg 进程完成合成与编码
+
+    Args:
+        timeline: 时间线
+        output_path: 输出视频路径
+        profiles: 额外输出规格，输出到 profile.output_path(output_path)
+
+    Returns:
+        输出视频路径
+    """
+    tmp_paths = {output_path + ".part.mp4": output_path}
+    variants = []
+    for profile in profiles or []:
+        path = profile.output_path(output_path)
+        tmp_paths[path + ".part.mp4"] = path
+        variants.append((profile, path + ".part.mp4"))
+    try:
+        # 与其他 ffmpeg 编码共用 CONCURRENCY_FFMPEG 名额
+        with provider_slot("ffmpeg"):
+            run_ffmpeg(compile_timeline(timeline, output_path + ".part.mp4", variants=variants))
+        commit_outputs(tmp_paths)
+    finally:
+        discard_outputs(tmp_paths)
+    return output_path
+
+
+def timeline_parts(timeline: Timeline) -> List[Part]:
+    """
+    把时间线切成可独立编码的片段（段落主体 + 转场窗口），
+    每个片段的 Ken Burns 进度、叠加层和字幕时间都按其在整条时间线上的位置换算
+
+    Args:
+        timeline: 时间线
+
+    Returns:
+        Part 列表（按播放顺序）
+    """
+    fps = timeline.fps
+    margin = 1.0 / fps
+    starts = []
+    position = 0.0
+    for seg in timeline.segments:
+        starts.append(position)
+        position += seg.duration
+
+    parts = []
+    for window in plan_windows([seg.duration for seg in timeline.segments], timeline.transition):
+        length = window.end - window.start + margin
+        if window.kind == "body":
+            sources = [window.index]
+        else:
+            sources = [window.index - 1, window.index]
+
+        input_args = []
+        filters = []
+        for k, index in enumerate(sources):
+            input_args += ["-loop", "1", "-framerate", fps, "-t", f"{length:.3f}", "-i", timeline.segments[index].image_path]
+            # 与 Window.frames 相同按全局帧号取整，保证与整段渲染时该帧的缩放进度一致
+            start_frame = round(window.start * fps) - round(starts[index] * fps)
+            filters.append(_segment_filter(index, timeline, f"{k}:v", f"s{k}", start_frame))
+
+        if window.kind == "body":
+            last = "s0"
+        else:
+            filters.append(f"[s0][s1]xfade=transition=fade:duration={timeline.transition:.3f}:offset=0[xf]")
+            last = "xf"
+
+        # 只带上与本窗口时间重叠的叠加层，显示时间换算到片段内
+        overlays = [ov for ov in timeline.overlays if ov.start < window.end and ov.end > window.start]
+        for k, ov in enumerate(overlays):
+            local_start = max(0.0, ov.start - window.start)
+            local_end = min(ov.end, window.end) - window.start + margin
+            input_args += [
+                "-itsoffset", f"{local_start:.3f}", "-loop", "1", "-framerate", fps,
+                "-t", f"{local_end - local_start:.3f}", "-i", ov.image_path,
+            ]
+            out = f"ov{k}"
+            filters.append(
+                f"[{last}][{len(sources) + k}:v]overlay=x={ov.x}:y={ov.y}:eof_action=pass"
+                f":enable='between(t,{ov.start - window.start:.3f},{ov.end - window.start:.3f})'[{out}]"
+            )
+            last = out
+
+        if timeline.subtitles_path:
+            filters.append(f"[{last}]{_subtitle_filter(timeline, window.start)}[vsub]")
+            last = "vsub"
+
+        filters.append(f"[{last}]null[vout]")
+        parts.append(Part(window.name, input_args, ";".join(filters), window.frames(fps)))
+
+    return parts
+
+
+def render_timeline_segmented(timeline: Timeline, output_path: str, cache_dir: Optional[str] = None) -> str:
+    """
+    分段并行版的 render_timeline：各片段由独立 ffmpeg 进程并行编码，
+    音频编码一次，最后流复制拼接
+
+    Args:
+        timeline: 时间线
+        output_path: 输出视频路径
+        cache_dir: 片段缓存目录，指定时只重新编码图片、动效或字幕有变化的片段
+
+    Returns:
+        输出视频路径
+    """
+    audio_args = ["-i", timeline.audio_path, "-t", f"{timeline.duration:.3f}"]
+    return render_segmented(timeline_parts(timeline), audio_args, output_path, fps=timeline.fps, cache_dir=cache_dir)
@@ -0,0 +1,154 @@
+"""
+预处理帧缓存模块
+图片缩放裁剪到目标尺寸后的 RGB 帧以 .npy 文件存储，按源图片内容哈希 + 目标尺寸索引，
+再次使用时以内存映射 (mmap) 方式只读加载，不再重复解码和 LANCZOS 缩放
+
+重复渲染、预览渲染和多版本渲染共享同一份缓存；超出磁盘预算时按最近使用时间 (LRU) 淘汰
+"""
+
+import os
+import time
+import tempfile
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from modules.artifact_store import evict_lru
+from modules.ffmpeg_utils import file_digest
+
+FRAME_CACHE_DIR = os.getenv("FRAME_CACHE_DIR", "results/.cache/frames")
+# 每帧 1080x1920 RGB 约 6MB
+FRAME_CACHE_BUDGET_MB = float(os.getenv("FRAME_CACHE_BUDGET_MB", "1024"))
+# 两次完整扫描之间的最短间隔 (秒)；期间只在估算用量超出预算时才提前扫描
+FRAME_CACHE_SCAN_INTERVAL = float(os.getenv("FRAME_CACHE_SCAN_INTERVAL", "60"))
+
+
+def resize_cover(img: Image.Image, target_size: Tuple[int, int]) -> Image.Image:
+    """
+    调整图片大小并居中裁剪以填满目标尺寸（保持纵横比）
+
+    Args:
+        img: PIL Image对象
+        target_size: 目标尺寸 (width, height)
+
+    Returns:
+        调整后的PIL Image
+    """
+    target_w, target_h = target_size
+    img_w, img_h = img.size
+
+    # 计算缩放比例（取较大值以填充画面）
+    scale = max(target_w / img_w, target_h / img_h)
+
+    # 缩放图片
+    new_w = int(img_w * scale)
+    new_h = int(img_h * scale)
+    img_resized = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
+
+    # 居中裁剪
+    left = (new_w - target_w) // 2
+    top = (new_h - target_h) // 2
+    return img_resized.crop((left, top, left + target_w, top + target_h))
+
+
+class FrameCache:
+    """
+    归一化帧缓存
+
+    缓存文件名为 {源图片sha256}_{宽}x{高}.npy，内容为 (高, 宽, 3) 的 uint8 RGB 数组；
+    读取时刷新修改时间，写入后超出预算时淘汰最久未使用的帧（与 ArtifactStore 相同的 LRU 策略）
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, budget_bytes: Optional[int] = None):
+        """
+        Args:
+            cache_dir: 缓存目录，默认 FRAME_CACHE_DIR
+            budget_bytes: 磁盘预算（字节），默认 FRAME_CACHE_BUDGET_MB
+        """
+        self.cache_dir = cache_dir or FRAME_CACHE_DIR
+        self.budget_bytes = int(FRAME_CACHE_BUDGET_MB * 1024 * 1024) if budget_bytes is None else budget_bytes
+        self.evictions = 0
+        self._usage = None
+        self._pending_bytes = 0
+        self._last_scan = 0.0
+        self._lock = threading.Lock()
+
+    def path_for(self, image_path: str, target_size: Tuple[int, int]) -> str:
+        """
+        返回图片在目标尺寸下的缓存文件路径（源图片内容变化时路径随之变化）
+        """
+        width, height = target_size
+        return os.path.join(self.cache_dir, f"{file_digest(image_path)}_{width}x{height}.npy")
+
+    def get(self, image_path: str, target_size: Tuple[int, int]) -> np.ndarray:
+        """
+        读取归一化帧，未命中时解码、缩放裁剪并写入缓存
+
+        Args:
+            image_path: 源图片路径
+            target_size: 目标尺寸 (width, height)
+
+        Returns:
+            只读的内存映射数组 (height, width, 3)，uint8 RGB
+        """
+        cache_path = self.path_for(image_path, target_size)
+        if os.path.exists(cache_path):
+            self._touch(cache_path)
+        else:
+            self._store(image_path, target_size, cache_path)
+            self._maybe_evict(cache_path)
+        try:
+            return np.load(cache_path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            # 缓存文件损坏时重新生成
+            print(f"  ⚠️ 帧缓存读取失败 ({e})，重新生成: {cache_path}")
+            self._store(image_path, target_size, cache_path)
+            return np.load(cache_path, mmap_mode="r")
+
+    def _store(self, image_path: str, target_size: Tuple[int, int], cache_path: str) -> None:
+        with Image.open(image_path) as img:
+            frame = np.asarray(resize_cover(img.convert("RGB"), target_size), dtype=np.uint8)
+
+        # 先写临时文件再替换，并发渲染同一张图片时不会读到写了一半的缓存
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".npy.tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, np.ascontiguousarray(frame))
+            os.replace(tmp_path, cache_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _touch(self, path: str) -> None:
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def _maybe_evict(self, path: str) -> None:
+        # 估算用量未超预算且距上次扫描不足 FRAME_CACHE_SCAN_INTERVAL 时不遍历目录
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        with self._lock:
+            self._pending_bytes += size
+            due = (self._usage is None
+                   or self._usage + self._pending_bytes > self.budget_bytes
+                   or time.monotonic() - self._last_scan >= FRAME_CACHE_SCAN_INTERVAL)
+        if due:
+            self.evict()
+
+    def evict(self) -> None:
+        """
+        超出磁盘预算时按最近使用时间淘汰缓存帧
+        """
+        usage, evicted = evict_lru(self.cache_dir, self.budget_bytes)
+        with self._lock:
+            self.evictions += evicted
+            self._usage = usage
+            self._pending_bytes = 0
+            self._last_scan = time.monotonic()
@@ -0,0 +1,330 @@
+"""
+逐帧渲染模块
+用于 ffmpeg 滤镜无法表达的自定义特效：帧在 Python 中生成，写入预分配并反复复用的缓冲区，
+以 rawvideo 格式直接送入 ffmpeg 的标准输入编码
+
+功能：
+- FrameWriter：ffmpeg rawvideo 管道写入器
+- KenBurnsSampler：基于预计算索引的向量化缩放裁剪（最近邻采样）
+- OverlayBlender：叠加层（如预渲染字幕）只在其覆盖区域内 alpha 混合
+- render_timeline_frames：按时间线逐帧渲染，内存占用与视频长度无关
+"""
+
+import tempfile
+import subprocess
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from modules.concurrency import provider_slot
+from modules.ffmpeg_utils import FFMPEG_BINARY, FFmpegError
+from modules.output_profiles import OutputProfile, fan_out, commit_outputs, discard_outputs
+from src.ffmpeg_graph import Overlay, Timeline
+from src.frame_cache import FrameCache
+
+# 自定义特效：effect(frame, t) 原地修改当前帧（frame 为复用缓冲区，不能保留引用）
+FrameEffect = Callable[[np.ndarray, float], None]
+
+
+class FrameWriter:
+    """
+    ffmpeg rawvideo 管道写入器
+
+    帧直接以 rgb24 原始字节写入 ffmpeg 标准输入，不经过临时文件；
+    管道写满时阻塞，Python 侧最多只持有当前帧
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        size: Tuple[int, int],
+        fps: int = 24,
+        audio_path: Optional[str] = None,
+        preset: str = "ultrafast",
+        profiles: Optional[List[OutputProfile]] = None
+    ):
+        """
+        Args:
+            output_path: 输出视频路径
+            size: 帧尺寸 (width, height)
+            fps: 帧率
+            audio_path: 音轨路径，None 表示无音频
+            preset: x264 编码预设
+            profiles: 额外输出规格，同一路帧经 split 分支编码到 profile.output_path(output_path)
+        """
+        self.output_path = output_path
+        self.size = size
+        self.fps = fps
+        self.audio_path = audio_path
+        self.preset = preset
+        self.profiles = profiles or []
+        self.frames_written = 0
+        self._tmp_paths = {output_path + ".part.mp4": output_path}
+        for profile in self.profiles:
+            path = profile.output_path(output_path)
+            self._tmp_paths[path + ".part.mp4"] = path
+        self._proc = None
+        self._stderr = None
+
+    def open(self) -> "FrameWriter":
+        width, height = self.size
+        args = [
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", self.fps, "-i", "-",
+        ]
+        if self.audio_path:
+            args += ["-i", self.audio_path]
+
+        outputs = [(
+            "0:v", ["-c:v", "libx264", "-preset", self.preset, "-pix_fmt", "yuv420p"]
+        )]
+        if self.profiles:
+            filters, (main, _), branches = fan_out("0:v", self.profiles)
+            args += ["-filter_complex", ";".join(filters)]
+            outputs = [(f"[{main}]", outputs[0][1])] + [
+                (f"[{label}]", profile.encode_args(self.fps, self.preset))
+                for profile, (label, _) in zip(self.profiles, branches)
+            ]
+
+        for (video, encode_args), tmp_path in zip(outputs, self._tmp_paths):
+            args += ["-map", video]
+            if self.audio_path:
+                args += ["-map", "1:a", "-c:a", "aac", "-b:a", "192k", "-shortest"]
+            args += encode_args + ["-movflags", "+faststart", tmp_path]
+        cmd = [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-y"] + [str(a) for a in args]
+        # stderr 写入临时文件，避免管道写满导致 ffmpeg 与本进程互相等待
+        self._stderr = tempfile.TemporaryFile()
+        self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=self._stderr)
+        return self
+
+    def write(self, frame: np.ndarray) -> None:
+        """
+        写入一帧 (height, width, 3) uint8 RGB
+        """
+        if not frame.flags.c_contiguous:
+            frame = np.ascontiguousarray(frame)
+        try:
+            self._proc.stdin.write(frame.data)
+        except BrokenPipeError:
+            self._proc.wait()
+            raise FFmpegError(f"ffmpeg 提前退出 (退出码 {self._proc.returncode}): {self._stderr_tail()}")
+        self.frames_written += 1
+
+    def close(self) -> str:
+        """
+        结束写入并等待编码完成
+
+        Returns:
+            输出视频路径
+        """
+        try:
+            self._proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        returncode = self._proc.wait()
+        try:
+            if returncode != 0:
+                raise FFmpegError(f"ffmpeg 退出码 {returncode}: {self._stderr_tail()}")
+            commit_outputs(self._tmp_paths)
+        finally:
+            self._cleanup()
+        return self.output_path
+
+    def abort(self) -> None:
+        """
+        中止编码并删除半成品
+        """
+        if self._proc and self._proc.poll() is None:
+            self._proc.kill()
+            self._proc.wait()
+        self._cleanup()
+
+    def _stderr_tail(self) -> str:
+        self._stderr.seek(0)
+        return self._stderr.read().decode("utf-8", errors="replace").strip()[-500:]
+
+    def _cleanup(self) -> None:
+        if self._stderr:
+            self._stderr.close()
+            self._stderr = None
+        discard_outputs(self._tmp_paths)
+
+    def __enter__(self) -> "FrameWriter":
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class KenBurnsSampler:
+    """
+    向量化 Ken Burns 缩放
+
+    以画面中心为基准按缩放倍数裁剪并放大回原尺寸。行列偏移量在初始化时预计算，
+    每帧只需一次乘加得到采样索引，再用两次 np.take 写入预分配缓冲区，不产生新的帧数组
+    """
+
+    def __init__(self, size: Tuple[int, int]):
+        """
+        Args:
+            size: 帧尺寸 (width, height)，源帧与输出帧尺寸相同
+        """
+        width, height = size
+        self.size = size
+        # 以中心为原点的像素偏移
+        self._dy = np.arange(height, dtype=np.float32) - (height - 1) / 2
+        self._dx = np.arange(width, dtype=np.float32) - (width - 1) / 2
+        self._fy = np.empty(height, dtype=np.float32)
+        self._fx = np.empty(width, dtype=np.float32)
+        self._rows = np.empty(height, dtype=np.intp)
+        self._cols = np.empty(width, dtype=np.intp)
+        self._rows_buffer = np.empty((height, width, 3), dtype=np.uint8)
+
+    def _indices(self, offsets, scratch, out, zoom, length):
+        # 采样位置 = 中心 + 偏移 / zoom，四舍五入后限制在画面内
+        np.multiply(offsets, 1.0 / zoom, out=scratch)
+        scratch += (length - 1) / 2 + 0.5
+        np.copyto(out, scratch, casting="unsafe")
+        np.clip(out, 0, length - 1, out=out)
+
+    def sample(self, frame: np.ndarray, zoom: float, out: np.ndarray) -> np.ndarray:
+        """
+        把 frame 按 zoom 倍中心放大后写入 out
+
+        Args:
+            frame: 源帧 (height, width, 3)，可以是只读的内存映射数组
+            zoom: 缩放倍数（>= 1）
+            out: 输出缓冲区 (height, width, 3)
+
+        Returns:
+            out
+        """
+        if abs(zoom - 1.0) < 1e-6:
+            np.copyto(out, frame)
+            return out
+        width, height = self.size
+        self._indices(self._dy, self._fy, self._rows, zoom, height)
+        self._indices(self._dx, self._fx, self._cols, zoom, width)
+        np.take(frame, self._rows, axis=0, out=self._rows_buffer)
+        np.take(self._rows_buffer, self._cols, axis=1, out=out)
+        return out
+
+
+class OverlayBlender:
+    """
+    叠加层混合器
+
+    叠加层在首次显示时才加载，并预先计算 rgb*alpha 与 255-alpha；
+    每帧只处理当前显示的叠加层所覆盖的区域，显示结束后释放
+    """
+
+    def __init__(self, overlays: List[Overlay], size: Tuple[int, int]):
+        """
+        Args:
+            overlays: 叠加层列表，坐标必须是整数像素（见 SubtitleRenderer.overlays）
+            size: 帧尺寸 (width, height)
+        """
+        for ov in overlays:
+            if not (str(ov.x).isdigit() and str(ov.y).isdigit()):
+                raise ValueError(f"逐帧渲染的叠加层坐标必须是像素值: x={ov.x}, y={ov.y}")
+        self.size = size
+        self._pending = sorted(overlays, key=lambda ov: ov.start)
+        self._active = []
+
+    def _load(self, overlay: Overlay):
+        width, height = self.size
+        x, y = int(overlay.x), int(overlay.y)
+        with Image.open(overlay.image_path) as img:
+            rgba = np.asarray(img.convert("RGBA"), dtype=np.uint16)
+        # 裁掉超出画面的部分
+        rgba = rgba[:max(0, height - y), :max(0, width - x)]
+        alpha = rgba[:, :, 3:4]
+        premultiplied = rgba[:, :, :3] * alpha + 127
+        inverse = np.broadcast_to(255 - alpha, premultiplied.shape).copy()
+        scratch = np.empty_like(premultiplied)
+        region = (slice(y, y + rgba.shape[0]), slice(x, x + rgba.shape[1]))
+        return overlay, region, premultiplied, inverse, scratch
+
+    def blend(self, frame: np.ndarray, t: float) -> None:
+        """
+        把 t 时刻显示的叠加层原地混合到 frame
+        """
+        while self._pending and self._pending[0].start <= t:
+            self._active.append(self._load(self._pending.pop(0)))
+        self._active = [item for item in self._active if item[0].end > t]
+
+        for _, region, premultiplied, inverse, scratch in self._active:
+            target = frame[region]
+            # out = (rgb*alpha + frame*(255-alpha) + 127) // 255
+            np.multiply(target, inverse, out=scratch)
+            scratch += premultiplied
+            scratch //= 255
+            np.copyto(target, scratch, casting="unsafe")
+
+
+def render_timeline_frames(
+    timeline: Timeline,
+    output_path: str,
+    frame_cache: Optional[FrameCache] = None,
+    effects: Optional[List[FrameEffect]] = None,
+    preset: str = "ultrafast",
+    profiles: Optional[List[OutputProfile]] = None
+) -> str:
+    """
+    逐帧渲染时间线：Ken Burns 与自定义特效在 Python 中完成，帧经 rawvideo 管道交给 ffmpeg 编码
+
+    缩放规律与 ffmpeg_graph 的 zoompan 一致（较小的缩放倍数归一化为 1，逐帧线性变化）；
+    整个渲染过程只持有源帧（内存映射）、输出缓冲区和采样中间缓冲区；
+    时间线中的叠加层（如预渲染字幕）在同一遍渲染中局部混合
+
+    Args:
+        timeline: 时间线（暂不支持段落间转场）
+        output_path: 输出视频路径
+        frame_cache: 预处理帧缓存，默认使用 FRAME_CACHE_DIR
+        effects: 自定义特效列表，按顺序作用于每一帧
+        preset: x264 编码预设
+        profiles: 额外输出规格，帧只生成一次，由 ffmpeg split 分支编码为各规格
+
+    Returns:
+        输出视频路径
+    """
+    if not timeline.segments:
+        raise ValueError("时间线为空")
+    if timeline.transition > 0:
+        raise ValueError("逐帧渲染暂不支持段落间转场")
+
+    frame_cache = frame_cache or FrameCache()
+    effects = effects or []
+    width, height = timeline.size
+    fps = timeline.fps
+    sampler = KenBurnsSampler(timeline.size)
+    buffer = np.empty((height, width, 3), dtype=np.uint8)
+    blender = OverlayBlender(timeline.overlays, timeline.size)
+
+    # 编码进程在整个逐帧渲染期间运行，全程占用一个 ffmpeg 并发名额
+    with provider_slot("ffmpeg"), FrameWriter(output_path, timeline.size, fps, timeline.audio_path, preset, profiles) as writer:
+        start = 0.0
+        for segment in timeline.segments:
+            end = start + segment.duration
+            # 按全局帧号取整，各段帧数之和与整段时长一致
+            first_frame = round(start * fps)
+            frames = round(end * fps) - first_frame
+            source = frame_cache.get(segment.image_path, timeline.size)
+
+            base = min(segment.start_scale, segment.end_scale)
+            zoom_start = segment.start_scale / base
+            zoom_step = (segment.end_scale / base - zoom_start) / max(frames - 1, 1)
+
+            for k in range(frames):
+                sampler.sample(source, zoom_start + zoom_step * k, buffer)
+                t = (first_frame + k) / fps
+                for effect in effects:
+                    effect(buffer, t)
+                blender.blend(buffer, t)
+                writer.write(buffer)
+            start = end
+
+    return output_path
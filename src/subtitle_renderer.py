@@ -0,0 +1,234 @@
+"""
+字幕预渲染模块
+每条字幕只渲染一次为透明 PNG（按文字、字体与样式缓存），
+作为叠加层在视频编码的同一次处理中烧录进画面，不需要对成片再做一次完整编码
+
+功能：
+- 字幕行渲染（自动换行、描边）与磁盘缓存
+- 字幕片段 → 叠加层（ffmpeg overlay enable=between / 逐帧后端局部 alpha 混合）
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from modules.artifact_store import evict_lru
+from src.ffmpeg_graph import Overlay
+
+SUBTITLE_CACHE_DIR = os.getenv("SUBTITLE_CACHE_DIR", "results/.cache/subtitles")
+# 字幕图片缓存的磁盘预算，超出时按最近使用时间淘汰
+SUBTITLE_CACHE_BUDGET_MB = float(os.getenv("SUBTITLE_CACHE_BUDGET_MB", "256"))
+SUBTITLE_FONT = os.getenv("SUBTITLE_FONT", "")
+
+# 未指定字体时按顺序查找常见的中文字体
+_FONT_CANDIDATES = [
+    "/System/Library/Fonts/PingFang.ttc",
+    "/System/Library/Fonts/STHeiti Medium.ttc",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+    "C:/Windows/Fonts/msyh.ttc",
+]
+
+
+@dataclass(frozen=True)
+class SubtitleStyle:
+    """
+    字幕样式
+
+    Attributes:
+        font_path: 字体文件路径，None 表示自动查找
+        font_size: 字号（像素）
+        color: 文字颜色 RGBA
+        stroke_color: 描边颜色 RGBA
+        stroke_width: 描边宽度（像素）
+        max_width: 单行最大宽度（像素），超出自动换行
+        line_spacing: 行间距（像素）
+        bottom_margin: 字幕底边距画面底部的距离（像素）
+    """
+    font_path: Optional[str] = None
+    font_size: int = 60
+    color: Tuple[int, int, int, int] = (255, 255, 255, 255)
+    stroke_color: Tuple[int, int, int, int] = (0, 0, 0, 255)
+    stroke_width: int = 4
+    max_width: int = 940
+    line_spacing: int = 14
+    bottom_margin: int = 280
+
+
+def find_font(font_path: Optional[str] = None) -> Optional[str]:
+    """
+    返回可用的字体路径：显式指定 > SUBTITLE_FONT > 常见中文字体，都不存在时返回 None
+    """
+    for path in [font_path, SUBTITLE_FONT] + _FONT_CANDIDATES:
+        if path and os.path.exists(path):
+            return path
+    return None
+
+
+class SubtitleRenderer:
+    """
+    字幕渲染器
+
+    同一文字、字体与样式的字幕只渲染一次，PNG 缓存在 SUBTITLE_CACHE_DIR，跨视频复用；
+    每次生成叠加层后若有新写入的字幕，超出磁盘预算时淘汰最久未使用的图片（与 FrameCache 相同的 LRU 策略）
+    """
+
+    def __init__(
+        self,
+        style: Optional[SubtitleStyle] = None,
+        cache_dir: Optional[str] = None,
+        budget_bytes: Optional[int] = None
+    ):
+        """
+        Args:
+            style: 字幕样式，默认 SubtitleStyle()
+            cache_dir: 缓存目录，默认 SUBTITLE_CACHE_DIR
+            budget_bytes: 磁盘预算（字节），默认 SUBTITLE_CACHE_BUDGET_MB
+        """
+        self.style = style or SubtitleStyle()
+        self.cache_dir = cache_dir or SUBTITLE_CACHE_DIR
+        self.budget_bytes = int(SUBTITLE_CACHE_BUDGET_MB * 1024 * 1024) if budget_bytes is None else budget_bytes
+        self.evictions = 0
+        self._written = 0
+        self.font_path = find_font(self.style.font_path)
+        self._font = None
+        self._rendered: Dict[str, Tuple[str, Tuple[int, int]]] = {}
+        if not self.font_path:
+            print("  ⚠️ 未找到中文字体，字幕使用默认字体 (可通过 SUBTITLE_FONT 指定)")
+
+    def _get_font(self):
+        if self._font is None:
+            if self.font_path:
+                self._font = ImageFont.truetype(self.font_path, self.style.font_size)
+            else:
+                try:
+                    self._font = ImageFont.load_default(size=self.style.font_size)
+                except TypeError:
+                    # Pillow < 10.1 的默认字体不支持指定字号
+                    self._font = ImageFont.load_default()
+        return self._font
+
+    def _cache_path(self, text: str) -> str:
+        key = json.dumps([text, self.font_path, asdict(self.style)], ensure_ascii=False, sort_keys=True)
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".png")
+
+    def _wrap(self, text: str, font) -> List[str]:
+        # 中文没有空格分词，按字符贪心换行
+        lines = []
+        current = ""
+        for ch in text:
+            if current and font.getlength(current + ch) + 2 * self.style.stroke_width > self.style.max_width:
+                lines.append(current)
+                current = ch.lstrip()
+            else:
+                current += ch
+        if current:
+            lines.append(current)
+        return lines
+
+    def _draw(self, text: str) -> Image.Image:
+        style = self.style
+        font = self._get_font()
+        lines = self._wrap(text, font)
+
+        boxes = [font.getbbox(line, stroke_width=style.stroke_width) for line in lines]
+        widths = [box[2] - box[0] for box in boxes]
+        heights = [box[3] - box[1] for box in boxes]
+        width = max(widths) + 2
+        height = sum(heights) + style.line_spacing * (len(lines) - 1) + 2
+
+        image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+        y = 0
+        for line, box, line_width, line_height in zip(lines, boxes, widths, heights):
+            x = (width - line_width) // 2
+            draw.text(
+                (x - box[0], y - box[1]), line, font=font, fill=style.color,
+                stroke_width=style.stroke_width, stroke_fill=style.stroke_color
+            )
+            y += line_height + style.line_spacing
+        return image
+
+    def render_line(self, text: str) -> Tuple[str, Tuple[int, int]]:
+        """
+        渲染一条字幕（已缓存时直接返回缓存文件）
+
+        Args:
+            text: 字幕文字
+
+        Returns:
+            (PNG 路径, (宽, 高))
+        """
+        path = self._cache_path(text)
+        # 刷新修改时间，作为 LRU 淘汰的最近使用时间；文件已被淘汰时重新渲染
+        if text in self._rendered and self._touch(path):
+            return self._rendered[text]
+
+        if self._touch(path):
+            with Image.open(path) as image:
+                size = image.size
+        else:
+            image = self._draw(text)
+            size = image.size
+            # 先写临时文件再替换，并发渲染同一条字幕时不会读到不完整的文件
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".png.tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    image.save(f, format="PNG")
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            self._written += 1
+
+        self._rendered[text] = (path, size)
+        return path, size
+
+    def _touch(self, path: str) -> bool:
+        try:
+            os.utime(path, None)
+            return True
+        except OSError:
+            return False
+
+    def overlays(self, subtitle_segments: List[Dict], frame_size: Tuple[int, int]) -> List[Overlay]:
+        """
+        把字幕片段转换为叠加层（水平居中，距底部 bottom_margin）
+
+        Args:
+            subtitle_segments: 字幕片段 [{"start": 0, "end": 2, "text": "..."}]
+            frame_size: 画面尺寸 (width, height)
+
+        Returns:
+            Overlay 列表，坐标为整数像素，可同时用于 ffmpeg 与逐帧后端
+        """
+        frame_w, frame_h = frame_size
+        result = []
+        for seg in subtitle_segments:
+            text = seg.get("text", "").strip()
+            if not text or seg["end"] <= seg["start"]:
+                continue
+            path, (width, height) = self.render_line(text)
+            x = max(0, (frame_w - width) // 2)
+            y = max(0, frame_h - height - self.style.bottom_margin)
+            result.append(Overlay(path, str(x), str(y), seg["start"], seg["end"]))
+
+        # 每个视频最多扫描一次缓存目录；本次用到的字幕刚刷新过修改时间，最后才会被淘汰
+        if self._written:
+            self.evict()
+        return result
+
+    def evict(self) -> None:
+        """
+        超出磁盘预算时按最近使用时间淘汰字幕图片
+        """
+        _, evicted = evict_lru(self.cache_dir, self.budget_bytes)
+        self.evictions += evicted
+        self._written = 0
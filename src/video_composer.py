@@ -4,7 +4,7 @@
 
 功能：
 - 4段式视频合成（Hook-Reason-Emotion-CTA）
-- 字幕叠加
+- 字幕叠加（预渲染字幕图片，与画面同一次编码）
 - Ken Burns动效
 - 文字特效叠加
 """
@@ -18,6 +18,12 @@ from moviepy import (
 from typing import List, Dict, Optional
 from src.video_effects import create_text_overlay, get_ken_burns_params
 from src.subtitle_generator import generate_srt, save_srt
+from src.ffmpeg_graph import Segment, Timeline, render_timeline, render_timeline_segmented
+from src.frame_cache import FrameCache, resize_cover
+from src.frame_writer import FrameEffect, render_timeline_frames
+from src.subtitle_renderer import SubtitleRenderer
+from modules.ffmpeg_utils import ffmpeg_available, media_duration
+from modules.output_profiles import OutputProfile, record_outputs
 from PIL import Image
 
 
@@ -28,15 +34,59 @@ class VideoComposer:
     整合所有素材生成最终视频
     """
 
-    def __init__(self, output_dir: str):
+    def __init__(
+        self,
+        output_dir: str,
+        backend: str = "auto",
+        burn_subtitles: bool = False,
+        segmented: bool = False,
+        incremental: bool = False,
+        frame_cache: Optional[FrameCache] = None,
+        effects: Optional[List[FrameEffect]] = None,
+        subtitle_renderer: Optional[SubtitleRenderer] = None
+    ):
         """
         初始化视频合成器
 
         Args:
             output_dir: 输出目录路径
+            backend: 渲染后端，"moviepy" 逐帧合成；"ffmpeg" 编译为单个 ffmpeg 滤镜图；
+                     "frames" 在 Python 中逐帧生成（支持自定义特效），经 rawvideo 管道交给 ffmpeg 编码；
+                     "auto" 在 ffmpeg 可用时使用 ffmpeg
+            burn_subtitles: ffmpeg / frames 后端下是否把字幕烧录进画面：每条字幕预渲染为透明图片，
+                            作为叠加层在同一次编码中合成（moviepy 后端只生成 SRT）
+            segmented: ffmpeg 后端下按段落并行编码，再用 concat demuxer 流复制拼接
+            incremental: 分段编码时把片段保留在 <视频名>_parts/，再次合成只重新编码输入变化的片段
+                         （开启后自动使用分段编码）
+            frame_cache: 预处理帧缓存（缩放裁剪后的 RGB 帧），默认使用 FRAME_CACHE_DIR
+            effects: "frames" 后端的自定义特效，effect(frame, t) 原地修改每一帧
+            subtitle_renderer: 字幕渲染器（字体与样式），默认 SubtitleRenderer()
         """
         self.output_dir = output_dir
         self.target_size = (1080, 1920)  # 竖屏 9:16
+        if backend not in ("auto", "moviepy", "ffmpeg", "frames"):
+            raise ValueError(f"未知的渲染后端: {backend}")
+        self.backend = backend
+        self.burn_subtitles = burn_subtitles
+        self.segmented = segmented or incremental
+        self.incremental = incremental
+        self.frame_cache = frame_cache or FrameCache()
+        self.effects = effects or []
+        self._subtitle_renderer = subtitle_renderer
+
+    @property
+    def subtitle_renderer(self) -> SubtitleRenderer:
+        # 首次烧录字幕时才查找字体
+        if self._subtitle_renderer is None:
+            self._subtitle_renderer = SubtitleRenderer()
+        return self._subtitle_renderer
+
+    def _use_ffmpeg(self) -> bool:
+        if self.backend == "moviepy":
+            return False
+        if self.backend == "ffmpeg" and not ffmpeg_available():
+            raise RuntimeError("未找到 ffmpeg，无法使用 ffmpeg 渲染后端")
+        return ffmpeg_available()
 
     def compose(
         self,
@@ -45,7 +95,8 @@ class VideoComposer:
         script_data: Dict,
         output_path: str,
         add_subtitles: bool = True,
-        ken_burns: bool = True
+        ken_burns: bool = True,
+        profiles: Optional[List[OutputProfile]] = None
     ) -> str:
         """
         合成视频主函数
@@ -57,6 +108,8 @@ class VideoComposer:
             output_path: 输出视频路径
             add_subtitles: 是否添加字幕
             ken_burns: 是否添加Ken Burns动效
+            profiles: 额外输出规格（如 720p、1:1），ffmpeg / frames 后端下与主视频一次合成、
+                      经 split 分支同时编码；所有输出记录在输出目录的 outputs.json
 
         Returns:
             输出视频路径
@@ -64,6 +117,24 @@ class VideoComposer:
         if len(image_paths) != 4:
             raise ValueError(f"需要4张图片（Hook-Reason-Emotion-CTA），当前: {len(image_paths)}")
 
+        profiles = profiles or []
+        if self.backend == "frames":
+            self._compose_frames(image_paths, audio_path, script_data, output_path, add_subtitles, ken_burns, profiles)
+            record_outputs(output_path, profiles, 24)
+            return output_path
+        if self._use_ffmpeg():
+            try:
+                self._compose_ffmpeg(image_paths, audio_path, script_data, output_path, add_subtitles, ken_burns, profiles)
+                record_outputs(output_path, profiles, 24)
+                return output_path
+            except Exception as e:
+                # 与 generate_video 一致：auto 模式下 ffmpeg 失败时回退到 moviepy，显式指定 ffmpeg 时直接报错
+                if self.backend != "auto":
+                    raise
+                print(f"  ⚠️ ffmpeg 渲染失败 ({e})，回退到 moviepy")
+        if profiles:
+            print("  ⚠️ moviepy 后端不支持多规格输出，只生成主视频")
+
         # 1. 加载音频并获取总时长
         audio_clip = AudioFileClip(audio_path)
         total_duration = audio_clip.duration
@@ -84,19 +155,16 @@ class VideoComposer:
         for i, (img_path, duration) in enumerate(zip(image_paths, durations)):
             segment_name = segments[i]
 
-            # 加载图片
-            img = Image.open(img_path)
-            img_resized = self._resize_image(img, self.target_size)
+            # 加载缩放裁剪后的帧（命中缓存时内存映射读取，不再解码和缩放）
+            frame = self.frame_cache.get(img_path, self.target_size)
 
             # 创建图片clip并应用Ken Burns动效
-            img_array = np.array(img_resized)
-
             if ken_burns:
                 # 获取该段落的动效类型
                 effect_type = self._get_effect_type(segment_name)
-                clip = self._create_ken_burns_clip(img_resized, duration, effect_type)
+                clip = self._create_ken_burns_clip(frame, duration, effect_type)
             else:
-                clip = ImageClip(img_array, duration=duration)
+                clip = ImageClip(frame, duration=duration)
 
             video_clips.append(clip)
             current_time += duration
@@ -129,8 +197,98 @@ class VideoComposer:
         audio_clip.close()
         final_video.close()
 
+        record_outputs(output_path, [], 24)
         return output_path
 
+    def _build_timeline(
+        self,
+        image_paths: List[str],
+        audio_path: str,
+        script_data: Dict,
+        ken_burns: bool
+    ) -> Timeline:
+        """
+        根据脚本时长和段落动效构建时间线（ffmpeg 与 frames 后端共用）
+        """
+        script = script_data.get("script", {})
+        segments = ["hook", "reason", "emotion", "cta"]
+        durations = [script.get(seg, {}).get("duration", 0) for seg in segments]
+
+        # 如果时长缺失，平均分配
+        if sum(durations) == 0:
+            durations = [media_duration(audio_path) / 4] * 4
+
+        timeline_segments = []
+        for img_path, duration, segment_name in zip(image_paths, durations, segments):
+            start_scale = end_scale = 1.0
+            if ken_burns:
+                params = get_ken_burns_params(self._get_effect_type(segment_name), duration)
+                start_scale, end_scale = params["start_scale"], params["end_scale"]
+            timeline_segments.append(Segment(img_path, duration, start_scale, end_scale))
+
+        return Timeline(segments=timeline_segments, audio_path=audio_path, size=self.target_size, fps=24)
+
+    def _compose_ffmpeg(
+        self,
+        image_paths: List[str],
+        audio_path: str,
+        script_data: Dict,
+        output_path: str,
+        add_subtitles: bool,
+        ken_burns: bool,
+        profiles: List[OutputProfile]
+    ) -> str:
+        """
+        ffmpeg 后端：把时间线编译为单个滤镜图，一个 ffmpeg 进程完成缩放动效、拼接、字幕与编码
+
+        参数与 compose 相同
+        """
+        timeline = self._build_timeline(image_paths, audio_path, script_data, ken_burns)
+
+        if add_subtitles:
+            subtitle_segments = self._extract_subtitle_segments(script_data)
+            srt_path = output_path.replace(".mp4", ".srt")
+            save_srt(subtitle_segments, srt_path)
+            if self.burn_subtitles:
+                timeline.overlays += self.subtitle_renderer.overlays(subtitle_segments, self.target_size)
+
+        # 多规格输出需要同一路画面分发到各分支，走单进程滤镜图
+        if self.segmented and profiles:
+            print("  ⚠️ 多规格输出需要单次 ffmpeg 处理，忽略分段/增量编码")
+        if self.segmented and not profiles:
+            cache_dir = os.path.splitext(output_path)[0] + "_parts" if self.incremental else None
+            return render_timeline_segmented(timeline, output_path, cache_dir=cache_dir)
+        return render_timeline(timeline, output_path, profiles)
+
+    def _compose_frames(
+        self,
+        image_paths: List[str],
+        audio_path: str,
+        script_data: Dict,
+        output_path: str,
+        add_subtitles: bool,
+        ken_burns: bool,
+        profiles: List[OutputProfile]
+    ) -> str:
+        """
+        frames 后端：Ken Burns 与自定义特效在预分配缓冲区中逐帧生成，经 rawvideo 管道写入 ffmpeg，
+        内存占用与视频长度无关
+
+        参数与 compose 相同
+        """
+        if not ffmpeg_available():
+            raise RuntimeError("未找到 ffmpeg，无法使用 frames 渲染后端")
+
+        timeline = self._build_timeline(image_paths, audio_path, script_data, ken_burns)
+
+        if add_subtitles:
+            subtitle_segments = self._extract_subtitle_segments(script_data)
+            save_srt(subtitle_segments, output_path.replace(".mp4", ".srt"))
+            if self.burn_subtitles:
+                timeline.overlays += self.subtitle_renderer.overlays(subtitle_segments, self.target_size)
+
+        return render_timeline_frames(timeline, output_path, self.frame_cache, self.effects, profiles=profiles)
+
     def _resize_image(self, img: Image.Image, target_size: tuple) -> Image.Image:
         """
         调整图片大小并裁剪以适应目标尺寸（保持纵横比）
@@ -142,23 +300,7 @@ class VideoComposer:
         Returns:
             调整后的PIL Image
         """
-        target_w, target_h = target_size
-        img_w, img_h = img.size
-
-        # 计算缩放比例（取较大值以填充画面）
-        scale = max(target_w / img_w, target_h / img_h)
-
-        # 缩放图片
-        new_w = int(img_w * scale)
-        new_h = int(img_h * scale)
-        img_resized = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-
-        # 居中裁剪
-        left = (new_w - target_w) // 2
-        top = (new_h - target_h) // 2
-        img_cropped = img_resized.crop((left, top, left + target_w, top + target_h))
-
-        return img_cropped
+        return resize_cover(img, target_size)
 
     def _get_effect_type(self, segment_name: str) -> str:
         """
@@ -180,7 +322,7 @@ class VideoComposer:
 
     def _create_ken_burns_clip(
         self,
-        img: Image.Image,
+        frame: np.ndarray,
         duration: float,
         effect_type: str
     ) -> ImageClip:
@@ -188,7 +330,7 @@ class VideoComposer:
         创建带Ken Burns动效的视频片段（MoviePy 2.x兼容版本）
 
         Args:
-            img: PIL Image对象
+            frame: 缩放裁剪后的 RGB 帧
             duration: 持续时间
             effect_type: 动效类型
 
@@ -197,11 +339,8 @@ class VideoComposer:
         """
         params = get_ken_burns_params(effect_type, duration)
 
-        # 将PIL Image转换为numpy数组
-        img_array = np.array(img)
-
         # 创建基础clip
-        clip = ImageClip(img_array, duration=duration)
+        clip = ImageClip(frame, duration=duration)
 
         # MoviePy 2.x: 使用resized方法应用缩放动效
         if params["start_scale"] != params["end_scale"]:
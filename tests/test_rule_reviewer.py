@@ -0,0 +1,52 @@
+"""
+规则审校 (modules/rule_reviewer.py + review_rules.json) 的生肖年份规则测试
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.rule_reviewer import pre_review
+
+# 已包含安全边距指令，避免 safe_margin 规则干扰
+PROMPT = "Center composition, leave margin."
+
+
+def review_script(text):
+    scripts, _, report = pre_review([text], [PROMPT])
+    fired = [rule_id for rule_id, _ in report.fired]
+    escalated = [rule_id for rule_id, _, _ in report.escalations]
+    return scripts[0], fired, escalated
+
+
+def test_current_year_forms_are_fixed():
+    for before, after in [
+        ("2026龙年开门红", "2026马年开门红"),
+        ("2026年蛇年行情", "2026年马年行情"),
+        ("今年龙年市场火热", "今年马年市场火热"),
+        ("新蛇年新气象", "新马年新气象"),
+    ]:
+        fixed, fired, escalated = review_script(before)
+        assert fixed == after
+        assert "zodiac_year_cn" in fired
+        assert "zodiac_year_mention" not in escalated
+
+
+def test_historical_reference_is_escalated_not_rewritten():
+    fixed, fired, escalated = review_script("去年是龙年，今年行情不同")
+    assert fixed == "去年是龙年，今年行情不同"
+    assert "zodiac_year_cn" not in fired
+    assert "zodiac_year_mention" in escalated
+
+
+def test_ordinary_words_are_not_rewritten():
+    for text in ["恐龙年代的化石", "贪吃蛇年度排行"]:
+        fixed, fired, _ = review_script(text)
+        assert fixed == text
+        assert "zodiac_year_cn" not in fired
+
+
+def test_no_zodiac_mention_needs_no_llm():
+    _, fired, escalated = review_script("白银继续跌停，资金流出")
+    assert "zodiac_year_cn" not in fired
+    assert "zodiac_year_mention" not in escalated
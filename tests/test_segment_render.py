@@ -0,0 +1,48 @@
+"""
+分段编码规划 (modules/segment_render.py + src/ffmpeg_graph.py) 的帧数与 Ken Burns 进度测试
+"""
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.segment_render import plan_windows, still_video_parts
+from src.ffmpeg_graph import Segment, Timeline, timeline_parts
+
+FPS = 24
+# 含非整帧时长，覆盖取整边界
+DURATIONS = [3.37, 5.02, 4.51, 2.98, 6.133]
+
+
+def test_window_frames_sum_to_single_pass_total():
+    total = round(sum(DURATIONS) * FPS)
+    for transition in (0.0, 0.5, 1.0):
+        windows = plan_windows(DURATIONS, transition)
+        assert sum(w.frames(FPS) for w in windows) == total
+        # 窗口首尾相接，覆盖整条时间线
+        assert windows[0].start == 0.0
+        for prev, cur in zip(windows, windows[1:]):
+            assert abs(prev.end - cur.start) < 1e-9
+
+
+def test_still_video_parts_frames_match_total():
+    images = [f"act{i + 1}.png" for i in range(len(DURATIONS))]
+    parts = still_video_parts(images, DURATIONS, (1080, 1920), fps=FPS, transition=1.0)
+    assert sum(part.frames for part in parts) == round(sum(DURATIONS) * FPS)
+    assert [part.name for part in parts][:3] == ["body1", "xfade1_2", "body2"]
+
+
+def test_zoom_start_frames_match_single_pass_graph():
+    segments = [Segment(f"act{i + 1}.png", d, start_scale=1.0, end_scale=1.2) for i, d in enumerate(DURATIONS)]
+    timeline = Timeline(segments=segments, audio_path="audio.mp3", fps=FPS, transition=1.0)
+    parts = timeline_parts(timeline)
+    windows = plan_windows(DURATIONS, timeline.transition)
+    assert len(parts) == len(windows)
+
+    # 整段渲染时第 i 段的第 0 帧位于全局帧 round(starts[i] * fps)
+    starts = [sum(DURATIONS[:i]) for i in range(len(DURATIONS))]
+    for part, window in zip(parts, windows):
+        sources = [window.index] if window.kind == "body" else [window.index - 1, window.index]
+        expected = [round(window.start * FPS) - round(starts[i] * FPS) for i in sources]
+        assert [int(n) for n in re.findall(r"\(on\+(\d+)\)", part.filter_complex)] == expected